@@ -0,0 +1,85 @@
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator
+
+from core.commons import run_cmd
+
+FAKE_UV_DIR = Path(__file__).parent / 'fake_uv'
+
+
+@dataclass
+class CommandRecord:
+    command: str
+    cwd: str
+    returncode: int
+    elapsed: float
+
+    @property
+    def uv_calls(self) -> int:
+        """Количество запусков uv в команде (run_cmd исполняет цепочки вида `uv init && uv sync`)"""
+        return sum(1 for part in self.command.split('&&') if part.strip().startswith('uv '))
+
+
+class CountingRunner:
+    """
+    Исполнитель команд с сигнатурой core.commons.run_cmd, который запоминает каждую команду и время её выполнения.
+    Подключается через run_cmd_func у WorkspaceClerk / менеджеров.
+    """
+
+    def __init__(self, inner: Callable[..., subprocess.CompletedProcess] = run_cmd):
+        self._inner = inner
+        self._lock = threading.Lock()  # packages_depends_apply вызывает исполнитель из нескольких потоков
+        self.records: list[CommandRecord] = []
+
+    def __call__(self, command, cwd, waiting_subprocess: bool = False) -> subprocess.CompletedProcess:
+        start = time.perf_counter()
+        res = self._inner(command=command, cwd=cwd, waiting_subprocess=True)  # замер требует ожидания команды
+        record = CommandRecord(command=command, cwd=str(cwd), returncode=res.returncode,
+                               elapsed=time.perf_counter() - start)
+        with self._lock:
+            self.records.append(record)
+        return res
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+    @property
+    def subprocess_count(self) -> int:
+        return len(self.records)
+
+    @property
+    def uv_calls(self) -> int:
+        return sum(record.uv_calls for record in self.records)
+
+    @property
+    def subprocess_time(self) -> float:
+        return sum(record.elapsed for record in self.records)
+
+
+@contextmanager
+def fake_uv(latency: float = 0.0, log_path: Path | None = None) -> Iterator[None]:
+    """
+    Подмена uv на benchmarks/fake_uv/uv внутри блока: каталог подделки ставится первым в PATH.
+
+    :param latency: задержка каждого вызова uv в секундах
+    :param log_path: журнал вызовов подделки (JSON строки)
+    """
+    saved = {name: os.environ.get(name) for name in ('PATH', 'FAKE_UV_LATENCY', 'FAKE_UV_LOG')}
+    os.environ['PATH'] = str(FAKE_UV_DIR) + os.pathsep + os.environ.get('PATH', '')
+    os.environ['FAKE_UV_LATENCY'] = str(latency)
+    if log_path is not None:
+        os.environ['FAKE_UV_LOG'] = str(log_path)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
@@ -0,0 +1,173 @@
+"""
+Бенчмарк памяти (tracemalloc): сколько занимают в памяти импорты проекта (AstImportsManager) и модели пакетов
+в компактном представлении и в прежнем (обычные dataclass с исходными строками импортов, ключи Path,
+четыре объекта Command с замыканиями на каждый пакет). Прежнее представление воспроизводится здесь же
+из тех же данных, поэтому разница видна за один запуск.
+
+    python -m benchmarks.memory --packages 200 --files 20
+    python -m benchmarks.memory --save benchmarks/results/memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.workspace_generator import WorkspaceParams, generate_workspace
+from core.AST.ast_analize import AstImportsManager
+from core.AST.import_finder import ast_parser_imports
+from core.manager_packages import ManagerPackages
+from core.models import Command, Package
+from core.utils.directory_walker_scandir import directory_walker_scandir
+
+
+@dataclass
+class _LegacyImportResult:
+    raw_string: str
+    level: int = 0
+    module: str | None = None
+    name: str | None = None
+
+
+@dataclass
+class _LegacyPackage:
+    name: str
+    local_path: Path
+    is_installed: bool
+    dependencies: list[str]
+    connect: Command
+    disconnect: Command
+    depends_add: Command
+    depends_remove: Command
+    related_files_loader: Callable[[], list[Path]] | None = field(default=None, repr=False)
+    _related_files: list[Path] | None = field(default=None, init=False, repr=False)
+
+
+def _measure(build: Callable[[], object]) -> tuple[int, object]:
+    """Прирост памяти (байт), который остаётся занятым результатом build"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return after - before, result
+
+
+def _legacy_imports(root_path: Path) -> dict:
+    """Импорты проекта в прежнем виде: {Path: [ImportResult с raw_string]}, обратный индекс с ключами Path"""
+    files = [Path(file_name) for file_name in directory_walker_scandir(root_path_in=root_path, extensions_filter={'.py'})]
+    imports, signatures, by_segment = {}, {}, {}
+    for file in files:
+        stat = os.stat(file)
+        signatures[os.fspath(file)] = (stat.st_mtime_ns, stat.st_size)
+        imprts = [
+            _LegacyImportResult(raw_string=imp.raw_string, level=imp.level,
+                                # копии строк, как их создавал разбор каждого файла
+                                module=''.join(imp.module) if imp.module else None,
+                                name=''.join(imp.name) if imp.name else None)
+            for imp in ast_parser_imports(AstImportsManager.read_file(file), raw_lines=True)
+        ]
+        if imprts:
+            imports[file] = imprts
+            for imp in imprts:
+                segments = (imp.module.split('.') if imp.module else []) + (imp.name.split('.') if imp.name else [])
+                for segment in dict.fromkeys(segments):
+                    by_segment.setdefault(segment, []).append((file, imp))
+    return {'imports': imports, 'signatures': signatures, 'by_segment': by_segment}
+
+
+def _legacy_packages(manager: ManagerPackages, packages: list[Package]) -> list[_LegacyPackage]:
+    def loader_for(path: Path):
+        return lambda: [path]
+
+    return [
+        _LegacyPackage(
+            name=package.name,
+            local_path=package.local_path,
+            is_installed=package.is_installed,
+            dependencies=package.dependencies,
+            connect=Command(description='подключить пакет', parametrs=(),
+                            cmd=manager.make_packages_connect_func(pkg_name=package.name)),
+            disconnect=Command(description='отключить пакет', parametrs=(),
+                               cmd=manager.make_packages_disconnect_func(pkg_name=package.name)),
+            depends_add=Command(description='установить depends в пакет',
+                                parametrs=('Устанавливаемые зависимости через пробел',),
+                                cmd=manager.make_depends_add(pkg_name=package.name)),
+            depends_remove=Command(description='удалить depends из пакета',
+                                   parametrs=('удаляемые зависимости через пробел',),
+                                   cmd=manager.make_depends_remove(pkg_name=package.name)),
+            related_files_loader=loader_for(package.local_path),
+        )
+        for package in packages
+    ]
+
+
+def _compact_packages(manager: ManagerPackages, packages: list[Package]) -> list[Package]:
+    def loader(path: Path) -> list[Path]:
+        return [path]
+
+    return [
+        Package(name=package.name, local_path=package.local_path, is_installed=package.is_installed,
+                dependencies=package.dependencies, commands_owner=manager, related_files_loader=loader)
+        for package in packages
+    ]
+
+
+def run_memory(params: WorkspaceParams) -> dict:
+    with tempfile.TemporaryDirectory(prefix='workspaceclerk-mem-') as tmp:
+        root_path = Path(tmp) / 'workspace'
+        src_path = generate_workspace(root_path, params)
+
+        legacy_imports, _ = _measure(lambda: _legacy_imports(root_path))
+        compact_imports, _ = _measure(lambda: AstImportsManager(root_path_in=root_path, use_cache=False))
+
+        manager = ManagerPackages(root_path_in=root_path, src_path_in=src_path)
+        packages = list(manager.packages_get_list(limit=10 ** 6))
+        legacy_packages, _ = _measure(lambda: _legacy_packages(manager, packages))
+        compact_packages, _ = _measure(lambda: _compact_packages(manager, packages))
+
+    return {
+        'params': params.as_dict(),
+        'results': {
+            'imports': {'legacy': legacy_imports, 'compact': compact_imports},
+            'packages': {'legacy': legacy_packages, 'compact': compact_packages},
+        },
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    defaults = WorkspaceParams()
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.memory',
+                                     description='Память импортов и моделей пакетов: прежнее и компактное представление')
+    parser.add_argument('--packages', type=int, default=defaults.packages)
+    parser.add_argument('--files', type=int, default=defaults.files_per_package, help='модулей в пакете')
+    parser.add_argument('--imports', type=int, default=defaults.imports_per_file, help='импортов в модуле')
+    parser.add_argument('--save', type=Path, default=None, help='сохранить результат в JSON')
+    args = parser.parse_args(argv)
+
+    params = WorkspaceParams(packages=args.packages, files_per_package=args.files, imports_per_file=args.imports)
+    current = run_memory(params)
+
+    print(f'{"замер":<12} {"прежнее, КБ":>12} {"компактное, КБ":>15} {"экономия":>9}')
+    for name, result in current['results'].items():
+        legacy, compact = result['legacy'], result['compact']
+        saving = 1 - compact / legacy if legacy else 0.0
+        print(f'{name:<12} {legacy / 1024:>12.1f} {compact / 1024:>15.1f} {saving:>9.0%}')
+
+    if args.save is not None:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(current, indent=2), encoding='utf8')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Бенчмарк изменяющих операций WorkspaceClerk на подделке uv (benchmarks/fake_uv): время и количество
+запущенных процессов. Каждый сценарий выполняется на заново сгенерированном workspace.
+
+    python -m benchmarks.mutations --packages 20 --latency 0.05
+    python -m benchmarks.mutations --scenario connect_all_uv --scenario connect_all_toml --save out.json
+
+--latency имитирует время разрешения зависимостей настоящим uv, поэтому разница между сценариями
+показывает выигрыш от сокращения числа вызовов uv.
+"""
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.accounting import CountingRunner, fake_uv
+from benchmarks.workspace_generator import WorkspaceParams, generate_workspace
+from core.constants import ENGINE_TOML, TOML_FILE_NAME
+from core.main import WorkspaceClerk
+from core.models import Status, DependsChange
+
+_DEPENDS = {'anyio>=4', 'attrs>=23', 'idna>=3'}
+_NEW_PACKAGES = {f'new_pkg{i}' for i in range(5)}
+
+
+def _package_names(clerk: WorkspaceClerk) -> list[str]:
+    return sorted(package.name for package in clerk.packages_list(limit=10 ** 6))
+
+
+def scenario_connect_all_uv(clerk: WorkspaceClerk):
+    return clerk.packages_connect_all()
+
+
+def scenario_connect_all_uv_each(clerk: WorkspaceClerk):
+    return clerk.packages_connect_all(ordered=False)
+
+
+def scenario_connect_all_toml(clerk: WorkspaceClerk):
+    return clerk.packages_connect_all(engine=ENGINE_TOML, finalize='sync')
+
+
+def scenario_disconnect_all(clerk: WorkspaceClerk):
+    return clerk.packages_disconnect_all()
+
+
+_DEPENDENCIES_RE = re.compile(r'^dependencies = \[.*?\]$', re.MULTILINE | re.DOTALL)
+
+
+def scenario_disconnect_toml(clerk: WorkspaceClerk):
+    """
+    Отключение одного пакета движком toml с проверкой записи: остальные элементы project.dependencies корня
+    (библиотека между пакетами workspace, у каждого элемента комментарий) сохраняют исходный порядок и текст
+    """
+    toml_path = clerk._root_path / TOML_FILE_NAME
+    text = toml_path.read_text(encoding='utf8')
+    depends = _DEPENDENCIES_RE.search(text)
+    workspace = [name for name in re.findall(r'"([^"]+)"', depends.group()) if name != 'requests>=2']
+    if len(workspace) < 2:
+        return [Status(success=False, message='⚠ Для проверки нужно не меньше двух подключенных пакетов.')]
+
+    lines = [f'    "{name}",  # {i}\n' for i, name in enumerate([workspace[0], 'requests>=2', *workspace[1:]])]
+    toml_path.write_text(text[:depends.start()] + 'dependencies = [\n' + ''.join(lines) + ']'
+                         + text[depends.end():], encoding='utf8')
+
+    statuses = clerk.packages_disconnect(packages={workspace[-1]}, engine=ENGINE_TOML)
+
+    written = _DEPENDENCIES_RE.search(toml_path.read_text(encoding='utf8')).group()
+    expected = 'dependencies = [\n' + ''.join(lines[:-1]) + ']'
+    if written != expected:
+        return statuses + [Status(success=False,
+                                  message=f'❌ project.dependencies записан с изменением порядка или текста:\n{written}')]
+    return statuses
+
+
+def scenario_depends_add(clerk: WorkspaceClerk):
+    statuses = []
+    for name in _package_names(clerk)[:5]:
+        statuses += clerk.packages_depends_add(package=name, depends=_DEPENDS)
+    return statuses
+
+
+def scenario_depends_add_batch(clerk: WorkspaceClerk):
+    with clerk.batch() as session:
+        statuses = scenario_depends_add(clerk)
+    return statuses + [session.status]
+
+
+def scenario_depends_apply(clerk: WorkspaceClerk):
+    matrix = {name: DependsChange(add=set(_DEPENDS)) for name in _package_names(clerk)[:5]}
+    return clerk.packages_depends_apply(matrix=matrix)
+
+
+def scenario_create(clerk: WorkspaceClerk):
+    return clerk.packages_create(packages=set(_NEW_PACKAGES))
+
+
+def scenario_create_batch(clerk: WorkspaceClerk):
+    with clerk.batch() as session:
+        statuses = clerk.packages_create(packages=set(_NEW_PACKAGES))
+    return statuses + [session.status]
+
+
+def scenario_project_depends_add(clerk: WorkspaceClerk):
+    return clerk.project_depends_add(depends=set(_DEPENDS))
+
+
+SCENARIOS: dict[str, Callable[[WorkspaceClerk], list]] = {
+    'connect_all_uv': scenario_connect_all_uv,
+    'connect_all_uv_each': scenario_connect_all_uv_each,
+    'connect_all_toml': scenario_connect_all_toml,
+    'disconnect_all': scenario_disconnect_all,
+    'disconnect_toml': scenario_disconnect_toml,
+    'depends_add': scenario_depends_add,
+    'depends_add_batch': scenario_depends_add_batch,
+    'depends_apply': scenario_depends_apply,
+    'create': scenario_create,
+    'create_batch': scenario_create_batch,
+    'project_depends_add': scenario_project_depends_add,
+}
+
+
+def _failed(statuses: list) -> int:
+    """Количество неуспешных статусов (в том числе во вложенных списках)"""
+    count = 0
+    for status in statuses:
+        if isinstance(status, list):
+            count += _failed(status)
+        elif isinstance(status, Status) and not status.success:
+            count += 1
+    return count
+
+
+def run_scenario(name: str, params: WorkspaceParams, latency: float) -> dict:
+    with tempfile.TemporaryDirectory(prefix='workspaceclerk-mut-') as tmp:
+        root_path = Path(tmp) / 'workspace'
+        src_path = generate_workspace(root_path, params)
+        runner = CountingRunner()
+
+        with fake_uv(latency=latency):
+            clerk = WorkspaceClerk(root_path_in=root_path, src_path_in=src_path,
+                                   waiting_subprocess=True, run_cmd_func=runner)
+            runner.reset()  # проверка uv при создании не относится к сценарию
+
+            start = time.perf_counter()
+            statuses = SCENARIOS[name](clerk)
+            wall = time.perf_counter() - start
+
+    return {
+        'wall': wall,
+        'subprocesses': runner.subprocess_count,
+        'uv_calls': runner.uv_calls,
+        'subprocess_time': runner.subprocess_time,
+        'failed': _failed(statuses),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.mutations',
+                                     description='Бенчмарк изменяющих операций на подделке uv')
+    parser.add_argument('--packages', type=int, default=20)
+    parser.add_argument('--files', type=int, default=2, help='модулей в пакете')
+    parser.add_argument('--latency', type=float, default=0.0, help='задержка каждого вызова uv, секунды')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), default=None)
+    parser.add_argument('--save', type=Path, default=None, help='сохранить результат в JSON')
+    args = parser.parse_args(argv)
+
+    params = WorkspaceParams(packages=args.packages, files_per_package=args.files)
+    results = {}
+    print(f'{"сценарий":<22} {"время, с":>9} {"процессов":>10} {"вызовов uv":>11} {"в uv, с":>8} {"ошибок":>7}')
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name, params=params, latency=args.latency)
+        results[name] = result
+        print(f'{name:<22} {result["wall"]:>9.3f} {result["subprocesses"]:>10} {result["uv_calls"]:>11} '
+              f'{result["subprocess_time"]:>8.3f} {result["failed"]:>7}')
+
+    if args.save is not None:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps({
+            'params': {**params.as_dict(), 'latency': args.latency},
+            'results': results,
+        }, indent=2), encoding='utf8')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
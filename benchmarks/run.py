@@ -0,0 +1,270 @@
+"""
+Бенчмарки WorkspaceClerk на синтетическом workspace (см. workspace_generator).
+
+    python -m benchmarks.run                                   # таблица результатов
+    python -m benchmarks.run --save benchmarks/results/base.json
+    python -m benchmarks.run --compare benchmarks/results/base.json --threshold 1.25
+
+Для каждого замера выполняется --repeat повторов, в результат попадают минимум и медиана (секунды).
+При сравнении с базовым файлом регрессией считается рост минимума больше чем в threshold раз,
+код возврата при регрессии - 1. Результаты зависят от машины, поэтому в репозиторий не сохраняются
+(директория benchmarks/results в .gitignore).
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.workspace_generator import WorkspaceParams, generate_workspace
+from core.constants import TOML_FILE_NAME
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class BenchContext:
+    root_path: Path
+    src_path: Path
+    params: WorkspaceParams
+
+    @property
+    def package_paths(self) -> list[Path]:
+        return sorted(path for path in self.src_path.iterdir() if path.is_dir())
+
+
+def _no_uv_run_cmd(command, cwd, waiting_subprocess: bool = False) -> subprocess.CompletedProcess:
+    """Исполнитель команд без запуска uv (замеряется только работа WorkspaceClerk)"""
+    return subprocess.CompletedProcess(args=command, returncode=0, stdout='uv 0.0.0 (benchmark)', stderr='')
+
+
+# замер: (контекст) -> (подготовка перед каждым повтором или None, замеряемая функция)
+BenchCase = Callable[[BenchContext], tuple[Callable[[], None] | None, Callable[[], None]]]
+
+
+def case_ast_scan_cold(ctx: BenchContext):
+    from core.AST.ast_analize import AstImportsManager
+
+    return None, lambda: AstImportsManager(root_path_in=ctx.root_path, use_cache=False)
+
+
+def case_ast_scan_indexed(ctx: BenchContext):
+    from core.AST.ast_analize import AstImportsManager
+
+    AstImportsManager(root_path_in=ctx.root_path)  # заполнение постоянного индекса
+    return None, lambda: AstImportsManager(root_path_in=ctx.root_path)
+
+
+def case_relative_files(ctx: BenchContext):
+    from core.AST.ast_analize import AstImportsManager
+
+    state = {}
+    package_paths = ctx.package_paths
+
+    def setup():  # новое сканирование, чтобы не замерять запомненные результаты
+        state['manager'] = AstImportsManager(root_path_in=ctx.root_path)
+
+    def run():
+        manager = state['manager']
+        for package_path in package_paths:
+            manager.get_package_relative_files(package_path)
+
+    return setup, run
+
+
+def case_packages_list(ctx: BenchContext):
+    from core.main import WorkspaceClerk
+    from core.utils.toml_cache import toml_cache
+
+    def run():
+        toml_cache.clear()
+        clerk = WorkspaceClerk(root_path_in=ctx.root_path, src_path_in=ctx.src_path,
+                               waiting_subprocess=True, run_cmd_func=_no_uv_run_cmd)
+        for package in clerk.packages_list(limit=len(ctx.package_paths)):
+            _ = package.related_files
+
+    return None, run
+
+
+def case_toml_read(ctx: BenchContext):
+    from core.utils.manager_toml import TomlManager
+    from core.utils.toml_cache import toml_cache
+
+    toml_paths = [ctx.root_path / TOML_FILE_NAME] + [path / TOML_FILE_NAME for path in ctx.package_paths]
+
+    def run():
+        toml_cache.clear()  # замеряется разбор файлов, а не попадание в кеш
+        for toml_path in toml_paths:
+            TomlManager(toml_path)
+
+    return None, run
+
+
+def case_toml_write(ctx: BenchContext):
+    from core.utils.manager_toml import TomlManager
+
+    toml_path = ctx.root_path / TOML_FILE_NAME
+    original = toml_path.read_bytes()
+    state = {}
+
+    def setup():
+        toml_path.write_bytes(original)
+        state['manager'] = TomlManager(toml_path)
+
+    def run():
+        manager = state['manager']
+        manager.depends_add('benchmark-dependency>=1')
+        manager.write_toml()
+
+    return setup, run
+
+
+def case_toml_lookup(ctx: BenchContext):
+    from core.utils.manager_toml import TomlManager
+
+    manager = TomlManager(ctx.root_path / TOML_FILE_NAME)
+    names = [path.name for path in ctx.package_paths]
+
+    def run():
+        for name in names:
+            manager.is_package_in_workspaces(name)
+            manager.is_package_in_dependencies(name)
+            manager.is_package_in_sources(name)
+
+    return None, run
+
+
+def case_walker_filtered(ctx: BenchContext):
+    from core.utils.directory_walker_filtered import directory_walker_filtered
+
+    return None, lambda: list(directory_walker_filtered(root_path_in=ctx.root_path, extensions_filter={'.py', }))
+
+
+def case_walker_scandir(ctx: BenchContext):
+    from core.utils.directory_walker_scandir import directory_walker_scandir
+
+    return None, lambda: list(directory_walker_scandir(root_path_in=ctx.root_path, extensions_filter={'.py', }))
+
+
+CASES: dict[str, BenchCase] = {
+    'ast_scan_cold': case_ast_scan_cold,
+    'ast_scan_indexed': case_ast_scan_indexed,
+    'relative_files': case_relative_files,
+    'packages_list': case_packages_list,
+    'toml_read': case_toml_read,
+    'toml_write': case_toml_write,
+    'toml_lookup': case_toml_lookup,
+    'walker_filtered': case_walker_filtered,
+    'walker_scandir': case_walker_scandir,
+}
+
+
+def measure(case: BenchCase, ctx: BenchContext, repeat: int) -> dict:
+    setup, run = case(ctx)
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return {'min': min(timings), 'median': statistics.median(timings), 'repeat': repeat}
+
+
+def run_benchmarks(params: WorkspaceParams, repeat: int = 5, cases: list[str] | None = None,
+                   workdir: Path | None = None) -> dict:
+    """
+    Генерация workspace и выполнение замеров
+
+    :return: результат в формате базового файла
+    """
+    with tempfile.TemporaryDirectory(prefix='workspaceclerk-bench-', dir=workdir) as tmp:
+        root_path = Path(tmp) / 'workspace'
+        src_path = generate_workspace(root_path, params)
+        ctx = BenchContext(root_path=root_path, src_path=src_path, params=params)
+
+        results = {}
+        for name in cases or CASES:
+            results[name] = measure(CASES[name], ctx=ctx, repeat=repeat)
+
+    return {
+        'version': BASELINE_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': params.as_dict(),
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Названия замеров, замедлившихся больше чем в threshold раз"""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is not None and base['min'] > 0 and result['min'] / base['min'] > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _print_table(current: dict, baseline: dict | None):
+    header = f'{"замер":<20} {"min, мс":>10} {"median, мс":>11}'
+    print(header + (f' {"база, мс":>10} {"x":>6}' if baseline else ''))
+    for name, result in current['results'].items():
+        line = f'{name:<20} {result["min"] * 1000:>10.2f} {result["median"] * 1000:>11.2f}'
+        base = baseline['results'].get(name) if baseline else None
+        if base is not None:
+            ratio = result['min'] / base['min'] if base['min'] > 0 else float('inf')
+            line += f' {base["min"] * 1000:>10.2f} {ratio:>6.2f}'
+        print(line)
+
+
+def main(argv: list[str] | None = None) -> int:
+    defaults = WorkspaceParams()
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Бенчмарки WorkspaceClerk')
+    parser.add_argument('--packages', type=int, default=defaults.packages)
+    parser.add_argument('--files', type=int, default=defaults.files_per_package, help='модулей в пакете')
+    parser.add_argument('--imports', type=int, default=defaults.imports_per_file, help='импортов в модуле')
+    parser.add_argument('--density', type=float, default=defaults.density, help='доля импортов других пакетов')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--case', action='append', choices=sorted(CASES), default=None,
+                        help='выполнить только указанные замеры (можно повторять)')
+    parser.add_argument('--save', type=Path, default=None, help='сохранить результат в JSON')
+    parser.add_argument('--compare', type=Path, default=None, help='сравнить с сохранённым результатом')
+    parser.add_argument('--threshold', type=float, default=1.25, help='допустимое замедление относительно базы')
+    args = parser.parse_args(argv)
+
+    params = WorkspaceParams(
+        packages=args.packages, files_per_package=args.files, imports_per_file=args.imports,
+        density=args.density, seed=args.seed,
+    )
+    current = run_benchmarks(params=params, repeat=args.repeat, cases=args.case)
+
+    baseline = None
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text(encoding='utf8'))
+        if baseline.get('params') != current['params']:
+            print('⚠ Параметры workspace отличаются от базового файла, сравнение некорректно', file=sys.stderr)
+
+    _print_table(current, baseline)
+
+    if args.save is not None:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        args.save.write_text(json.dumps(current, indent=2), encoding='utf8')
+
+    if baseline is not None:
+        regressions = compare(current, baseline, threshold=args.threshold)
+        if regressions:
+            print(f'❌ Замедление больше чем в {args.threshold} раз: {", ".join(regressions)}', file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
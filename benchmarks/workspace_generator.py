@@ -0,0 +1,102 @@
+"""
+Генератор синтетических uv workspace для бенчмарков.
+
+    корень/
+        pyproject.toml          - workspace, подключена часть пакетов
+        main.py                 - импорты подключенных пакетов
+        src/pkgN/pyproject.toml
+        src/pkgN/src/pkgN/__init__.py, mod_K.py - импорты stdlib и (с вероятностью density) других пакетов
+"""
+import random
+import shutil
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+from core.constants import TOML_FILE_NAME
+
+_STDLIB_MODULES = ('os', 'sys', 'json', 're', 'math', 'typing', 'pathlib', 'itertools', 'functools', 'collections')
+_THIRD_PARTY = ('requests>=2', 'pyyaml>=6', 'httpx>=0.27', 'rich>=13', 'click>=8')
+
+
+@dataclass
+class WorkspaceParams:
+    packages: int = 20  # количество пакетов в src
+    files_per_package: int = 10  # модулей в каждом пакете
+    imports_per_file: int = 8  # импортов в каждом модуле
+    density: float = 0.3  # доля импортов, ссылающихся на другие пакеты workspace
+    connected: float = 0.5  # доля пакетов, подключенных к workspace корня
+    seed: int = 0
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def _toml_list(items: list[str]) -> str:
+    return '[' + ', '.join(f'"{item}"' for item in items) + ']'
+
+
+def _project_toml(name: str, depends: list[str]) -> str:
+    return (
+        '[project]\n'
+        f'name = "{name}"\n'
+        'version = "0.1.0"\n'
+        'description = ""\n'
+        'requires-python = ">=3.12"\n'
+        f'dependencies = {_toml_list(depends)}\n'
+    )
+
+
+def _make_import(rnd: random.Random, params: WorkspaceParams, package_names: list[str], self_name: str) -> str:
+    if len(package_names) > 1 and rnd.random() < params.density:
+        target = rnd.choice([name for name in package_names if name != self_name])
+        module = rnd.randrange(params.files_per_package)
+        kind = rnd.randrange(3)
+        if kind == 0:
+            return f'import {target}'
+        if kind == 1:
+            return f'from {target} import mod_{module}'
+        return f'from {target}.mod_{module} import func_{module}'
+
+    module = rnd.choice(_STDLIB_MODULES)
+    return f'import {module}' if rnd.random() < 0.5 else f'from {module} import *'
+
+
+def generate_workspace(root_path_in: Path, params: WorkspaceParams | None = None) -> Path:
+    """
+    Создание (пересоздание) синтетического workspace. Содержимое детерминировано параметрами (seed).
+
+    :param root_path_in: директория workspace (удаляется, если существует)
+    :param params: параметры генерации
+    :return: путь к директории с пакетами (src)
+    """
+    params = params or WorkspaceParams()
+    rnd = random.Random(params.seed)
+
+    shutil.rmtree(root_path_in, ignore_errors=True)
+    src_path = root_path_in / 'src'
+    src_path.mkdir(parents=True)
+
+    package_names = [f'pkg{i}' for i in range(params.packages)]
+    connected = [name for name in package_names if rnd.random() < params.connected]
+
+    for name in package_names:
+        package_path = src_path / name
+        module_path = package_path / 'src' / name
+        module_path.mkdir(parents=True)
+        depends = rnd.sample(_THIRD_PARTY, k=2)
+        (package_path / TOML_FILE_NAME).write_text(_project_toml(name, depends), encoding='utf8')
+        (module_path / '__init__.py').write_text('', encoding='utf8')
+
+        for module in range(params.files_per_package):
+            lines = [_make_import(rnd, params, package_names, name) for _ in range(params.imports_per_file)]
+            lines += ['', '', f'def func_{module}():', '    return None', '']
+            (module_path / f'mod_{module}.py').write_text('\n'.join(lines), encoding='utf8')
+
+    root_toml = _project_toml('workspace-root', ['requests>=2', *connected])
+    root_toml += f'\n[tool.uv.workspace]\nmembers = {_toml_list([f"src/{name}" for name in connected])}\n'
+    root_toml += '\n[tool.uv.sources]\n' + ''.join(f'{name} = {{ workspace = true }}\n' for name in connected)
+    (root_path_in / TOML_FILE_NAME).write_text(root_toml, encoding='utf8')
+    (root_path_in / 'main.py').write_text(''.join(f'import {name}\n' for name in connected), encoding='utf8')
+
+    return src_path
+
@@ -1,30 +1,231 @@
 from core.AST.is_relative_import_packages import is_relative_import_package
-from core.AST.import_finder import ast_parser_imports, ImportResult
-from core.utils.directory_walker_filtered import directory_walker_filtered
+from core.AST.import_finder import ast_parser_imports, ImportResult, IMPORT_ENGINE_NATIVE
+from core.AST.imports_index import ImportsIndex
+from core.utils.directory_walker_scandir import directory_walker_scandir
+from core.constants import CACHE_DIR_NAME, IMPORTS_INDEX_FILE_NAME
+from core.tracing import span
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
 import tokenize
+import os
+
+_PARALLEL_MIN_FILES = 64  # при меньшем числе файлов запуск пула процессов дороже самого разбора
+_PARALLEL_CHUNKS_PER_WORKER = 4  # на сколько пачек в среднем делится работа одного процесса
+
+
+class _ImportsView(Mapping):
+    """
+    Импорты проекта в виде {Path файла: (ImportResult, ...)} только для чтения.
+    Внутри менеджера импорты хранятся по целочисленным идентификаторам файлов, Path создаются при обращении.
+    """
+    __slots__ = ('_manager',)
+
+    def __init__(self, manager: 'AstImportsManager'):
+        self._manager = manager
+
+    def __getitem__(self, file) -> tuple[ImportResult, ...]:
+        file_id = self._manager._file_ids.get(os.fspath(file))
+        if file_id is None or file_id not in self._manager._imports:
+            raise KeyError(file)
+        return self._manager._imports[file_id]
+
+    def __iter__(self):
+        files = self._manager._files
+        return (Path(files[file_id]) for file_id in self._manager._imports)
+
+    def __len__(self) -> int:
+        return len(self._manager._imports)
 
 
 class AstImportsManager:
-    def __init__(self, root_path_in):
+    def __init__(self, root_path_in, use_cache: bool = True, cache_hash_check: bool = False,
+                 workers: int | None = 1, import_engine: str = IMPORT_ENGINE_NATIVE,
+                 ignore_dirs: set[str] | None = None, use_gitignore: bool = True, raw_lines: bool = False):
+        """
+        :param root_path_in: корень сканируемого проекта
+        :param use_cache: использовать постоянный индекс импортов в `.workspaceclerk/` (разбираются только изменённые файлы)
+        :param cache_hash_check: при несовпадении mtime файла сверять хеш содержимого перед повторным разбором
+        :param workers: количество процессов для разбора файлов (1 - последовательно, None - по числу ядер)
+        :param import_engine: движок поиска импортов (см. IMPORT_ENGINE_* в import_finder)
+        :param ignore_dirs: имена директорий, которые не сканируются (None - DEFAULT_IGNORE_DIRS)
+        :param use_gitignore: не сканировать файлы и директории, исключённые через .gitignore
+        :param raw_lines: хранить исходные строки импортов (ImportResult.raw_string), по умолчанию не хранятся
+        """
         self._root_path = root_path_in
-        self.imports = {}
-        self._start()
+        self._use_cache = use_cache
+        self._cache_hash_check = cache_hash_check
+        self._workers = workers if workers is not None else (os.cpu_count() or 1)
+        self._import_engine = import_engine
+        self._ignore_dirs = ignore_dirs
+        self._use_gitignore = use_gitignore
+        self._raw_lines = raw_lines
+        # файлы хранятся строками с целочисленными идентификаторами (идентификатор - индекс в _files)
+        self._files: list[str] = []
+        self._file_ids: dict[str, int] = {}
+        self._imports: dict[int, tuple[ImportResult, ...]] = {}  # только файлы, в которых есть импорты
+        # обратный индекс: сегмент пути импорта -> (файл, импорт). Импорт может относиться к пакету только если
+        # название директории пакета совпадает с одним из сегментов импорта (module + name)
+        self._imports_by_segment: dict[str, list[tuple[int, ImportResult]]] = {}
+        self._package_relative_files: dict[Path, list[Path]] = {}  # уже вычисленные связанные файлы пакетов
+        self._signatures: dict[str, tuple[int, int]] = {}  # файл -> (mtime_ns, размер) на момент сканирования
+        with span('ast.scan', root=str(self._root_path), workers=self._workers) as current:
+            self._start()
+            self._build_segments_index()
+            current.set(files=len(self._signatures), files_with_imports=len(self._imports))
 
-    def _start(self):
-        python_files_generator = directory_walker_filtered(
+    @property
+    def imports(self) -> Mapping[Path, tuple[ImportResult, ...]]:
+        """Импорты по файлам (только файлы, в которых есть импорты), в порядке обхода проекта"""
+        return _ImportsView(self)
+
+    def _file_id(self, file_name: str) -> int:
+        file_id = self._file_ids.get(file_name)
+        if file_id is None:
+            file_id = len(self._files)
+            self._files.append(file_name)
+            self._file_ids[file_name] = file_id
+        return file_id
+
+    def _walk(self):
+        return directory_walker_scandir(
             root_path_in=self._root_path,
             extensions_filter={'.py', },
-            dirs_filter={'.venv', 'venv', 'idea', '.idea'},
-            dirs_filter_exclude=True,
+            ignore_dirs=self._ignore_dirs,
+            use_gitignore=self._use_gitignore,
         )
 
+    def _start(self):
+        python_files_generator = self._walk()
+
+        index = None
+        if self._use_cache:
+            index = ImportsIndex(
+                index_path_in=self._root_path / CACHE_DIR_NAME / IMPORTS_INDEX_FILE_NAME,
+                hash_check=self._cache_hash_check,
+                engine=self._import_engine,
+                raw_lines=self._raw_lines,
+            )
+        indexed_files = set()
+        root_prefix = os.path.join(os.fspath(self._root_path), '')  # для ключей индекса без создания Path
+
         # 1 раз сканируются все файлы при инициализации, заполняя список imports
-        for file in python_files_generator:
-            source = self.read_file(file)
-            imprts: list[ImportResult] = ast_parser_imports(source_code_in=source)
+        # (при наличии индекса заново разбираются только файлы, изменённые с прошлого сканирования)
+        files_imports: dict[int, list[ImportResult] | None] = {}
+        files_to_parse = []  # (идентификатор файла, ключ в индексе, stat)
+        for file_name in python_files_generator:
+            file_id = self._file_id(file_name)
+            imprts = None
+            key = None
+            stat = os.stat(file_name)
+            self._signatures[file_name] = (stat.st_mtime_ns, stat.st_size)
+            if index is not None:
+                key = file_name[len(root_prefix):].replace(os.sep, '/')
+                indexed_files.add(key)
+                imprts = index.get(key=key, file_path=Path(file_name), stat=stat)
+
+            if imprts is None:
+                files_to_parse.append((file_id, key, stat))
+            files_imports[file_id] = imprts
+
+        parsed = self._parse_files([Path(self._files[file_id]) for file_id, _, _ in files_to_parse])
+        for (file_id, key, stat), imprts in zip(files_to_parse, parsed):
+            files_imports[file_id] = imprts
+            if index is not None:
+                index.put(key=key, file_path=Path(self._files[file_id]), stat=stat, imports=imprts)
+
+        # порядок файлов в imports совпадает с порядком обхода (одинаково для последовательного и параллельного режима)
+        for file_id, imprts in files_imports.items():
+            if imprts:
+                self._imports[file_id] = tuple(imprts)
+
+        if index is not None:
+            index.retain(keys=indexed_files)
+            index.save()
+
+    def refresh(self) -> bool:
+        """
+        Повторное сканирование для долгоживущих процессов (демон, наблюдение за проектом): разбираются только
+        новые и изменённые с прошлого сканирования файлы, удалённые файлы выбывают.
+        Постоянный индекс в `.workspaceclerk/` не перезаписывается.
+
+        :return: были ли изменения
+        """
+        current = set()
+        changed = []
+        for file_name in self._walk():
+            current.add(file_name)
+            try:
+                stat = os.stat(file_name)
+            except OSError:  # файл удалён во время обхода
+                continue
+            if self._signatures.get(file_name) != (stat.st_mtime_ns, stat.st_size):
+                changed.append(Path(file_name))
+
+        removed = [Path(file_name) for file_name in self._signatures.keys() - current]
+        with span('ast.update', changed=len(changed), removed=len(removed)):
+            return self.update_files(changed=changed, removed=removed)
+
+    def update_files(self, changed: list[Path], removed: list[Path]) -> bool:
+        """
+        Точечное обновление импортов: изменённые файлы разбираются заново, удалённые выбывают.
+        Обратный индекс и запомненные связанные файлы обновляются только для затронутых сегментов импортов.
+
+        :param changed: новые и изменённые файлы
+        :param removed: удалённые файлы
+        :return: были ли изменения
+        """
+        if not changed and not removed:
+            return False
+
+        touched_segments = set()
+        for file in [*changed, *removed]:
+            file_name = os.fspath(file)
+            self._signatures.pop(file_name, None)
+            file_id = self._file_ids.get(file_name)
+            for imp in self._imports.pop(file_id, ()):
+                for segment in self._import_segments(imp):
+                    touched_segments.add(segment)
+                    rows = self._imports_by_segment.get(segment)
+                    if rows:
+                        rows[:] = [row for row in rows if row[0] != file_id]
+
+        parsed = self._parse_files(changed)
+        for file, imprts in zip(changed, parsed):
+            file_name = os.fspath(file)
+            try:
+                stat = os.stat(file_name)
+            except OSError:  # файл удалён после получения списка изменений
+                continue
+            file_id = self._file_id(file_name)
+            self._signatures[self._files[file_id]] = (stat.st_mtime_ns, stat.st_size)
             if imprts:
-                self.imports[file] = imprts
+                self._imports[file_id] = tuple(imprts)
+                for imp in imprts:
+                    for segment in self._import_segments(imp):
+                        touched_segments.add(segment)
+                        self._imports_by_segment.setdefault(segment, []).append((file_id, imp))
+
+        for package_path in [path for path in self._package_relative_files if path.name in touched_segments]:
+            del self._package_relative_files[package_path]
+        return True
+
+    def _parse_files(self, files: list[Path]) -> list[list[ImportResult]]:
+        """Разбор файлов последовательно либо пулом процессов (файлы раздаются процессам пачками)"""
+        parse_file = partial(AstImportsManager._parse_file, engine=self._import_engine, raw_lines=self._raw_lines)
+        if self._workers <= 1 or len(files) < _PARALLEL_MIN_FILES:
+            return [parse_file(file) for file in files]
+
+        workers = min(self._workers, len(files))
+        chunksize = max(1, len(files) // (workers * _PARALLEL_CHUNKS_PER_WORKER))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(parse_file, files, chunksize=chunksize))
+
+    @staticmethod
+    def _parse_file(file_path: Path, engine: str = IMPORT_ENGINE_NATIVE, raw_lines: bool = True) -> list[ImportResult]:
+        source = AstImportsManager.read_file(file_path)
+        return ast_parser_imports(source_code_in=source, engine=engine, raw_lines=raw_lines)
 
     @staticmethod
     def read_file(file_path) -> str | None:
@@ -44,10 +245,29 @@ class AstImportsManager:
         except Exception as err:
             raise FileNotFoundError(f'Файл `{file_path}` ошибка при чтении кодировки: {err}')
 
-    def get_package_relative_files(self, package_path: Path) -> list[Path]:
-        relative_files = []
-        for file, imprts in self.imports.items():
+    def _build_segments_index(self):
+        """Построение обратного индекса импортов (1 раз за сканирование, для всех пакетов сразу)"""
+        for file_id, imprts in self._imports.items():
             for imp in imprts:
+                for segment in self._import_segments(imp):
+                    self._imports_by_segment.setdefault(segment, []).append((file_id, imp))
+
+    @staticmethod
+    def _import_segments(imp: ImportResult) -> list[str]:
+        """Сегменты пути импорта (module + name) без повторов, чтобы импорт не учитывался дважды"""
+        segments = imp.module.split('.') if imp.module else []
+        segments += imp.name.split('.') if imp.name else []
+        return list(dict.fromkeys(segments))
+
+    def get_package_relative_files(self, package_path: Path) -> list[Path]:
+        """
+        Файлы, импортирующие пакет. Проверяются только импорты из обратного индекса, в которых встречается
+        название пакета, результат запоминается для повторных запросов.
+        """
+        if package_path not in self._package_relative_files:
+            relative_files = []
+            for file_id, imp in self._imports_by_segment.get(package_path.name, []):
+                file = Path(self._files[file_id])
                 is_package = is_relative_import_package(
                     imprt=imp,
                     file_import_in=file,
@@ -55,7 +275,9 @@ class AstImportsManager:
                 )
                 if is_package:
                     relative_files.append(file)
-        return relative_files
+            self._package_relative_files[package_path] = relative_files
+
+        return list(self._package_relative_files[package_path])
 
 
 from pathlib import Path
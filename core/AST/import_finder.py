@@ -1,5 +1,6 @@
 import re
 import ast
+import sys
 from dataclasses import dataclass
 
 _IMPORT_FINDER_PATTERNS_IMPORT = (
@@ -22,13 +23,27 @@ _IMPORT_FINDER_PATTERNS_POST = (
 )
 
 
-@dataclass
+IMPORT_ENGINE_NATIVE = 'native'  # разбор по узлам AST (по умолчанию)
+IMPORT_ENGINE_REGEX = 'regex'  # прежний гибридный разбор AST + регулярные выражения (для сравнения в бенчмарках)
+
+
+@dataclass(slots=True)
 class ImportResult:
-    raw_string: str
+    raw_string: str | None = None  # исходная строка импорта (None - не сохраняется, см. ast_parser_imports)
     level: int = 0
     module: str | None = None
     name: str | None = None
 
+    def __post_init__(self):
+        # одни и те же модули импортируются в тысячах файлов - строки хранятся в одном экземпляре
+        if self.module is not None:
+            self.module = sys.intern(self.module)
+        if self.name is not None:
+            self.name = sys.intern(self.name)
+
+    def __reduce__(self):  # при передаче из процессов пула строки интернируются заново через __init__
+        return ImportResult, (self.raw_string, self.level, self.module, self.name)
+
 
 class _ImportFinder(ast.NodeVisitor):
     """
@@ -113,10 +128,66 @@ class _ImportFinder(ast.NodeVisitor):
         raise Exception(f'Импорт `{import_node}` не был обработан.')
 
 
-def ast_parser_imports(source_code_in: str) -> list[ImportResult]:
+class _NativeImportFinder(ast.NodeVisitor):
+    """
+    Поиск импортов в коде python за один проход по узлам ast.Import / ast.ImportFrom.
+    Уровень вложенности, модуль и имена берутся из полей узла (level, module, names), поэтому многострочные
+    импорты вида "from x import (a, b)" разбираются корректно. Исходный код делится на строки один раз - только
+    для заполнения raw_string.
+    """
+
+    def __init__(self, source, raw_lines: bool = True):
+        self._source = source
+        self._raw_lines = raw_lines
+        self._lines: list[str] | None = None
+        self.imports = []
+
+    def _raw_string(self, node) -> str | None:
+        if not self._raw_lines:
+            return None
+        if self._lines is None:
+            self._lines = self._source.split('\n')
+        return self._lines[node.lineno - 1].strip()
+
+    def visit_Import(self, node):
+        raw_string = self._raw_string(node)
+        for alias in node.names:
+            self.imports.append(ImportResult(raw_string=raw_string, level=0, module=None, name=alias.name))
+
+    def visit_ImportFrom(self, node):
+        raw_string = self._raw_string(node)
+        for alias in node.names:
+            self.imports.append(
+                ImportResult(raw_string=raw_string, level=node.level, module=node.module, name=alias.name)
+            )
+
+
+_IMPORT_FINDERS = {
+    IMPORT_ENGINE_NATIVE: _NativeImportFinder,
+    IMPORT_ENGINE_REGEX: _ImportFinder,
+}
+
+
+def ast_parser_imports(source_code_in: str, engine: str = IMPORT_ENGINE_NATIVE,
+                       raw_lines: bool = True) -> list[ImportResult]:
+    """
+    :param source_code_in: исходный код python
+    :param engine: движок поиска импортов IMPORT_ENGINE_NATIVE или IMPORT_ENGINE_REGEX
+    :param raw_lines: заполнять raw_string (False - экономия памяти при хранении импортов всего проекта)
+    :return: список найденных импортов
+    """
+    if engine not in _IMPORT_FINDERS:
+        raise ValueError(f'Неизвестный движок поиска импортов `{engine}`')
+
     tree = ast.parse(source_code_in)
-    finder = _ImportFinder(source_code_in)
+    if engine == IMPORT_ENGINE_NATIVE:
+        finder = _NativeImportFinder(source_code_in, raw_lines=raw_lines)
+    else:
+        finder = _IMPORT_FINDERS[engine](source_code_in)
     finder.visit(tree)
+    if not raw_lines:
+        for imp in finder.imports:
+            imp.raw_string = None
     return finder.imports
 
 
@@ -143,14 +214,19 @@ def test_ast_parser_imports():
         FinderTest(code="'''import app1'''", level=0, module=None, name=None),
         FinderTest(code="from .. import *", level=2, module=None, name="*", ),
     ]
-    for exmp in tests_set:
-        data = ast_parser_imports(source_code_in=exmp.code)
-        print(f"\t{data},")
-        assert isinstance(data, list), f'Не получен список импортов для: {exmp.code}'
-        for res in data:
-            assert res.level == exmp.level
-            assert res.module == exmp.module
-            assert res.name == exmp.name
+    for engine in (IMPORT_ENGINE_NATIVE, IMPORT_ENGINE_REGEX):
+        for exmp in tests_set:
+            data = ast_parser_imports(source_code_in=exmp.code, engine=engine)
+            print(f"\t{data},")
+            assert isinstance(data, list), f'Не получен список импортов для: {exmp.code}'
+            for res in data:
+                assert res.level == exmp.level
+                assert res.module == exmp.module
+                assert res.name == exmp.name
+
+    # многострочные импорты разбираются только движком AST
+    data = ast_parser_imports(source_code_in="from ..src import (\n    app1,\n    app2,\n)")
+    assert [(res.level, res.module, res.name) for res in data] == [(2, 'src', 'app1'), (2, 'src', 'app2')]
 
 
 if __name__ == '__main__':
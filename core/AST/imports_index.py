@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from core.AST.import_finder import ImportResult, IMPORT_ENGINE_NATIVE
+from core.utils.atomic_write import atomic_write_bytes
+
+_INDEX_VERSION = 1  # при изменении формата файла индекса старый индекс игнорируется и строится заново
+
+
+@dataclass
+class _IndexRow:
+    mtime_ns: int
+    size: int
+    digest: str | None
+    imports: list[ImportResult]
+
+
+class ImportsIndex:
+    """
+    Постоянный (на диске) индекс импортов python файлов.
+    Строка индекса хранится по относительному пути файла и считается актуальной, пока совпадают mtime_ns и размер
+    файла. При включенном hash_check несовпадение mtime дополнительно перепроверяется по хешу содержимого
+    (например после `git checkout` файл мог быть перезаписан без изменений).
+    """
+
+    def __init__(self, index_path_in: Path, hash_check: bool = False, engine: str = IMPORT_ENGINE_NATIVE,
+                 raw_lines: bool = True):
+        """
+        :param index_path_in: путь к файлу индекса
+        :param hash_check: перепроверять изменённые по mtime файлы хешем содержимого
+        :param engine: движок поиска импортов, которым построены строки (индекс другого движка не используется)
+        :param raw_lines: строки индекса содержат raw_string импортов (индекс без них не используется)
+        """
+        self._index_path = index_path_in
+        self._hash_check = hash_check
+        self._engine = engine
+        self._raw_lines = raw_lines
+        self._rows: dict[str, _IndexRow] = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self._index_path, mode='rb') as f:
+                raw = json.loads(f.read())
+        except (OSError, ValueError):
+            return  # индекса нет или он повреждён - он будет построен заново
+
+        if not isinstance(raw, dict) or raw.get('version') != _INDEX_VERSION or raw.get('engine') != self._engine:
+            return
+        if self._raw_lines and not raw.get('raw_lines', True):  # индекс без исходных строк, а они нужны
+            return
+
+        try:
+            for key, (mtime_ns, size, digest, imports) in raw.get('files', {}).items():
+                self._rows[key] = _IndexRow(
+                    mtime_ns=mtime_ns,
+                    size=size,
+                    digest=digest,
+                    imports=[
+                        ImportResult(raw_string=raw_string if self._raw_lines else None,
+                                     level=level, module=module, name=name)
+                        for raw_string, level, module, name in imports
+                    ],
+                )
+        except (TypeError, ValueError):
+            self._rows.clear()
+
+    @staticmethod
+    def _file_digest(file_path: Path) -> str:
+        with open(file_path, mode='rb') as f:
+            return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+    def get(self, key: str, file_path: Path, stat: os.stat_result) -> list[ImportResult] | None:
+        """
+        Получить импорты файла из индекса.
+
+        :param key: ключ файла (путь относительно корня проекта)
+        :param file_path: полный путь к файлу (нужен для проверки по хешу)
+        :param stat: результат os.stat файла
+        :return: список импортов или None если файл изменился и его нужно разобрать заново
+        """
+        row = self._rows.get(key)
+        if row is None:
+            return None
+
+        if row.mtime_ns == stat.st_mtime_ns and row.size == stat.st_size:
+            return row.imports
+
+        if self._hash_check and row.digest is not None and row.size == stat.st_size:
+            if self._file_digest(file_path) == row.digest:
+                row.mtime_ns = stat.st_mtime_ns
+                self._dirty = True
+                return row.imports
+
+        return None
+
+    def put(self, key: str, file_path: Path, stat: os.stat_result, imports: list[ImportResult]):
+        self._rows[key] = _IndexRow(
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            digest=self._file_digest(file_path) if self._hash_check else None,
+            imports=imports,
+        )
+        self._dirty = True
+
+    def retain(self, keys: set[str]):
+        """Удаление из индекса файлов, которых больше нет в проекте"""
+        for key in self._rows.keys() - keys:
+            del self._rows[key]
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+
+        raw = {
+            'version': _INDEX_VERSION,
+            'engine': self._engine,
+            'raw_lines': self._raw_lines,
+            'files': {
+                key: [
+                    row.mtime_ns,
+                    row.size,
+                    row.digest,
+                    [[imp.raw_string, imp.level, imp.module, imp.name] for imp in row.imports],
+                ]
+                for key, row in self._rows.items()
+            },
+        }
+        try:
+            atomic_write_bytes(self._index_path, json.dumps(raw, ensure_ascii=False).encode('utf-8'))
+        except OSError:
+            return  # индекс - это только ускорение, невозможность записи не должна ломать сканирование
+        self._dirty = False
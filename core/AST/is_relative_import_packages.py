@@ -1,13 +1,6 @@
 from pathlib import Path
-from dataclasses import dataclass
 
-
-@dataclass
-class ImportResult:
-    raw_string: str
-    level: int = 0
-    module: str | None = None
-    name: str | None = None
+from core.AST.import_finder import ImportResult
 
 
 def is_relative_import_package(package_path_in: Path, file_import_in: Path,
@@ -63,6 +56,8 @@ def is_relative_import_package(package_path_in: Path, file_import_in: Path,
 
 
 def test_is_relative_import_package():
+    from dataclasses import dataclass
+
     # Тест нужно проводить в комплексе с реальным названием файлов. Здесь всё расставлено в ручную
     @dataclass
     class RelativeTest:
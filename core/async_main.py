@@ -0,0 +1,186 @@
+import asyncio
+import os
+import subprocess
+import weakref
+from pathlib import Path
+from typing import Callable
+
+from core.commons import run_cmd_async
+from core.main import WorkspaceClerk
+from core.models import Status, ProjectInfo, Package, DependsChange, UnusedDepends, MissingDepends
+from core.constants import ENGINE_UV
+from core.catalog import CatalogPage
+
+# блокировки корневых команд uv по циклу событий и корню проекта: общие для всех клиентов одного workspace,
+# удаляются вместе с циклом (блокировка asyncio привязана к циклу и не должна достаться новому циклу)
+_ROOT_LOCKS: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Lock]]' = \
+    weakref.WeakKeyDictionary()
+
+
+class AsyncCmdRunner:
+    """
+    Исполнитель команд на asyncio subprocess.
+    Одновременно выполняется не более max_concurrency команд, команды в корне проекта (uv sync, uv add в корне
+    и т.д.) выполняются строго по очереди в пределах одного workspace. Команды в директориях пакетов идут параллельно.
+    """
+
+    def __init__(self, root_path_in: Path, max_concurrency: int = 4):
+        self._root = os.path.normcase(os.path.abspath(root_path_in))
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _root_lock(self) -> asyncio.Lock:
+        locks = _ROOT_LOCKS.setdefault(asyncio.get_running_loop(), {})
+        return locks.setdefault(self._root, asyncio.Lock())
+
+    async def run(self, command: str, cwd: Path) -> subprocess.CompletedProcess:
+        if os.path.normcase(os.path.abspath(cwd)) == self._root:
+            async with self._root_lock():  # сначала очередь workspace, чтобы ожидание не занимало слот семафора
+                async with self._semaphore:
+                    return await run_cmd_async(command=command, cwd=cwd)
+
+        async with self._semaphore:
+            return await run_cmd_async(command=command, cwd=cwd)
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def run_cmd_threadsafe(self, command, cwd, waiting_subprocess: bool = False) -> subprocess.CompletedProcess:
+        """
+        Синхронная обёртка с сигнатурой core.commons.run_cmd для менеджеров, работающих в потоках:
+        команда исполняется в цикле событий, поток ждёт результат.
+        """
+        if self._loop is None:
+            raise RuntimeError('❌ AsyncCmdRunner не привязан к циклу событий (используйте AsyncWorkspaceClerk.create)')
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:  # ожидание результата в потоке цикла событий заблокировало бы его навсегда
+            raise RuntimeError(
+                f'❌ Команда `{command}` вызвана синхронно из цикла событий: команды пакетов '
+                f'(package.connect.cmd() и т.д.) вызываются через `await asyncio.to_thread(package.connect.cmd)`.'
+            )
+        return asyncio.run_coroutine_threadsafe(self.run(command=command, cwd=cwd), self._loop).result()
+
+
+class AsyncWorkspaceClerk:
+    """
+    Асинхронный WorkspaceClerk: операции - корутины, не блокирующие цикл событий.
+    Работа с toml и AST выполняется в потоках, а все команды uv - через AsyncCmdRunner (asyncio subprocess)
+    с ограничением одновременных команд и очередью корневых команд workspace.
+    Создаётся через `await AsyncWorkspaceClerk.create(...)`.
+    Команды возвращаемых пакетов синхронные: `await asyncio.to_thread(package.connect.cmd)`.
+    """
+
+    def __init__(self, clerk: WorkspaceClerk, runner: AsyncCmdRunner, max_concurrency: int):
+        self._clerk = clerk
+        self._runner = runner
+        self._operations = asyncio.Semaphore(max_concurrency)  # ограничение одновременных операций (потоков)
+
+    @classmethod
+    async def create(cls, root_path_in: Path, src_path_in: Path, max_concurrency: int = 4,
+                     scan_workers: int | None = 1) -> 'AsyncWorkspaceClerk':
+        """
+        :param root_path_in: корень проекта
+        :param src_path_in: директория с пакетами
+        :param max_concurrency: максимум одновременных операций и одновременных команд uv
+        :param scan_workers: количество процессов для AST сканирования
+        """
+        runner = AsyncCmdRunner(root_path_in=root_path_in, max_concurrency=max_concurrency)
+        runner.bind(asyncio.get_running_loop())
+        clerk = await asyncio.to_thread(
+            WorkspaceClerk,
+            root_path_in=root_path_in,
+            src_path_in=src_path_in,
+            waiting_subprocess=True,
+            scan_workers=scan_workers,
+            run_cmd_func=runner.run_cmd_threadsafe,
+        )
+        return cls(clerk=clerk, runner=runner, max_concurrency=max_concurrency)
+
+    async def _call(self, func: Callable, *args, **kwargs):
+        async with self._operations:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def project_get_info(self) -> tuple[Status, ProjectInfo | None]:
+        return await self._call(self._clerk.project_get_info)
+
+    async def project_depends_add(self, depends: set) -> list[Status]:
+        return await self._call(self._clerk.project_depends_add, depends=depends)
+
+    async def project_depends_remove(self, depends: set) -> list[Status]:
+        return await self._call(self._clerk.project_depends_remove, depends=depends)
+
+    async def packages_list(self,
+                            offset: int = 0, limit: int = 100,
+                            filter_packages: set | None = None, filter_exclude: bool = False,
+                            related_files: bool = False,
+                            ) -> list[Package]:
+        """
+        :param related_files: вычислить related_files в потоке (иначе первое обращение к ним выполнит
+            AST сканирование в цикле событий)
+        """
+        def collect() -> list[Package]:
+            packages = list(self._clerk.packages_list(
+                offset=offset, limit=limit, filter_packages=filter_packages, filter_exclude=filter_exclude,
+            ))
+            if related_files:
+                for package in packages:
+                    _ = package.related_files
+            return packages
+
+        return await self._call(collect)
+
+    async def packages_query(self,
+                             installed: bool | None = None, depends_on: str | None = None,
+                             prefix: str | None = None, cursor: str | None = None, limit: int = 100,
+                             related_files: bool = False) -> CatalogPage:
+        return await self._call(self._clerk.packages_query, installed=installed, depends_on=depends_on,
+                                prefix=prefix, cursor=cursor, limit=limit, related_files=related_files)
+
+    async def packages_create(self, packages: set) -> list[Status]:
+        return await self._call(self._clerk.packages_create, packages=packages)
+
+    async def packages_connect(self, packages: set,
+                               engine: str = ENGINE_UV, finalize: str | None = None) -> list[Status]:
+        return await self._call(self._clerk.packages_connect, packages=packages, engine=engine, finalize=finalize)
+
+    async def packages_connect_all(self, packages: set | None = None, exclude: bool = False,
+                                   engine: str = ENGINE_UV, finalize: str | None = None,
+                                   ordered: bool = True) -> list[Status]:
+        return await self._call(self._clerk.packages_connect_all, packages=packages, exclude=exclude,
+                                engine=engine, finalize=finalize, ordered=ordered)
+
+    async def packages_disconnect(self, packages: set,
+                                  engine: str = ENGINE_UV, finalize: str | None = None) -> list[Status]:
+        return await self._call(self._clerk.packages_disconnect, packages=packages, engine=engine, finalize=finalize)
+
+    async def packages_disconnect_all(self, packages: set | None = None, exclude: bool = False,
+                                      engine: str = ENGINE_UV, finalize: str | None = None,
+                                      ordered: bool = True) -> list[Status]:
+        return await self._call(self._clerk.packages_disconnect_all, packages=packages, exclude=exclude,
+                                engine=engine, finalize=finalize, ordered=ordered)
+
+    async def packages_depends_add(self, package: str, depends: set):
+        return await self._call(self._clerk.packages_depends_add, package=package, depends=depends)
+
+    async def packages_depends_remove(self, package: str, depends: set):
+        return await self._call(self._clerk.packages_depends_remove, package=package, depends=depends)
+
+    async def packages_depends_apply(self, matrix: dict[str, DependsChange], workers: int = 4) -> list[Status]:
+        return await self._call(self._clerk.packages_depends_apply, matrix=matrix, workers=workers)
+
+    async def packages_depends_unused(self, ignore: set | None = None) -> UnusedDepends:
+        return await self._call(self._clerk.packages_depends_unused, ignore=ignore)
+
+    async def packages_depends_prune(self, unused: UnusedDepends | None = None, ignore: set | None = None,
+                                     workers: int = 4) -> list[Status]:
+        return await self._call(self._clerk.packages_depends_prune, unused=unused, ignore=ignore, workers=workers)
+
+    async def packages_depends_missing(self) -> MissingDepends:
+        return await self._call(self._clerk.packages_depends_missing)
+
+    async def packages_depends_add_missing(self, missing: MissingDepends | None = None,
+                                           workers: int = 4) -> list[Status]:
+        return await self._call(self._clerk.packages_depends_add_missing, missing=missing, workers=workers)
@@ -0,0 +1,95 @@
+import os
+from pathlib import Path
+from typing import Callable
+import subprocess
+
+from core.commons import run_cmd
+from core.tracing import traced_runner, operation
+from core.constants import TOML_FILE_NAME, LOCK_FILE_NAME
+from core.models import Status
+from core.utils.atomic_write import atomic_write_bytes
+from core.utils.file_lock import file_lock
+from core.utils.manager_toml import TomlManager
+from core.utils.toml_cache import toml_cache
+
+
+class BatchSession:
+    """
+    Пакетная сессия изменений проекта (см. WorkspaceClerk.batch).
+    Пока сессия активна, менеджеры выполняют `uv add` / `uv remove` с флагом --frozen (меняется только pyproject.toml,
+    без разрешения зависимостей) и пропускают `uv sync`. При фиксации выполняется один `uv lock` и один `uv sync`
+    в корне проекта, а если синхронизация не удалась - pyproject.toml и uv.lock возвращаются к снимку,
+    сделанному при открытии сессии.
+    Пакеты, созданные внутри сессии, при откате не удаляются.
+    """
+
+    def __init__(self, root_path_in: Path, src_path_in: Path,
+                 run_cmd_func: Callable[..., subprocess.CompletedProcess] | None = None):
+        self._root_path = root_path_in
+        self._src_path = src_path_in
+        self._run_cmd = traced_runner(run_cmd_func if run_cmd_func is not None else run_cmd)
+        self._snapshots: dict[Path, bytes | None] = {}
+        self._deferred_dirs: set[Path] = set()  # директории, в которых выполнялись отложенные команды uv
+        self.status: Status | None = None  # результат фиксации сессии
+        self._snapshot()
+
+    def _snapshot(self):
+        """Снимок pyproject.toml и uv.lock корня и всех пакетов"""
+        dirs = [self._root_path]
+        if self._src_path.exists():
+            dirs += [path for path in self._src_path.iterdir() if path.is_dir()]
+
+        for dir_path in dirs:
+            for file_name in (TOML_FILE_NAME, LOCK_FILE_NAME):
+                file_path = dir_path / file_name
+                try:
+                    self._snapshots[file_path] = file_path.read_bytes()
+                except FileNotFoundError:
+                    self._snapshots[file_path] = None
+
+    def defer(self, cwd: Path):
+        """Отметка что в директории выполнена команда uv без блокировки/синхронизации"""
+        self._deferred_dirs.add(cwd)
+
+    def rollback(self):
+        """Возврат pyproject.toml и uv.lock к состоянию на момент открытия сессии"""
+        for file_path, content in self._snapshots.items():
+            with file_lock(file_path).exclusive():
+                if content is None:
+                    if file_path.exists():
+                        os.remove(file_path)
+                elif not file_path.exists() or file_path.read_bytes() != content:
+                    atomic_write_bytes(file_path, content)
+                toml_cache.invalidate(file_path)
+
+    @operation('batch.commit')
+    def commit(self) -> Status:
+        if not self._deferred_dirs:
+            self.status = Status(success=True, message='✔ Пакетная сессия завершена, изменений нет.')
+            return self.status
+
+        # пакеты вне workspace имеют собственный uv.lock, его нужно пересобрать отдельно
+        project_data = TomlManager(self._root_path / TOML_FILE_NAME)
+        for cwd in sorted(self._deferred_dirs - {self._root_path}):
+            if project_data.is_package_in_workspaces(package=str(cwd.relative_to(self._root_path))):
+                continue
+            with file_lock(cwd / LOCK_FILE_NAME).exclusive():
+                res = self._run_cmd(command='uv lock', cwd=cwd, waiting_subprocess=True)
+            if res.returncode != 0:
+                return self._fail(f'⚠ Не удалось обновить uv.lock пакета `{cwd}`: {res.stdout} {res.stderr}')
+
+        for cmd in ('uv lock', 'uv sync'):
+            with file_lock(self._root_path / LOCK_FILE_NAME).exclusive():
+                res = self._run_cmd(command=cmd, cwd=self._root_path, waiting_subprocess=True)
+            if res.returncode != 0:
+                return self._fail(f'⚠ Ошибка `{cmd}` при завершении пакетной сессии: {res.stdout} {res.stderr}')
+
+        self._deferred_dirs.clear()
+        self.status = Status(success=True, message='✔ Пакетная сессия применена, проект синхронизирован.')
+        return self.status
+
+    def _fail(self, message: str) -> Status:
+        self.rollback()
+        self._deferred_dirs.clear()
+        self.status = Status(success=False, message=f'{message}\nИзменения pyproject.toml и uv.lock отменены.')
+        return self.status
@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+from core.constants import TOML_FILE_NAME, CACHE_DIR_NAME, CATALOG_FILE_NAME
+from core.tracing import span
+from core.utils.atomic_write import atomic_write_bytes
+from core.utils.manager_toml import TomlManager
+from core.utils.requirements import requirement_name
+
+CATALOG_VERSION = 1
+
+
+@dataclass
+class CatalogEntry:
+    name: str
+    dir_name: str  # директория пакета в src
+    local_path: str  # путь пакета относительно корня проекта (posix)
+    is_installed: bool
+    dependencies: list[str]
+    toml_mtime_ns: int
+    toml_size: int
+    related_files_count: int | None = None  # None - ещё не вычислялось (требует AST сканирования)
+
+
+@dataclass
+class CatalogPage:
+    entries: list[CatalogEntry]
+    next_cursor: str | None  # курсор следующей страницы (None - страниц больше нет)
+
+
+def _signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class PackageCatalog:
+    """
+    Постоянный каталог пакетов в `.workspaceclerk/catalog.json` с индексами для запросов.
+
+    Обновление инкрементальное: список директорий src перечитывается только при изменении mtime директории src,
+    pyproject.toml пакета разбирается заново только при изменении его mtime / размера,
+    флаг подключения пересчитывается только при изменении pyproject.toml корня.
+
+    Индексы: подключенные пакеты, обратный индекс зависимостей (нормализованное название -> пакеты)
+    и отсортированный список названий для поиска по префиксу и постраничного обхода.
+    Курсор страницы - название последнего выданного пакета, поэтому обход устойчив к добавлению
+    и удалению пакетов между запросами.
+    """
+
+    def __init__(self, root_path_in: Path, src_path_in: Path, persist: bool = True):
+        """
+        :param root_path_in: корень проекта
+        :param src_path_in: директория с пакетами
+        :param persist: хранить каталог на диске (иначе только в памяти процесса)
+        """
+        self._root_path = root_path_in
+        self._src_path = src_path_in
+        self._src_local_path = src_path_in.relative_to(root_path_in)
+        self._catalog_path = root_path_in / CACHE_DIR_NAME / CATALOG_FILE_NAME
+        self._persist = persist
+        self._lock = threading.Lock()
+
+        self._entries: dict[str, CatalogEntry] = {}  # директория пакета -> запись
+        self._candidate_dirs: list[str] = []  # все поддиректории src (в том числе пока без pyproject.toml)
+        self._src_mtime_ns: int | None = None
+        self._root_signature: tuple[int, int] | None = None
+        self._ast_manager = None
+
+        # индексы
+        self._by_name: dict[str, CatalogEntry] = {}
+        self._names: list[str] = []
+        self._installed: set[str] = set()
+        self._dependents: dict[str, set[str]] = {}
+
+        if persist:
+            self._load()
+        self._build_indexes()
+
+    def _load(self):
+        try:
+            data = json.loads(self._catalog_path.read_bytes())
+            if data.get('version') != CATALOG_VERSION:
+                return
+            self._src_mtime_ns = data['src_mtime_ns']
+            self._root_signature = tuple(data['root_signature']) if data['root_signature'] else None
+            self._candidate_dirs = data['candidate_dirs']
+            self._entries = {entry['dir_name']: CatalogEntry(**entry) for entry in data['entries']}
+        except (OSError, ValueError, KeyError, TypeError):  # каталога нет или он повреждён - строится заново
+            self._entries = {}
+            self._candidate_dirs = []
+            self._src_mtime_ns = None
+            self._root_signature = None
+
+    def _save(self):
+        data = {
+            'version': CATALOG_VERSION,
+            'src_mtime_ns': self._src_mtime_ns,
+            'root_signature': self._root_signature,
+            'candidate_dirs': self._candidate_dirs,
+            'entries': [asdict(entry) for entry in self._entries.values()],
+        }
+        try:
+            atomic_write_bytes(self._catalog_path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        except OSError:
+            pass  # каталог - это только ускорение, без права записи запросы обслуживаются индексом в памяти
+
+    def _build_indexes(self):
+        self._by_name = {entry.name: entry for entry in self._entries.values()}
+        self._names = sorted(self._by_name)
+        self._installed = {entry.name for entry in self._entries.values() if entry.is_installed}
+        self._dependents = {}
+        for entry in self._entries.values():
+            for depend in entry.dependencies:
+                self._dependents.setdefault(requirement_name(depend), set()).add(entry.name)
+
+    def refresh(self, related_files: bool = False) -> bool:
+        """
+        Инкрементальное обновление каталога
+
+        :param related_files: вычислить related_files_count (AST сканирование проекта, затем - только изменённых файлов)
+        :return: были ли изменения
+        """
+        with self._lock, span('catalog.refresh', related_files=related_files):
+            changed = self._refresh_entries()
+            if related_files:
+                changed = self._refresh_related_files(force=changed) or changed
+            if changed:
+                self._build_indexes()
+                if self._persist:
+                    self._save()
+            return changed
+
+    def _refresh_entries(self) -> bool:
+        changed = False
+        src = os.fspath(self._src_path)
+
+        src_signature = _signature(src)
+        src_mtime_ns = src_signature[0] if src_signature else None
+        if src_mtime_ns != self._src_mtime_ns:
+            candidate_dirs = []
+            if src_signature is not None:
+                with os.scandir(src) as entries:
+                    candidate_dirs = sorted(entry.name for entry in entries if entry.is_dir())
+            self._candidate_dirs = candidate_dirs
+            self._src_mtime_ns = src_mtime_ns
+            changed = True
+
+        root_signature = _signature(os.path.join(self._root_path, TOML_FILE_NAME))
+        root_changed = root_signature != self._root_signature
+        self._root_signature = root_signature
+        project_data: TomlManager | None = None
+
+        def get_project_data() -> TomlManager:
+            nonlocal project_data
+            if project_data is None:  # корневой toml читается не более одного раза за обновление
+                project_data = TomlManager(self._root_path / TOML_FILE_NAME)
+            return project_data
+
+        entries: dict[str, CatalogEntry] = {}
+        for dir_name in self._candidate_dirs:
+            toml_path = os.path.join(src, dir_name, TOML_FILE_NAME)
+            signature = _signature(toml_path)
+            if signature is None:
+                continue
+
+            entry = self._entries.get(dir_name)
+            if entry is None or (entry.toml_mtime_ns, entry.toml_size) != signature:
+                package_data = TomlManager(Path(toml_path))
+                entry = CatalogEntry(
+                    name=package_data.name,
+                    dir_name=dir_name,
+                    local_path=(self._src_local_path / package_data.name).as_posix(),
+                    is_installed=get_project_data().is_package_in_workspaces(
+                        package=str(self._src_local_path / package_data.name)),
+                    dependencies=sorted(package_data.depends),
+                    toml_mtime_ns=signature[0],
+                    toml_size=signature[1],
+                )
+                changed = True
+            elif root_changed:
+                is_installed = get_project_data().is_package_in_workspaces(
+                    package=str(self._src_local_path / entry.name))
+                if is_installed != entry.is_installed:
+                    entry.is_installed = is_installed
+                    changed = True
+            entries[dir_name] = entry
+
+        if entries.keys() != self._entries.keys():
+            changed = True
+        self._entries = entries
+        return changed or root_changed
+
+    def _refresh_related_files(self, force: bool) -> bool:
+        from core.AST.ast_analize import AstImportsManager
+
+        if self._ast_manager is None:
+            self._ast_manager = AstImportsManager(root_path_in=self._root_path)
+            imports_changed = True
+        else:
+            imports_changed = self._ast_manager.refresh()
+
+        changed = False
+        for entry in self._entries.values():
+            if entry.related_files_count is not None and not imports_changed and not force:
+                continue
+            count = len(self._ast_manager.get_package_relative_files(self._src_path / entry.name))
+            if count != entry.related_files_count:
+                entry.related_files_count = count
+                changed = True
+        return changed
+
+    def get(self, name: str) -> CatalogEntry | None:
+        return self._by_name.get(name)
+
+    def query(self,
+              installed: bool | None = None,
+              depends_on: str | None = None,
+              prefix: str | None = None,
+              cursor: str | None = None,
+              limit: int = 100,
+              ) -> CatalogPage:
+        """
+        Запрос к каталогу (по текущему состоянию, без обновления - см. refresh)
+
+        :param installed: True - только подключенные, False - только не подключенные, None - все
+        :param depends_on: только пакеты, зависящие от указанной библиотеки или пакета (название без версии)
+        :param prefix: только пакеты, название которых начинается с prefix
+        :param cursor: next_cursor предыдущей страницы
+        :param limit: размер страницы
+        """
+        with self._lock:
+            if depends_on is not None:
+                names = sorted(self._dependents.get(requirement_name(depends_on), ()))
+            else:
+                names = self._names
+
+            lo, hi = 0, len(names)
+            if prefix:
+                lo = bisect_left(names, prefix)
+                hi = bisect_left(names, prefix + '\U0010ffff')
+            if cursor is not None:
+                lo = max(lo, bisect_right(names, cursor))
+
+            entries = []
+            index = lo
+            while index < hi and len(entries) < limit:
+                name = names[index]
+                index += 1
+                if installed is not None and (name in self._installed) != installed:
+                    continue
+                entries.append(self._by_name[name])
+
+            has_more = any(
+                installed is None or (names[i] in self._installed) == installed for i in range(index, hi)
+            )
+            next_cursor = entries[-1].name if entries and has_more else None
+            return CatalogPage(entries=entries, next_cursor=next_cursor)
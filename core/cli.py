@@ -0,0 +1,199 @@
+"""
+Неинтерактивная командная строка WorkspaceClerk для скриптов: результат каждой команды выводится в JSON,
+код возврата 0 - все операции успешны, 1 - хотя бы одна завершилась ошибкой.
+
+    python -m core.cli list [--filter app1 app2] [--exclude] [--offset 0] [--limit 100] [--related-files]
+    python -m core.cli query [--installed | --not-installed] [--depends-on requests] [--prefix app] [--cursor NAME]
+    python -m core.cli info
+    python -m core.cli graph
+    python -m core.cli create app3
+    python -m core.cli connect app1 app2 | connect --all [--engine toml --finalize sync]
+    python -m core.cli disconnect app1 | disconnect --all
+    python -m core.cli add requests httpx [--package app1]
+    python -m core.cli remove requests [--package app1]
+    python -m core.cli unused [--ignore pytest ruff] [--prune]
+    python -m core.cli missing [--add]
+
+Общие параметры: --root (корень проекта, по умолчанию текущая директория), --src (директория с пакетами
+относительно корня, по умолчанию src), --pretty (форматированный JSON).
+Тяжёлые модули (AST сканирование, tomli_w, asyncio) импортируются только командами, которым они нужны.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from core.constants import ENGINE_UV, ENGINE_TOML
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m core.cli', description='Workspace Clerk: управление пакетами uv')
+    parser.add_argument('--root', type=Path, default=Path('.'), help='корень проекта (по умолчанию текущая директория)')
+    parser.add_argument('--src', type=Path, default=Path('src'), help='директория с пакетами относительно корня')
+    parser.add_argument('--pretty', action='store_true', help='форматированный JSON')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help='список пакетов')
+    list_parser.add_argument('--filter', nargs='+', default=None, metavar='PACKAGE', help='только указанные пакеты')
+    list_parser.add_argument('--exclude', action='store_true', help='исключить пакеты из --filter')
+    list_parser.add_argument('--offset', type=int, default=0)
+    list_parser.add_argument('--limit', type=int, default=100)
+    list_parser.add_argument('--related-files', action='store_true',
+                             help='файлы, импортирующие пакет (требует AST сканирования проекта)')
+
+    query_parser = commands.add_parser('query', help='запрос к каталогу пакетов')
+    installed_group = query_parser.add_mutually_exclusive_group()
+    installed_group.add_argument('--installed', dest='installed', action='store_const', const=True, default=None,
+                                 help='только подключенные')
+    installed_group.add_argument('--not-installed', dest='installed', action='store_const', const=False,
+                                 help='только не подключенные')
+    query_parser.add_argument('--depends-on', default=None, help='только пакеты, зависящие от указанного')
+    query_parser.add_argument('--prefix', default=None, help='название начинается с')
+    query_parser.add_argument('--cursor', default=None, help='next_cursor предыдущей страницы')
+    query_parser.add_argument('--limit', type=int, default=100)
+    query_parser.add_argument('--related-files', action='store_true', help='вычислить related_files_count')
+
+    commands.add_parser('info', help='информация о проекте')
+    commands.add_parser('graph', help='граф зависимостей между пакетами и топологические уровни')
+
+    create_parser = commands.add_parser('create', help='создать пакеты')
+    create_parser.add_argument('packages', nargs='+')
+
+    for name, help_text in (('connect', 'подключить пакеты'), ('disconnect', 'отключить пакеты')):
+        command_parser = commands.add_parser(name, help=help_text)
+        command_parser.add_argument('packages', nargs='*')
+        command_parser.add_argument('--all', action='store_true',
+                                    help='все пакеты (кроме указанных, если они переданы)')
+        command_parser.add_argument('--engine', choices=(ENGINE_UV, ENGINE_TOML), default=ENGINE_UV)
+        command_parser.add_argument('--finalize', choices=('lock', 'sync'), default=None,
+                                    help='завершение для --engine toml')
+
+    for name, help_text in (('add', 'добавить зависимости'), ('remove', 'удалить зависимости')):
+        command_parser = commands.add_parser(name, help=help_text)
+        command_parser.add_argument('depends', nargs='+')
+        command_parser.add_argument('--package', default=None, help='пакет (по умолчанию корень проекта)')
+
+    unused_parser = commands.add_parser('unused', help='объявленные, но не импортируемые зависимости')
+    unused_parser.add_argument('--ignore', nargs='+', default=None, metavar='DEPEND', help='не проверять')
+    unused_parser.add_argument('--prune', action='store_true',
+                               help='удалить найденные зависимости (один uv remove на пакет и один uv sync)')
+
+    missing_parser = commands.add_parser('missing', help='импортируемые, но не объявленные зависимости')
+    missing_parser.add_argument('--add', action='store_true',
+                                help='установить найденные зависимости (один uv add на пакет и один uv sync)')
+
+    return parser
+
+
+def _statuses_result(statuses: list) -> tuple[dict, bool]:
+    from core.serialize import to_json_data
+
+    # packages_depends_add / remove возвращают список статусов на каждую зависимость
+    statuses = [item for status in statuses for item in (status if isinstance(status, list) else [status])]
+    return {'statuses': to_json_data(statuses)}, all(status.success for status in statuses)
+
+
+def run(args: argparse.Namespace) -> tuple[Any, bool]:
+    """
+    Выполнение команды
+
+    :return: (данные для JSON, успешно ли выполнение)
+    """
+    from core.main import WorkspaceClerk
+    from core.serialize import to_json_data
+
+    root_path = args.root.resolve()
+    clerk = WorkspaceClerk(root_path_in=root_path, src_path_in=root_path / args.src, waiting_subprocess=True)
+
+    if args.command == 'list':
+        generator = clerk.packages_list(
+            offset=args.offset, limit=args.limit,
+            filter_packages=set(args.filter) if args.filter else None, filter_exclude=args.exclude,
+        )
+        packages = []
+        while True:
+            try:
+                packages.append(next(generator))
+            except StopIteration as stop:
+                status = stop.value
+                break
+        data = {
+            'packages': to_json_data(packages, related_files=args.related_files),
+            'status': to_json_data(status),
+        }
+        return data, status is None or status.success
+
+    if args.command == 'query':
+        page = clerk.packages_query(installed=args.installed, depends_on=args.depends_on, prefix=args.prefix,
+                                    cursor=args.cursor, limit=args.limit, related_files=args.related_files)
+        return to_json_data(page), True
+
+    if args.command == 'info':
+        status, project_info = clerk.project_get_info()
+        return {'status': to_json_data(status), 'project': to_json_data(project_info)}, status.success
+
+    if args.command == 'graph':
+        graph = clerk.dependency_graph()
+        data = {
+            'levels': graph.levels(),
+            'dependencies': {name: sorted(graph.dependencies(name)) for name in sorted(graph.packages)},
+            'cyclic': sorted(graph.cyclic),
+        }
+        return data, not graph.cyclic
+
+    if args.command == 'create':
+        return _statuses_result(clerk.packages_create(packages=set(args.packages)))
+
+    if args.command in ('connect', 'disconnect'):
+        packages = set(args.packages)
+        if args.all:
+            func = clerk.packages_connect_all if args.command == 'connect' else clerk.packages_disconnect_all
+            statuses = func(packages=packages or None, exclude=bool(packages), engine=args.engine,
+                            finalize=args.finalize)
+        else:
+            if not packages:
+                raise ValueError('Не указаны пакеты (либо используйте --all)')
+            func = clerk.packages_connect if args.command == 'connect' else clerk.packages_disconnect
+            statuses = func(packages=packages, engine=args.engine, finalize=args.finalize)
+        return _statuses_result(statuses)
+
+    if args.command in ('add', 'remove'):
+        depends = set(args.depends)
+        if args.package is None:
+            func = clerk.project_depends_add if args.command == 'add' else clerk.project_depends_remove
+            return _statuses_result(func(depends=depends))
+        func = clerk.packages_depends_add if args.command == 'add' else clerk.packages_depends_remove
+        return _statuses_result(func(package=args.package, depends=depends))
+
+    if args.command == 'unused':
+        unused = clerk.packages_depends_unused(ignore=set(args.ignore) if args.ignore else None)
+        if not args.prune:
+            return {'unused': to_json_data(unused)}, True
+        data, success = _statuses_result(clerk.packages_depends_prune(unused=unused))
+        return {'unused': to_json_data(unused), **data}, success
+
+    if args.command == 'missing':
+        missing = clerk.packages_depends_missing()
+        if not args.add:
+            return {'missing': to_json_data(missing)}, True
+        data, success = _statuses_result(clerk.packages_depends_add_missing(missing=missing))
+        return {'missing': to_json_data(missing), **data}, success
+
+    raise ValueError(f'Неизвестная команда `{args.command}`')
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    try:
+        data, success = run(args)
+    except Exception as err:  # noqa  ошибки инициализации проекта (нет uv и т.д.) тоже выводятся в JSON
+        data, success = {'error': f'{type(err).__name__}: {err}'}, False
+
+    json.dump(data, sys.stdout, ensure_ascii=False, indent=2 if args.pretty else None)
+    sys.stdout.write('\n')
+    return 0 if success else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,6 @@
 import subprocess
 import platform
+import shlex
 
 
 def run_cmd(command, cwd, waiting_subprocess: bool = False) -> subprocess.CompletedProcess:
@@ -19,3 +20,39 @@ def run_cmd(command, cwd, waiting_subprocess: bool = False) -> subprocess.Comple
     else:  # для linux /  macOS
         res = subprocess.run(command, shell=True, cwd=cwd, text=True, capture_output=True, encoding=encoding)
         return res
+
+
+def cmd_quote(arg: str) -> str:
+    """
+    Экранирование аргумента командной строки (run_cmd исполняет команды через shell)
+    например "requests>=2.0" не должен превратиться в перенаправление вывода в файл "=2.0"
+    """
+    if 'windows' in platform.system().lower():
+        return subprocess.list2cmdline([arg])
+    return shlex.quote(arg)
+
+
+async def run_cmd_async(command, cwd) -> subprocess.CompletedProcess:
+    """
+    Асинхронный аналог run_cmd (на asyncio subprocess), всегда ожидает завершения команды.
+
+    :param command: исполняемая команда например "uv sync"
+    :param cwd: путь от имени которой исполняется команда
+    :return: результат в виде subprocess.CompletedProcess
+    """
+    import asyncio  # импорт asyncio заметно замедляет запуск, а нужен только асинхронному API
+
+    encoding = 'cp866' if 'windows' in platform.system().lower() else 'utf-8'
+    process = await asyncio.create_subprocess_shell(
+        command,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    return subprocess.CompletedProcess(
+        args=command,
+        returncode=process.returncode,
+        stdout=stdout.decode(encoding, errors='replace'),
+        stderr=stderr.decode(encoding, errors='replace'),
+    )
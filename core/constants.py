@@ -1 +1,19 @@
-TOML_FILE_NAME = 'pyproject.toml'
\ No newline at end of file
+TOML_FILE_NAME = 'pyproject.toml'
+LOCK_FILE_NAME = 'uv.lock'
+
+CACHE_DIR_NAME = '.workspaceclerk'  # служебная директория с кешами утилиты (создаётся в корне проекта)
+IMPORTS_INDEX_FILE_NAME = 'imports_index.json'
+CATALOG_FILE_NAME = 'catalog.json'
+DIST_INDEX_FILE_NAME = 'dist_index.json'  # для пакетов со своим окружением: dist_index.<пакет>.json
+
+# движки подключения / отключения пакетов
+ENGINE_UV = 'uv'  # через `uv add` / `uv remove` для каждого пакета
+ENGINE_TOML = 'toml'  # прямое редактирование pyproject.toml корня, uv вызывается один раз по запросу
+
+# директории, в которые не заходит обход файлов проекта (служебные, кеши, сборки и виртуальные окружения)
+DEFAULT_IGNORE_DIRS = frozenset({
+    '.git', '.hg', '.svn', '.idea', 'idea', '.vscode',
+    '.venv', 'venv', 'node_modules', '__pycache__', 'build', 'dist',
+    '.mypy_cache', '.pytest_cache', '.ruff_cache', '.tox', '.nox',
+    CACHE_DIR_NAME,
+})
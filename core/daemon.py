@@ -0,0 +1,354 @@
+"""
+Демон WorkspaceClerk: долгоживущий процесс, который держит в памяти по одному WorkspaceClerk на проект
+(прогретые toml, список пакетов и AST сканирование) и отвечает на запросы JSON-RPC 2.0 через Unix сокет.
+Одно сообщение - одна строка JSON.
+
+    python -m core.daemon serve [--socket PATH]
+    python -m core.daemon call packages_list --root . --src src --params '{"limit": 10}'
+    python -m core.daemon call shutdown
+"""
+import argparse
+import inspect
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+from core.main import WorkspaceClerk
+from core.models import Status, DependsChange, UnusedDepends, MissingDepends
+from core.serialize import to_json_data
+
+# коды ошибок JSON-RPC 2.0
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# методы WorkspaceClerk, доступные через демон
+CLERK_METHODS = frozenset({
+    'project_get_info', 'project_depends_add', 'project_depends_remove',
+    'packages_list', 'packages_query', 'packages_create',
+    'packages_connect', 'packages_connect_all', 'packages_disconnect', 'packages_disconnect_all',
+    'packages_depends_add', 'packages_depends_remove', 'packages_depends_apply',
+    'packages_depends_unused', 'packages_depends_prune', 'packages_depends_missing', 'packages_depends_add_missing',
+})
+# параметры, которые в JSON приходят списками, а WorkspaceClerk ожидает множества
+_SET_PARAMS = frozenset({'packages', 'depends', 'filter_packages', 'ignore'})
+
+
+def default_socket_path() -> Path:
+    """Сокет по умолчанию: свой для каждого пользователя во временной директории"""
+    uid = os.getuid() if hasattr(os, 'getuid') else os.getlogin()
+    return Path(tempfile.gettempdir()) / f'workspaceclerk-{uid}.sock'
+
+
+class DaemonError(RuntimeError):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class _ClerkSlot:
+    """WorkspaceClerk проекта и блокировка: запросы к одному проекту выполняются по очереди"""
+
+    def __init__(self, clerk: WorkspaceClerk):
+        self.clerk = clerk
+        self.lock = threading.Lock()
+
+
+class ClerkDaemon:
+    """Реестр WorkspaceClerk по корням проектов и выполнение запросов"""
+
+    def __init__(self, scan_workers: int | None = 1):
+        self._scan_workers = scan_workers
+        self._slots: dict[tuple[str, str], _ClerkSlot] = {}
+        self._slots_lock = threading.Lock()
+
+    def _get_slot(self, root: str, src: str) -> _ClerkSlot:
+        root_path = Path(root).resolve()
+        src_path = (root_path / src).resolve()  # src может быть задан относительно корня
+        key = (str(root_path), str(src_path))
+
+        with self._slots_lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                # проверка uv и чтение проекта выполняются один раз на проект
+                slot = _ClerkSlot(WorkspaceClerk(
+                    root_path_in=root_path,
+                    src_path_in=src_path,
+                    waiting_subprocess=True,
+                    scan_workers=self._scan_workers,
+                    keep_ast_state=True,
+                ))
+                self._slots[key] = slot
+            return slot
+
+    def forget(self, root: str | None = None) -> int:
+        """Удалить проект (или все проекты) из памяти, следующий запрос создаст WorkspaceClerk заново"""
+        with self._slots_lock:
+            if root is None:
+                count = len(self._slots)
+                self._slots.clear()
+                return count
+            root_path = str(Path(root).resolve())
+            keys = [key for key in self._slots if key[0] == root_path]
+            for key in keys:
+                del self._slots[key]
+            return len(keys)
+
+    def call(self, method: str, params: dict) -> Any:
+        if method == 'ping':
+            return 'pong'
+        if method == 'forget':
+            return self.forget(root=params.get('root'))
+        if method not in CLERK_METHODS:
+            raise DaemonError(METHOD_NOT_FOUND, f'Метод `{method}` не найден')
+
+        params = dict(params)
+        root = params.pop('root', None)
+        src = params.pop('src', None)
+        if root is None or src is None:
+            raise DaemonError(INVALID_PARAMS, 'Параметры `root` и `src` обязательны')
+
+        related_files = bool(params.pop('related_files', False)) if method == 'packages_list' else False
+        for name in _SET_PARAMS & params.keys():
+            if params[name] is not None:
+                params[name] = set(params[name])
+        if 'matrix' in params:
+            params['matrix'] = {
+                package: DependsChange(add=set(change.get('add', ())), remove=set(change.get('remove', ())))
+                for package, change in params['matrix'].items()
+            }
+        if params.get('unused') is not None:
+            params['unused'] = UnusedDepends(root=list(params['unused'].get('root', ())),
+                                             packages=dict(params['unused'].get('packages', {})))
+        if params.get('missing') is not None:
+            params['missing'] = MissingDepends(root=dict(params['missing'].get('root', {})),
+                                               packages=dict(params['missing'].get('packages', {})))
+
+        slot = self._get_slot(root=root, src=src)
+        with slot.lock:
+            func = getattr(slot.clerk, method)
+            try:
+                inspect.signature(func).bind(**params)  # ошибка внутри метода не должна выглядеть как ошибка параметров
+            except TypeError as err:
+                raise DaemonError(INVALID_PARAMS, str(err))
+            result = func(**params)
+
+            if method == 'packages_list':
+                packages, status = self._drain(result)
+                return {
+                    'packages': to_json_data(packages, related_files=related_files),
+                    'status': to_json_data(status),
+                }
+            return to_json_data(result)
+
+    @staticmethod
+    def _drain(generator) -> tuple[list, Status | None]:
+        """Все элементы генератора и его итоговый Status (значение return)"""
+        items = []
+        while True:
+            try:
+                items.append(next(generator))
+            except StopIteration as stop:
+                return items, stop.value
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: '_DaemonServer'
+
+    def handle(self):
+        for line in self.rfile:  # соединение может передать несколько запросов подряд
+            if not line.strip():
+                continue
+            response = self.server.handle_message(line)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+            if self.server.stopping:
+                return
+
+
+class _DaemonServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, daemon: ClerkDaemon):
+        self.daemon = daemon
+        self.stopping = False
+        super().__init__(str(socket_path), _RequestHandler)
+
+    def handle_message(self, line: bytes) -> dict:
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError as err:
+                raise DaemonError(PARSE_ERROR, f'Некорректный JSON: {err}')
+            if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+                raise DaemonError(INVALID_REQUEST, 'Ожидается объект с полем `method`')
+            request_id = request.get('id')
+            params = request.get('params') or {}
+            if not isinstance(params, dict):
+                raise DaemonError(INVALID_PARAMS, 'Параметры передаются объектом')
+
+            if request['method'] == 'shutdown':
+                self.stopping = True
+                threading.Thread(target=self.shutdown, daemon=True).start()
+                result = True
+            else:
+                result = self.daemon.call(method=request['method'], params=params)
+            return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+        except DaemonError as err:
+            return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': err.code, 'message': str(err)}}
+        except Exception as err:
+            return {'jsonrpc': '2.0', 'id': request_id,
+                    'error': {'code': INTERNAL_ERROR, 'message': f'{type(err).__name__}: {err}'}}
+
+
+def _is_socket_alive(socket_path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def serve(socket_path: Path | None = None, scan_workers: int | None = 1):
+    """Запуск демона (блокирующий, до вызова метода shutdown или Ctrl+C)"""
+    if not hasattr(socket, 'AF_UNIX'):
+        raise RuntimeError('❌ Демон требует поддержки Unix сокетов')
+
+    socket_path = socket_path or default_socket_path()
+    if socket_path.exists():
+        if _is_socket_alive(socket_path):
+            raise RuntimeError(f'❌ Демон уже запущен на сокете `{socket_path}`')
+        socket_path.unlink()  # сокет от завершившегося процесса
+
+    old_umask = os.umask(0o177)  # сокет доступен только владельцу
+    try:
+        server = _DaemonServer(socket_path=socket_path, daemon=ClerkDaemon(scan_workers=scan_workers))
+    finally:
+        os.umask(old_umask)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path.exists():
+            socket_path.unlink()
+
+
+class DaemonClient:
+    """
+    Клиент демона. Соединение открывается при первом вызове и используется повторно.
+
+        with DaemonClient() as client:
+            result = client.call('packages_list', root='.', src='src', limit=10)
+    """
+
+    def __init__(self, socket_path: Path | None = None, timeout: float | None = None):
+        self._socket_path = socket_path or default_socket_path()
+        self._timeout = timeout
+        self._sock: socket.socket | None = None
+        self._file = None
+        self._next_id = 0
+
+    def _connect(self):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(self._timeout)
+        self._sock.connect(str(self._socket_path))
+        self._file = self._sock.makefile('rwb')
+
+    def call(self, method: str, **params) -> Any:
+        """
+        Вызов метода демона. Множества в параметрах передаются списками.
+
+        :raise DaemonError: ошибка выполнения запроса на стороне демона
+        :raise ConnectionError: демон не запущен или закрыл соединение
+        """
+        if self._file is None:
+            self._connect()
+
+        if params.get('root') is not None:  # относительный корень считается от рабочей директории клиента
+            params['root'] = str(Path(params['root']).resolve())
+
+        self._next_id += 1
+        request = {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': to_json_data(params)}
+        self._file.write(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._file.flush()
+
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise ConnectionError('Демон закрыл соединение')
+        response = json.loads(line)
+        if 'error' in response:
+            raise DaemonError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> 'DaemonClient':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m core.daemon', description='Демон WorkspaceClerk')
+    parser.add_argument('--socket', type=Path, default=None, help='путь к Unix сокету')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='запустить демон')
+    serve_parser.add_argument('--scan-workers', type=int, default=1,
+                              help='процессов для AST сканирования (0 - по числу ядер)')
+
+    call_parser = commands.add_parser('call', help='вызвать метод демона')
+    call_parser.add_argument('method')
+    call_parser.add_argument('--root', default=None, help='корень проекта')
+    call_parser.add_argument('--src', default=None, help='директория с пакетами')
+    call_parser.add_argument('--params', default='{}', help='остальные параметры объектом JSON')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(socket_path=args.socket, scan_workers=args.scan_workers or None)
+        return 0
+
+    params = json.loads(args.params)
+    if args.root is not None:
+        params['root'] = args.root
+    if args.src is not None:
+        params['src'] = args.src
+    try:
+        with DaemonClient(socket_path=args.socket) as client:
+            result = client.call(args.method, **params)
+    except DaemonError as err:
+        print(f'❌ {err} (код {err.code})', file=sys.stderr)
+        return 1
+    except (ConnectionError, FileNotFoundError) as err:
+        print(f'❌ Демон недоступен: {err}', file=sys.stderr)
+        return 1
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from core.constants import LOCK_FILE_NAME
+from core.tracing import span
+from core.utils.atomic_write import atomic_write_bytes
+from core.utils.requirements import normalize_name
+
+DIST_INDEX_VERSION = 1
+VENV_DIR_NAME = '.venv'
+
+
+def find_site_packages(venv_path: Path) -> list[Path]:
+    """Директории site-packages виртуального окружения (`lib/python3.X/site-packages` или `Lib/site-packages`)"""
+    found = []
+    for lib_name in ('lib', 'Lib', 'lib64'):
+        lib_path = venv_path / lib_name
+        if not lib_path.is_dir():
+            continue
+        if (lib_path / 'site-packages').is_dir():
+            found.append(lib_path / 'site-packages')
+        with os.scandir(lib_path) as entries:
+            for entry in entries:
+                if entry.name.startswith('python') and entry.is_dir():
+                    site_packages = Path(entry.path) / 'site-packages'
+                    if site_packages.is_dir():
+                        found.append(site_packages)
+    # без повторов: lib64 обычно ссылка на lib
+    return list({os.path.realpath(path): path for path in found}.values())
+
+
+def _read_text(path: str) -> str | None:
+    try:
+        with open(path, encoding='utf8', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _distribution_name(dist_info_path: str) -> str:
+    """Название дистрибутива из METADATA (поле Name), либо из имени директории `name-version.dist-info`"""
+    metadata = _read_text(os.path.join(dist_info_path, 'METADATA'))
+    if metadata:
+        for line in metadata.splitlines():
+            if not line:  # заголовки закончились
+                break
+            if line.startswith('Name:'):
+                return line[5:].strip()
+    return os.path.basename(dist_info_path).removesuffix('.dist-info').rsplit('-', 1)[0]
+
+
+def _top_level_modules(dist_info_path: str) -> set[str]:
+    """Модули верхнего уровня дистрибутива: top_level.txt, а если его нет - первые сегменты путей RECORD"""
+    top_level = _read_text(os.path.join(dist_info_path, 'top_level.txt'))
+    if top_level is not None:
+        return {line.strip().replace('/', '.').split('.', 1)[0] for line in top_level.splitlines() if line.strip()}
+
+    modules = set()
+    record = _read_text(os.path.join(dist_info_path, 'RECORD')) or ''
+    for line in record.splitlines():
+        path = line.split(',', 1)[0]
+        first, _, rest = path.partition('/')
+        if not first or first.startswith('..') or first == '__pycache__' \
+                or first.endswith(('.dist-info', '.data', '.pth')):
+            continue
+        if rest:  # директория пакета
+            modules.add(first)
+        elif first.endswith('.py'):
+            modules.add(first[:-3])
+        elif first.endswith(('.so', '.pyd')):  # модуль расширения: name.cpython-312-x86_64-linux-gnu.so
+            modules.add(first.split('.', 1)[0])
+    return modules
+
+
+@dataclass
+class _IndexData:
+    signature: list = field(default_factory=list)
+    distributions: dict[str, list[str]] = field(default_factory=dict)  # название дистрибутива -> модули
+    names: dict[str, str] = field(default_factory=dict)  # нормализованное название -> название как в METADATA
+
+
+class DistributionIndex:
+    """
+    Индекс установленных дистрибутивов виртуального окружения: модуль верхнего уровня <-> дистрибутив
+    (`yaml` <-> `PyYAML`, `dotenv` <-> `python-dotenv`), по `site-packages/*.dist-info` (top_level.txt и RECORD).
+
+    Индекс хранится в памяти и в файле cache_path и перестраивается, только если изменились uv.lock проекта
+    или директория site-packages (установка / удаление дистрибутива меняет её mtime).
+    Оба направления поиска - словари, названия модулей и дистрибутивов сравниваются нормализованными.
+    Поиск не обращается к файловой системе: актуальность проверяется явным вызовом refresh() (один раз на анализ),
+    без него индекс загружается только при первом поиске.
+    """
+
+    def __init__(self, project_path_in: Path, cache_path: Path | None = None, venv_path: Path | None = None):
+        """
+        :param project_path_in: директория проекта (с uv.lock и .venv)
+        :param cache_path: файл постоянного кеша индекса (None - только в памяти)
+        :param venv_path: виртуальное окружение (None - `.venv` проекта)
+        """
+        self._project_path = project_path_in
+        self._venv_path = venv_path if venv_path is not None else project_path_in / VENV_DIR_NAME
+        self._cache_path = cache_path
+        self._lock = threading.Lock()
+        self._data: _IndexData | None = None
+        self._by_module: dict[str, set[str]] = {}
+        self._by_distribution: dict[str, set[str]] = {}
+
+    def _signature(self, site_packages: list[Path]) -> list:
+        signature = []
+        for path in [self._project_path / LOCK_FILE_NAME, *site_packages]:
+            try:
+                stat = os.stat(path)
+                signature.append([os.fspath(path), stat.st_mtime_ns, stat.st_size])
+            except OSError:
+                signature.append([os.fspath(path), None, None])
+        return signature
+
+    def refresh(self) -> bool:
+        """
+        Проверка актуальности индекса и перестроение при необходимости
+
+        :return: был ли индекс перестроен (или загружен из кеша)
+        """
+        with self._lock:
+            site_packages = find_site_packages(self._venv_path)
+            signature = self._signature(site_packages)
+            if self._data is not None and self._data.signature == signature:
+                return False
+
+            data = self._load(signature)
+            if data is None:
+                data = self._build(site_packages, signature)
+                if self._cache_path is not None:
+                    try:
+                        atomic_write_bytes(self._cache_path, json.dumps({
+                            'version': DIST_INDEX_VERSION,
+                            'signature': data.signature,
+                            'distributions': data.distributions,
+                            'names': data.names,
+                        }, ensure_ascii=False).encode('utf-8'))
+                    except OSError:
+                        pass  # кеш - это только ускорение, запрос на чтение не должен ломаться без права записи
+
+            self._data = data
+            self._by_distribution = {name: {normalize_name(module) for module in modules}
+                                     for name, modules in data.distributions.items()}
+            self._by_module = {}
+            for name, modules in self._by_distribution.items():
+                for module in modules:
+                    self._by_module.setdefault(module, set()).add(name)
+            return True
+
+    def _load(self, signature: list) -> _IndexData | None:
+        if self._cache_path is None:
+            return None
+        try:
+            data = json.loads(self._cache_path.read_bytes())
+            if data.get('version') != DIST_INDEX_VERSION or data['signature'] != signature:
+                return None
+            return _IndexData(signature=signature, distributions=data['distributions'], names=data['names'])
+        except (OSError, ValueError, KeyError, TypeError):  # кеша нет или он повреждён - индекс строится заново
+            return None
+
+    @staticmethod
+    def _build(site_packages: list[Path], signature: list) -> _IndexData:
+        data = _IndexData(signature=signature)
+        with span('dist_index.build', site_packages=[str(path) for path in site_packages]) as current:
+            for path in site_packages:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if not entry.name.endswith('.dist-info') or not entry.is_dir():
+                            continue
+                        name = _distribution_name(entry.path)
+                        normalized = normalize_name(name)
+                        data.names[normalized] = name
+                        data.distributions[normalized] = sorted(_top_level_modules(entry.path))
+            current.set(distributions=len(data.distributions))
+        return data
+
+    def _ensure_loaded(self):
+        if self._data is None:
+            self.refresh()
+
+    def distributions_for_module(self, module: str) -> set[str]:
+        """Дистрибутивы (названия как в METADATA), предоставляющие модуль верхнего уровня (`yaml` -> {'PyYAML'})"""
+        self._ensure_loaded()
+        names = self._data.names
+        return {names[name] for name in self._by_module.get(normalize_name(module.split('.', 1)[0]), ())}
+
+    def modules_for_distribution(self, distribution: str) -> set[str]:
+        """Нормализованные модули верхнего уровня установленного дистрибутива (пустое множество, если не установлен)"""
+        self._ensure_loaded()
+        return set(self._by_distribution.get(normalize_name(distribution), ()))
+
+    def is_installed(self, distribution: str) -> bool:
+        self._ensure_loaded()
+        return normalize_name(distribution) in self._by_distribution
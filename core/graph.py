@@ -0,0 +1,148 @@
+import os
+from pathlib import Path
+
+from core.constants import TOML_FILE_NAME
+from core.tracing import span
+from core.utils.requirements import requirement_name, normalize_name
+from core.utils.toml_cache import toml_cache
+
+
+class DependencyCycleError(Exception):
+    pass
+
+
+class DependencyGraph:
+    """
+    Граф зависимостей между пакетами workspace по всем `src/*/pyproject.toml`.
+
+    Ребро `a -> b` означает, что пакет a зависит от пакета b: b указан в `project.dependencies`
+    или в `tool.uv.sources` пакета a. Зависимости на библиотеки (не пакеты src) в граф не входят.
+    Вершины - названия пакетов (`project.name`).
+
+    Уровни (levels) - топологическая сортировка слоями: пакеты уровня зависят только от пакетов
+    предыдущих уровней, поэтому пакеты одного уровня независимы друг от друга.
+    """
+
+    def __init__(self, dependencies: dict[str, set[str]]):
+        """
+        :param dependencies: пакет -> пакеты, от которых он зависит
+        """
+        self._dependencies: dict[str, set[str]] = {name: set(depends) for name, depends in dependencies.items()}
+        self._dependents: dict[str, set[str]] = {name: set() for name in self._dependencies}
+        for name, depends in list(self._dependencies.items()):
+            for depend in depends:
+                self._dependents.setdefault(depend, set()).add(name)
+                self._dependencies.setdefault(depend, set())
+        self._levels: list[list[str]] | None = None
+        self._cyclic: set[str] = set()
+
+    @classmethod
+    def from_src(cls, src_path_in: Path) -> 'DependencyGraph':
+        """Построение графа по pyproject.toml пакетов в директории src"""
+        with span('graph.build', src=str(src_path_in)):
+            documents: dict[str, dict] = {}
+            with os.scandir(src_path_in) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    try:
+                        data = toml_cache.load(Path(entry.path) / TOML_FILE_NAME)
+                        name = data['project']['name']
+                    except (OSError, KeyError, ValueError):  # не пакет или pyproject.toml без project.name
+                        continue
+                    documents[name] = data
+
+            by_normalized = {normalize_name(name): name for name in documents}
+
+            dependencies: dict[str, set[str]] = {}
+            for name, data in documents.items():
+                referenced = {requirement_name(dep) for dep in data['project'].get('dependencies', ())}
+                referenced |= {normalize_name(source)
+                               for source in data.get('tool', {}).get('uv', {}).get('sources', {})}
+                dependencies[name] = {by_normalized[ref] for ref in referenced
+                                      if ref in by_normalized and by_normalized[ref] != name}
+
+            return cls(dependencies=dependencies)
+
+    @property
+    def packages(self) -> set[str]:
+        return set(self._dependencies)
+
+    def dependencies(self, package: str) -> set[str]:
+        """Пакеты, от которых напрямую зависит package"""
+        return set(self._dependencies.get(package, ()))
+
+    def dependents(self, package: str) -> set[str]:
+        """Пакеты, напрямую зависящие от package"""
+        return set(self._dependents.get(package, ()))
+
+    @staticmethod
+    def _closure(edges: dict[str, set[str]], packages: set[str] | str) -> set[str]:
+        start = {packages} if isinstance(packages, str) else set(packages)
+        visited: set[str] = set()
+        stack = [node for package in start for node in edges.get(package, ())]
+        while stack:
+            node = stack.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            stack.extend(edges.get(node, ()))
+        return visited - start
+
+    def transitive_dependencies(self, packages: set[str] | str) -> set[str]:
+        """Все пакеты, от которых прямо или косвенно зависят packages (без самих packages)"""
+        return self._closure(self._dependencies, packages)
+
+    def transitive_dependents(self, packages: set[str] | str) -> set[str]:
+        """Все пакеты, прямо или косвенно зависящие от packages (без самих packages)"""
+        return self._closure(self._dependents, packages)
+
+    def levels(self, packages: set[str] | None = None, strict: bool = False) -> list[list[str]]:
+        """
+        Топологические уровни (алгоритм Кана): сначала пакеты без зависимостей внутри workspace,
+        затем зависящие только от них и т.д. Пакеты внутри уровня отсортированы по названию.
+
+        :param packages: только указанные пакеты (порядок между ними сохраняется и через не указанные пакеты)
+        :param strict: при цикле зависимостей выбросить DependencyCycleError, иначе пакеты цикла
+            (и зависящие от них) добавляются последним уровнем
+        """
+        if self._levels is None:
+            self._levels, self._cyclic = self._compute_levels()
+
+        if strict and self._cyclic:
+            raise DependencyCycleError(
+                f'❌ Цикл зависимостей между пакетами: {", ".join(sorted(self._cyclic))}.'
+            )
+
+        levels = self._levels + ([sorted(self._cyclic)] if self._cyclic else [])
+        if packages is None:
+            return [list(level) for level in levels]
+        return [selected for level in levels if (selected := [name for name in level if name in packages])]
+
+    @property
+    def cyclic(self) -> set[str]:
+        """Пакеты, входящие в цикл зависимостей или зависящие от цикла"""
+        if self._levels is None:
+            self._levels, self._cyclic = self._compute_levels()
+        return set(self._cyclic)
+
+    def _compute_levels(self) -> tuple[list[list[str]], set[str]]:
+        in_degree = {name: len(depends) for name, depends in self._dependencies.items()}
+        current = sorted(name for name, degree in in_degree.items() if degree == 0)
+        levels = []
+        while current:
+            levels.append(current)
+            following = []
+            for name in current:
+                for dependent in self._dependents.get(name, ()):
+                    in_degree[dependent] -= 1
+                    if in_degree[dependent] == 0:
+                        following.append(dependent)
+            current = sorted(following)
+        cyclic = {name for name, degree in in_degree.items() if degree > 0}
+        return levels, cyclic
+
+    def order(self, packages: set[str] | None = None, reverse: bool = False) -> list[str]:
+        """Пакеты в порядке зависимостей (reverse=True - сначала зависящие пакеты)"""
+        ordered = [name for level in self.levels(packages=packages) for name in level]
+        return ordered[::-1] if reverse else ordered
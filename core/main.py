@@ -1,82 +1,142 @@
 from pathlib import Path
+from contextlib import contextmanager
+from core.batch import BatchSession
+from core.catalog import PackageCatalog, CatalogPage
+from core.graph import DependencyGraph
 from core.manager_project import ManagerProject
 from core.manager_packages import ManagerPackages
-from core.models import Status, ProjectInfo
-from typing import Generator
+from core.watcher import WorkspaceWatcher
+from core.models import Status, ProjectInfo, DependsChange, UnusedDepends, MissingDepends
+from core.constants import ENGINE_UV, ENGINE_TOML
+from typing import Callable, Generator, Iterator
+from subprocess import CompletedProcess
 from core.models import Package
+from core.tracing import operation, measure_call
 
 
 class WorkspaceClerk:
-    def __init__(self, root_path_in: Path, src_path_in: Path, waiting_subprocess: bool = False):
+    def __init__(self, root_path_in: Path, src_path_in: Path, waiting_subprocess: bool = False,
+                 scan_workers: int | None = 1, run_cmd_func: Callable[..., CompletedProcess] | None = None,
+                 keep_ast_state: bool = False):
+        """
+        :param root_path_in: корень проекта
+        :param src_path_in: директория с пакетами
+        :param waiting_subprocess: ожидать завершения subprocess
+        :param scan_workers: количество процессов для AST сканирования (None - по числу ядер)
+        :param run_cmd_func: исполнитель команд с сигнатурой core.commons.run_cmd (None - run_cmd)
+        :param keep_ast_state: хранить AST сканирование между запросами списка пакетов и обновлять его
+            только по изменённым файлам (для долгоживущих процессов, например core.daemon)
+        """
         self._root_path = root_path_in
         self._src_path = src_path_in
+        self._run_cmd_func = run_cmd_func
+        self._catalog: PackageCatalog | None = None  # создаётся при первом packages_query
         self.project_manager = ManagerProject(
             root_path_in=root_path_in,
             src_path_in=src_path_in,
-            waiting_subprocess=waiting_subprocess
+            waiting_subprocess=waiting_subprocess,
+            run_cmd_func=run_cmd_func,
         )
         self.packages_manager = ManagerPackages(
             root_path_in=root_path_in,
             src_path_in=src_path_in,
-            waiting_subprocess=waiting_subprocess
+            waiting_subprocess=waiting_subprocess,
+            scan_workers=scan_workers,
+            run_cmd_func=run_cmd_func,
+            keep_ast_state=keep_ast_state,
         )
         self.project_init()
 
+    @operation('clerk.project_init')
     def project_init(self) -> Status:
         status = self.project_manager.project_init()
         if not status.success:
             raise Exception(f'❌ Пакет не был инициализирован -> {status.message}')
         return status
 
+    @contextmanager
+    def batch(self) -> Iterator[BatchSession]:
+        """
+        Пакетная сессия изменений: все операции внутри блока `with clerk.batch():` меняют только pyproject.toml,
+        при выходе из блока выполняется один `uv lock` и один `uv sync`. Если синхронизация не удалась
+        или в блоке возникло исключение - pyproject.toml и uv.lock возвращаются к исходному состоянию.
+        Результат фиксации доступен в `session.status`. Вложенный вызов присоединяется к внешней сессии.
+        """
+        if self.packages_manager.batch is not None:  # вложенная сессия - изменения фиксирует внешняя
+            yield self.packages_manager.batch
+            return
+
+        session = BatchSession(root_path_in=self._root_path, src_path_in=self._src_path,
+                               run_cmd_func=self._run_cmd_func)
+        self.project_manager.batch = session
+        self.packages_manager.batch = session
+        try:
+            yield session
+        except BaseException:
+            session.rollback()
+            session.status = Status(success=False, message='⚠ Пакетная сессия прервана исключением, изменения отменены.')
+            raise
+        else:
+            session.commit()
+        finally:
+            self.project_manager.batch = None
+            self.packages_manager.batch = None
+
+    def watcher(self, interval: float = 1.0, track_sources: bool = True) -> WorkspaceWatcher:
+        """
+        Наблюдатель за проектом с моделью пакетов, которая обновляется по изменениям файлов
+        (см. WorkspaceWatcher). Запуск фонового опроса: `with clerk.watcher() as watcher:` либо watcher.start().
+        """
+        return WorkspaceWatcher(
+            root_path_in=self._root_path,
+            src_path_in=self._src_path,
+            packages_manager=self.packages_manager,
+            interval=interval,
+            track_sources=track_sources,
+        )
+
+    @operation('clerk.project_get_info')
     def project_get_info(self) -> tuple[Status, ProjectInfo | None]:
         status, project_info = self.project_manager.project_get_info()
         return status, project_info
 
+    @operation('clerk.project_depends_add')
     def project_depends_add(self, depends: set):
         status_list = []
         for dep in depends:
-            status = self.project_manager.project_depend_add(depend=dep)
+            status = measure_call('project.depend_add', self.project_manager.project_depend_add, depend=dep)
             status_list.append(status)
         return status_list
 
+    @operation('clerk.project_depends_remove')
     def project_depends_remove(self, depends: set):
         status_list = []
         for dep in depends:
-            status = self.project_manager.project_depend_remove(depend=dep)
+            status = measure_call('project.depend_remove', self.project_manager.project_depend_remove, depend=dep)
             status_list.append(status)
         return status_list
 
+    @operation('clerk.packages_list')
     def packages_list(self,
                       offset: int = 0, limit: int = 100,
                       filter_packages: set | None = None, filter_exclude: bool = False,
                       ) -> Generator[Package, Status, Status]:
 
-        packages_data: Generator[Package, Status, Status] = self.packages_manager.packages_get_list()
         filter_packages = {package.lower() for package in filter_packages} if filter_packages else None
 
+        # фильтрация и пагинация выполняются до построения пакетов (пропущенные пакеты не требуют AST сканирования)
+        packages_data: Generator[Package, Status, Status] = self.packages_manager.packages_get_list(
+            filter_packages=filter_packages,
+            filter_exclude=filter_exclude,
+            offset=offset,
+            limit=limit,
+        )
+
         # если packages_list не был получен и вернулся статус
         if isinstance(packages_data, Status):
             return packages_data  # возвращение статуса Status
 
-        counter = 0
-
-        for pack in packages_data:
-            counter += 1
-
-            # обычная пагинация
-            if filter_packages is None and offset < counter <= offset + limit:
-                yield pack
-
-            # фильтрация по пакетам (поиск конкретных)
-            elif filter_packages is not None:
-                if not filter_exclude and pack.name in filter_packages:
-                    yield pack
-
-                elif filter_exclude and pack.name not in filter_packages:
-                    yield pack
-
-            if counter > offset + limit:
-                break
+        yield from packages_data
 
         return Status(success=True, message='✔ Все пакеты просмотрены.')
 
@@ -94,7 +154,7 @@ class WorkspaceClerk:
             if package.name in original_query:
                 success_packages.append(package.name)  # Пакеты к которым callback функция была применена
 
-            status = callback(package)
+            status = measure_call('packages.apply', callback, package)
             status_list.append(status)
 
         # проверка что callback функция была применена к пакету
@@ -107,14 +167,89 @@ class WorkspaceClerk:
 
         return status_list
 
+    @staticmethod
+    def _packages_apply_engine(original_query: set,
+                               packages_data: Status | Generator[Package, Status, Status],
+                               engine_func: Callable[[list[str]], list[Status]],
+                               ) -> list[Status]:
+        """Применение функции движка ENGINE_TOML сразу ко всем найденным пакетам (одна запись pyproject.toml)"""
+        if isinstance(packages_data, Status):
+            return [packages_data]  # вернуть статус
+
+        packages_names = [package.name for package in packages_data]
+        status_list = engine_func(packages_names) if packages_names else []
+
+        # проверка что функция была применена к пакету
+        for i in original_query:
+            if i.lower() not in packages_names:
+                status_list.append(Status(
+                    success=False,
+                    message=f'⚠ Пакет `{i}` не существует, либо в нем отсутствует pyproject.toml. Используйте package_create(package="{i}").')
+                )
+
+        return status_list
+
+    @staticmethod
+    def _check_engine(engine: str, finalize: str | None):
+        if engine not in (ENGINE_UV, ENGINE_TOML):
+            raise ValueError(f'Неизвестный движок подключения пакетов `{engine}`')
+        if finalize not in (None, 'lock', 'sync'):
+            raise ValueError(f'Неизвестное завершение `{finalize}`, допустимо: None, "lock", "sync"')
+
+    @operation('clerk.packages_query')
+    def packages_query(self,
+                       installed: bool | None = None,
+                       depends_on: str | None = None,
+                       prefix: str | None = None,
+                       cursor: str | None = None,
+                       limit: int = 100,
+                       related_files: bool = False,
+                       ) -> CatalogPage:
+        """
+        Запрос к постоянному каталогу пакетов (см. PackageCatalog): каталог обновляется инкрементально
+        (перечитываются только изменённые pyproject.toml), выборка выполняется по индексам.
+
+        :param installed: True - только подключенные, False - только не подключенные, None - все
+        :param depends_on: только пакеты, зависящие от указанной библиотеки или пакета
+        :param prefix: только пакеты, название которых начинается с prefix
+        :param cursor: next_cursor предыдущей страницы
+        :param limit: размер страницы
+        :param related_files: заполнить related_files_count (требует AST сканирования)
+        """
+        if self._catalog is None:
+            self._catalog = PackageCatalog(root_path_in=self._root_path, src_path_in=self._src_path)
+        self._catalog.refresh(related_files=related_files)
+        return self._catalog.query(installed=installed, depends_on=depends_on, prefix=prefix,
+                                   cursor=cursor, limit=limit)
+
+    @operation('clerk.dependency_graph')
+    def dependency_graph(self) -> DependencyGraph:
+        """Граф зависимостей между пакетами src (строится заново при каждом вызове)"""
+        return DependencyGraph.from_src(src_path_in=self._src_path)
+
+    def _graph_levels(self, names: list[str]) -> list[list[str]]:
+        """Топологические уровни указанных пакетов; пакеты, отсутствующие в графе, - последним уровнем"""
+        levels = self.dependency_graph().levels(packages=set(names))
+        ungraphed = sorted(set(names).difference(*levels))
+        return levels + [ungraphed] if ungraphed else levels
+
+    @operation('clerk.packages_create')
     def packages_create(self, packages: set) -> list[Status]:
         status_list = []
         for pkg_name in packages:
-            status = self.packages_manager.package_create(pkg_name=pkg_name)
+            status = measure_call('packages.create', self.packages_manager.package_create, pkg_name=pkg_name)
             status_list.append(status)
         return status_list
 
-    def packages_connect(self, packages: set) -> list[Status]:
+    @operation('clerk.packages_connect')
+    def packages_connect(self, packages: set,
+                         engine: str = ENGINE_UV, finalize: str | None = None) -> list[Status]:
+        """
+        :param engine: ENGINE_UV - `uv add` для каждого пакета, ENGINE_TOML - одна запись pyproject.toml корня
+        :param finalize: для ENGINE_TOML: вызов uv после записи (None, 'lock' или 'sync')
+        """
+        self._check_engine(engine=engine, finalize=finalize)
+
         # Получить список релевантных пакетов
         packages_data = self.packages_list(
             filter_packages=packages,
@@ -122,6 +257,13 @@ class WorkspaceClerk:
         )
 
         # выполнить функцию с ними
+        if engine == ENGINE_TOML:
+            return self._packages_apply_engine(
+                original_query=packages,
+                packages_data=packages_data,
+                engine_func=lambda names: self.packages_manager.packages_connect_toml(pkg_names=names, finalize=finalize),
+            )
+
         status_list = self._packages_apply_callback(
             original_query=packages,
             packages_data=packages_data,
@@ -130,7 +272,18 @@ class WorkspaceClerk:
 
         return status_list
 
-    def packages_connect_all(self, packages: set | None = None, exclude: bool = False) -> list[Status]:
+    @operation('clerk.packages_connect_all')
+    def packages_connect_all(self, packages: set | None = None, exclude: bool = False,
+                             engine: str = ENGINE_UV, finalize: str | None = None,
+                             ordered: bool = True) -> list[Status]:
+        """
+        :param engine: ENGINE_UV - `uv add` для каждого пакета, ENGINE_TOML - одна запись pyproject.toml корня
+        :param finalize: для ENGINE_TOML: вызов uv после записи (None, 'lock' или 'sync')
+        :param ordered: для ENGINE_UV: подключение в порядке зависимостей между пакетами,
+            один `uv add` на топологический уровень (см. dependency_graph)
+        """
+        self._check_engine(engine=engine, finalize=finalize)
+
         packages = packages if packages is not None else set()
 
         # Получить список релевантных пакетов
@@ -140,6 +293,21 @@ class WorkspaceClerk:
         )
 
         # выполнить функцию с ними
+        if engine == ENGINE_TOML:
+            return self._packages_apply_engine(
+                original_query=packages if not exclude else set(),
+                packages_data=packages_data,
+                engine_func=lambda names: self.packages_manager.packages_connect_toml(pkg_names=names, finalize=finalize),
+            )
+
+        if ordered:
+            return self._packages_apply_engine(
+                original_query=packages if not exclude else set(),
+                packages_data=packages_data,
+                engine_func=lambda names: self.packages_manager.packages_connect_levels(
+                    levels=self._graph_levels(names=names)),
+            )
+
         status_list = self._packages_apply_callback(
             original_query=packages,
             packages_data=packages_data,
@@ -148,7 +316,15 @@ class WorkspaceClerk:
 
         return status_list
 
-    def packages_disconnect(self, packages: set) -> list[Status]:
+    @operation('clerk.packages_disconnect')
+    def packages_disconnect(self, packages: set,
+                            engine: str = ENGINE_UV, finalize: str | None = None) -> list[Status]:
+        """
+        :param engine: ENGINE_UV - `uv remove` для каждого пакета, ENGINE_TOML - одна запись pyproject.toml корня
+        :param finalize: для ENGINE_TOML: вызов uv после записи (None, 'lock' или 'sync')
+        """
+        self._check_engine(engine=engine, finalize=finalize)
+
         # Получить список релевантных пакетов
         packages_data = self.packages_list(
             filter_packages=packages,
@@ -156,6 +332,13 @@ class WorkspaceClerk:
         )
 
         # выполнить функцию с ними
+        if engine == ENGINE_TOML:
+            return self._packages_apply_engine(
+                original_query=packages,
+                packages_data=packages_data,
+                engine_func=lambda names: self.packages_manager.packages_disconnect_toml(pkg_names=names, finalize=finalize),
+            )
+
         status_list = self._packages_apply_callback(
             original_query=packages,
             packages_data=packages_data,
@@ -164,7 +347,17 @@ class WorkspaceClerk:
 
         return status_list
 
-    def packages_disconnect_all(self, packages: set | None = None, exclude: bool = False) -> list[Status]:
+    @operation('clerk.packages_disconnect_all')
+    def packages_disconnect_all(self, packages: set | None = None, exclude: bool = False,
+                                engine: str = ENGINE_UV, finalize: str | None = None,
+                                ordered: bool = True) -> list[Status]:
+        """
+        :param engine: ENGINE_UV - `uv remove` для каждого пакета, ENGINE_TOML - одна запись pyproject.toml корня
+        :param finalize: для ENGINE_TOML: вызов uv после записи (None, 'lock' или 'sync')
+        :param ordered: для ENGINE_UV: отключение в обратном порядке зависимостей (сначала зависящие пакеты)
+        """
+        self._check_engine(engine=engine, finalize=finalize)
+
         packages = packages if packages is not None else set()
 
         # Получить список релевантных пакетов
@@ -174,6 +367,18 @@ class WorkspaceClerk:
         )
 
         # выполнить функцию с ними
+        if engine == ENGINE_TOML:
+            return self._packages_apply_engine(
+                original_query=packages if not exclude else set(),
+                packages_data=packages_data,
+                engine_func=lambda names: self.packages_manager.packages_disconnect_toml(pkg_names=names, finalize=finalize),
+            )
+
+        if ordered and not isinstance(packages_data, Status):
+            packages_by_name = {package.name: package for package in packages_data}
+            order = [name for level in self._graph_levels(names=list(packages_by_name)) for name in level]
+            packages_data = [packages_by_name[name] for name in reversed(order)]
+
         status_list = self._packages_apply_callback(
             original_query=packages,
             packages_data=packages_data,
@@ -182,14 +387,15 @@ class WorkspaceClerk:
 
         return status_list
 
+    @operation('clerk.packages_depends_add')
     def packages_depends_add(self, package: str, depends: set):
         status_list = []
 
-        # Получить список релевантных пакетов
-        packages_data = self.packages_list(
+        # Получить список релевантных пакетов (список, а не генератор - он обходится для каждой зависимости)
+        packages_data = list(self.packages_list(
             filter_packages={package},
             filter_exclude=False
-        )
+        ))
 
         for dep in depends:
             status = self._packages_apply_callback(
@@ -201,14 +407,15 @@ class WorkspaceClerk:
 
         return status_list
 
+    @operation('clerk.packages_depends_remove')
     def packages_depends_remove(self, package: str, depends: set):
         status_list = []
 
-        # Получить список релевантных пакетов
-        packages_data = self.packages_list(
+        # Получить список релевантных пакетов (список, а не генератор - он обходится для каждой зависимости)
+        packages_data = list(self.packages_list(
             filter_packages={package},
             filter_exclude=False
-        )
+        ))
 
         for dep in depends:
             status = self._packages_apply_callback(
@@ -220,6 +427,100 @@ class WorkspaceClerk:
 
         return status_list
 
+    @operation('clerk.packages_depends_apply')
+    def packages_depends_apply(self, matrix: dict[str, DependsChange], workers: int = 4) -> list[Status]:
+        """
+        Добавление / удаление множества зависимостей во множестве пакетов с одной синхронизацией uv sync.
+
+        :param matrix: {название пакета: DependsChange(add={...}, remove={...})}
+        :param workers: количество параллельно обрабатываемых пакетов
+        """
+        matrix = {package.lower(): change for package, change in matrix.items()}
+        return self.packages_manager.packages_depends_apply(matrix=matrix, workers=workers)
+
+    @operation('clerk.packages_depends_unused')
+    def packages_depends_unused(self, ignore: set | None = None) -> UnusedDepends:
+        """
+        Зависимости корня и пакетов, которые объявлены, но не импортируются ни одним файлом (AST сканирование).
+
+        :param ignore: дистрибутивы, которые не проверяются (например инструменты без импортов: pytest, ruff)
+        """
+        return self.packages_manager.packages_depends_unused(ignore=ignore)
+
+    @operation('clerk.packages_depends_prune')
+    def packages_depends_prune(self, unused: UnusedDepends | None = None, ignore: set | None = None,
+                               workers: int = 4) -> list[Status]:
+        """
+        Удаление неиспользуемых зависимостей: один `uv remove` на пакет, один `uv remove` в корне
+        и одна синхронизация `uv sync` в конце.
+
+        :param unused: результат packages_depends_unused (None - вычислить заново)
+        :param ignore: дистрибутивы, которые не удаляются (если unused вычисляется заново)
+        :param workers: количество параллельно обрабатываемых пакетов (см. packages_depends_apply)
+        """
+        unused = unused if unused is not None else self.packages_depends_unused(ignore=ignore)
+        if unused.is_empty:
+            return [Status(success=True, message='✔ Неиспользуемых зависимостей нет.')]
+
+        status_list = []
+        if unused.packages:
+            matrix = {package: DependsChange(remove=set(depends)) for package, depends in unused.packages.items()}
+            status_list += self.packages_manager.packages_depends_apply(matrix=matrix, workers=workers, sync=False)
+        if unused.root:
+            status_list += self.project_manager.project_depends_remove_many(depends=unused.root, no_sync=True)
+
+        if any(status.success for status in status_list):
+            status_list.append(self.project_manager.project_sync())
+        return status_list
+
+    @operation('clerk.packages_depends_missing')
+    def packages_depends_missing(self) -> MissingDepends:
+        """
+        Сторонние модули, которые импортируются в корне или пакетах, но не объявлены в их зависимостях
+        (название дистрибутива определяется по dist-info установленного окружения, см. core.dist_index).
+        """
+        return self.packages_manager.packages_depends_missing()
+
+    @operation('clerk.packages_depends_add_missing')
+    def packages_depends_add_missing(self, missing: MissingDepends | None = None, workers: int = 4) -> list[Status]:
+        """
+        Установка недостающих зависимостей: один `uv add` на пакет, один `uv add` в корне
+        и одна синхронизация `uv sync` в конце. Устанавливаются только модули с определённым дистрибутивом,
+        остальные возвращаются статусами ⚠ (зависимость добавляется вручную).
+
+        :param missing: результат packages_depends_missing (None - вычислить заново)
+        :param workers: количество параллельно обрабатываемых пакетов (см. packages_depends_apply)
+        """
+        missing = missing if missing is not None else self.packages_depends_missing()
+        if missing.is_empty:
+            return [Status(success=True, message='✔ Недостающих зависимостей нет.')]
+
+        status_list = []
+        scopes = [('корень', missing.root)] + [(f'пакет `{package}`', modules)
+                                               for package, modules in missing.packages.items()]
+        for scope, modules in scopes:
+            for module, distribution in modules.items():
+                if distribution is None:
+                    status_list.append(Status(
+                        success=False,
+                        message=f'⚠ Дистрибутив модуля `{module}` ({scope}) не определён, добавьте зависимость вручную.'
+                    ))
+
+        matrix = {}
+        for package, modules in missing.packages.items():
+            distributions = {distribution for distribution in modules.values() if distribution is not None}
+            if distributions:
+                matrix[package] = DependsChange(add=distributions)
+        if matrix:
+            status_list += self.packages_manager.packages_depends_apply(matrix=matrix, workers=workers, sync=False)
+        root_depends = sorted({distribution for distribution in missing.root.values() if distribution is not None})
+        if root_depends:
+            status_list += self.project_manager.project_depends_add_many(depends=root_depends, no_sync=True)
+
+        if any(status.success for status in status_list):
+            status_list.append(self.project_manager.project_sync())
+        return status_list
+
     def packages_list_get_console_render(
             self,
             offset: int = 0, limit: int = 100,
@@ -0,0 +1,92 @@
+import functools
+from pathlib import Path
+from typing import Callable, TypeVar
+import subprocess
+
+from core.batch import BatchSession
+from core.commons import run_cmd
+from core.constants import TOML_FILE_NAME, LOCK_FILE_NAME
+from core.tracing import traced_runner
+from core.utils.file_lock import FileLock, file_lock
+
+T = TypeVar('T')
+
+
+def root_toml_locked(func: Callable) -> Callable:
+    """
+    Метод менеджера целиком под exclusive блокировкой pyproject.toml корня: проверка состояния, изменение
+    и проверка результата не перемежаются с изменениями других процессов и потоков
+    """
+
+    @functools.wraps(func)
+    def wrapper(self: 'ManagerBase', *args, **kwargs):
+        with file_lock(self._root_path / TOML_FILE_NAME).exclusive():
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
+class ManagerBase:
+    """Общая часть менеджеров проекта и пакетов: пути проекта и запуск команд uv (с учётом пакетной сессии)"""
+
+    def __init__(self, root_path_in: Path, src_path_in: Path, waiting_subprocess: bool = False,
+                 run_cmd_func: Callable[..., subprocess.CompletedProcess] | None = None):
+        """
+        :param run_cmd_func: исполнитель команд с сигнатурой run_cmd (None - core.commons.run_cmd)
+        """
+        self._root_path = root_path_in
+        self._src_path = src_path_in
+        self._src_local_path = self._src_path.relative_to(self._root_path)
+        self._waiting_subprocess = waiting_subprocess  # ожидание завершения работы suprocess
+        self._run_cmd = traced_runner(run_cmd_func if run_cmd_func is not None else run_cmd)
+        self.batch: BatchSession | None = None  # активная пакетная сессия (см. WorkspaceClerk.batch)
+
+    @staticmethod
+    def _toml_locked(toml_path: Path, func: Callable[..., T]) -> Callable[..., T]:
+        """func (команда пакета) целиком под exclusive блокировкой toml_path"""
+
+        def wrapper(*args, **kwargs) -> T:
+            with file_lock(toml_path).exclusive():
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    def _uv_lock(self, cwd: Path) -> FileLock:
+        """
+        Блокировка окружения, которое изменяет uv в cwd (uv.lock и .venv): у пакета со своим uv.lock - своя,
+        у корня и пакетов workspace - общая блокировка корня
+        """
+        if cwd != self._root_path and (cwd / LOCK_FILE_NAME).exists():
+            return file_lock(cwd / LOCK_FILE_NAME)
+        return file_lock(self._root_path / LOCK_FILE_NAME)
+
+    def _run_uv(self, args: str, cwd: Path, no_sync: bool = False) -> subprocess.CompletedProcess:
+        """
+        Запуск команды uv, изменяющей зависимости (add / remove).
+        Внутри пакетной сессии команда выполняется с --frozen: меняется только pyproject.toml,
+        блокировка и синхронизация выполняются один раз при завершении сессии.
+
+        :param args: аргументы uv например "add requests"
+        :param cwd: директория исполнения команды
+        :param no_sync: не синхронизировать окружение после команды (--no-sync)
+        """
+        # uv изменяет pyproject.toml в cwd и окружение: сначала блокировка toml, затем окружения (всегда в этом порядке)
+        with file_lock(cwd / TOML_FILE_NAME).exclusive(), self._uv_lock(cwd).exclusive():
+            if self.batch is not None:
+                self.batch.defer(cwd)
+                return self._run_cmd(command=f'uv {args} --frozen', cwd=cwd, waiting_subprocess=True)
+
+            return self._run_cmd(
+                command=f'uv {args} --no-sync' if no_sync else f'uv {args}',
+                cwd=cwd,
+                waiting_subprocess=self._waiting_subprocess,
+            )
+
+    def _sync_root(self) -> subprocess.CompletedProcess | None:
+        """`uv sync` в корне проекта (внутри пакетной сессии откладывается до её завершения)"""
+        if self.batch is not None:
+            self.batch.defer(self._root_path)
+            return None
+
+        with self._uv_lock(self._root_path).exclusive():
+            return self._run_cmd(command='uv sync', cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
@@ -1,21 +1,98 @@
 from pathlib import Path
-from core.commons import run_cmd
-from core.models import Status, Package, Command
-from core.constants import TOML_FILE_NAME
+from core.commons import cmd_quote
+from core.manager_base import ManagerBase, root_toml_locked
+from core.models import Status, Package, DependsChange, UnusedDepends, MissingDepends
+from core.constants import TOML_FILE_NAME, LOCK_FILE_NAME, CACHE_DIR_NAME, DIST_INDEX_FILE_NAME
+from core.dist_index import DistributionIndex, VENV_DIR_NAME
+from core.utils.file_lock import file_lock
 from core.utils.manager_toml import TomlManager
+from core.tracing import measure_call
+from core.unused_depends import (unused_requirements, missing_requirements, top_level_imports, top_level_modules,
+                                 local_modules, split_files_by_package)
+from core.utils.requirements import normalize_name
 from typing import Callable
+from subprocess import CompletedProcess
 import os
-from typing import Generator
-from core.AST.ast_analize import AstImportsManager
-
-
-class ManagerPackages:
-
-    def __init__(self, root_path_in: Path, src_path_in: Path, waiting_subprocess: bool = False):
-        self._root_path = root_path_in
-        self._src_path = src_path_in
-        self._src_local_path = self._src_path.relative_to(self._root_path)
-        self._waiting_subprocess = waiting_subprocess  # ожидание завершения работы suprocess
+import contextvars
+from typing import Generator, TYPE_CHECKING
+
+if TYPE_CHECKING:  # AST сканирование импортируется только при первом обращении к related_files
+    from core.AST.ast_analize import AstImportsManager
+
+
+class ManagerPackages(ManagerBase):
+
+    def __init__(self, root_path_in: Path, src_path_in: Path, waiting_subprocess: bool = False,
+                 scan_workers: int | None = 1, run_cmd_func: Callable[..., CompletedProcess] | None = None,
+                 keep_ast_state: bool = False):
+        super().__init__(root_path_in=root_path_in, src_path_in=src_path_in, waiting_subprocess=waiting_subprocess,
+                         run_cmd_func=run_cmd_func)
+        self._scan_workers = scan_workers  # количество процессов для AST сканирования (None - по числу ядер)
+        # хранить результат AST сканирования между запросами списка пакетов (для долгоживущих процессов)
+        self.keep_ast_state = keep_ast_state
+        # обновлять сохранённое сканирование обходом проекта при каждом запросе (не действует, пока изменения
+        # файлов передаются через ast_update_files, см. ast_watch_attach)
+        self.ast_auto_refresh = True
+        self._ast_watchers = 0  # подключенные наблюдатели: пока они есть, сканирование хранится
+        self._ast_feeders = 0  # из них отслеживающие .py файлы (сами передают изменения через ast_update_files)
+        self._ast_manager: 'AstImportsManager | None' = None
+        self._dist_indexes: dict[Path, DistributionIndex] = {}  # директория окружения -> индекс дистрибутивов
+
+    def _get_ast_manager(self) -> 'AstImportsManager':
+        """AST сканирование проекта: новое, либо обновление сохранённого (разбираются только изменённые файлы)"""
+        from core.AST.ast_analize import AstImportsManager
+
+        if not self.keep_ast_state and not self._ast_watchers:
+            return AstImportsManager(root_path_in=self._root_path, workers=self._scan_workers)
+
+        if self._ast_manager is None:
+            self._ast_manager = AstImportsManager(root_path_in=self._root_path, workers=self._scan_workers)
+        elif self.ast_auto_refresh and not self._ast_feeders:
+            self._ast_manager.refresh()
+        return self._ast_manager
+
+    def ast_watch_attach(self, track_sources: bool):
+        """
+        Подключение наблюдателя (WorkspaceWatcher): сканирование хранится между запросами, а если наблюдатель
+        отслеживает .py файлы - обновляется только через ast_update_files, без обхода проекта на каждый запрос.
+        Настройки менеджера не изменяются, после ast_watch_detach последнего наблюдателя всё работает как прежде.
+        """
+        self._ast_watchers += 1
+        if track_sources:
+            self._ast_feeders += 1
+
+    def ast_watch_detach(self, track_sources: bool):
+        self._ast_watchers -= 1
+        if track_sources:
+            self._ast_feeders -= 1
+        if not self._ast_watchers and not self.keep_ast_state:
+            self._ast_manager = None  # без наблюдателя сохранённое сканирование больше не обновляется
+
+    def _get_dist_index(self, pkg_name: str | None = None, checked: set[Path] | None = None) -> DistributionIndex:
+        """
+        Индекс дистрибутивов окружения пакета: собственное `.venv` пакета, если оно есть,
+        иначе окружение корня (общее для корня и подключенных пакетов). Актуальность индекса проверяется
+        при каждом вызове, а с checked - один раз на окружение.
+
+        :param checked: окружения, уже проверенные в текущем анализе (дополняется)
+        """
+        project_path = self._root_path
+        cache_name = DIST_INDEX_FILE_NAME
+        if pkg_name is not None and (self._src_path / pkg_name / VENV_DIR_NAME).is_dir():
+            project_path = self._src_path / pkg_name
+            cache_name = DIST_INDEX_FILE_NAME.replace('.json', f'.{pkg_name}.json')
+
+        if project_path not in self._dist_indexes:
+            self._dist_indexes[project_path] = DistributionIndex(
+                project_path_in=project_path,
+                cache_path=self._root_path / CACHE_DIR_NAME / cache_name,
+            )
+        dist_index = self._dist_indexes[project_path]
+        if checked is None or project_path not in checked:
+            dist_index.refresh()
+            if checked is not None:
+                checked.add(project_path)
+        return dist_index
 
     def _is_package_installed(self, pckg_name: str) -> bool:
         data = TomlManager(toml_path=self._root_path / TOML_FILE_NAME)
@@ -58,9 +135,11 @@ class ManagerPackages:
         project_path = package_path / 'src' / pkg_name
         project_path.mkdir(exist_ok=True, parents=True)
 
-        # инициализация проекта и uv синхронизация
-        cmd = f'uv init --no-workspace && uv sync'
-        run_cmd(command=cmd, cwd=package_path, waiting_subprocess=self._waiting_subprocess)
+        # инициализация проекта и uv синхронизация (внутри пакетной сессии синхронизация откладывается)
+        cmd = f'uv init --no-workspace' if self.batch is not None else f'uv init --no-workspace && uv sync'
+        with file_lock(package_path / LOCK_FILE_NAME).exclusive():
+            self._run_cmd(command=cmd, cwd=package_path,
+                          waiting_subprocess=self._waiting_subprocess if self.batch is None else True)
 
         # создание файла main.py в package/src/package
         with open(file=package_path_inner_src / 'main.py', mode='w', encoding='utf8') as f:
@@ -85,7 +164,19 @@ class ManagerPackages:
 
         return Status(success=True, message=f'✔ Пакет `{package_path}` создан')
 
-    def packages_get_list(self) -> Generator[Package, Status, Status]:
+    def packages_get_list(self,
+                          filter_packages: set | None = None, filter_exclude: bool = False,
+                          offset: int = 0, limit: int | None = None,
+                          ) -> Generator[Package, Status, Status]:
+        """
+        Список пакетов. Отфильтрованные и пропущенные пакеты стоят только проверки директории и чтения их toml,
+        AST сканирование проекта запускается при первом обращении к related_files любого из пакетов.
+
+        :param filter_packages: названия пакетов (в нижнем регистре) которые нужно получить (или исключить)
+        :param filter_exclude: инверсия filter_packages (указанные пакеты будут исключены)
+        :param offset: сколько подходящих пакетов пропустить
+        :param limit: максимальное количество пакетов (None - без ограничения)
+        """
         if not self._src_path.exists():
             return (
                 Status(
@@ -93,53 +184,80 @@ class ManagerPackages:
                     message=f'⚠ Не найдена директория с пакетами по пути `{self._src_path}`'
                 ))
 
-        ast_manager = AstImportsManager(root_path_in=self._root_path)
+        ast_manager: 'AstImportsManager | None' = None
+
+        def get_related_files(package_path: Path) -> list[Path]:
+            nonlocal ast_manager
+            if ast_manager is None:  # одно сканирование на весь список пакетов
+                ast_manager = self._get_ast_manager()
+            return ast_manager.get_package_relative_files(package_path)
+
+        project_data = TomlManager(self._root_path / TOML_FILE_NAME)
+        counter = 0
 
         for path in self._src_path.iterdir():
+            if limit is not None and counter >= offset + limit:
+                break
+
             if path.is_dir() and (path / TOML_FILE_NAME).exists():
                 package_data = TomlManager(path / TOML_FILE_NAME)
-                project_data = TomlManager(self._root_path / TOML_FILE_NAME)
-
-                package = Package(
-                    name=package_data.name,
-                    dependencies=package_data.depends,
-                    local_path=self._src_path / package_data.name,
-
-                    is_installed=project_data.is_package_in_workspaces(
-                        package=str(self._src_local_path / package_data.name)),
-
-                    connect=Command(
-                        cmd=self.make_packages_connect_func(pkg_name=package_data.name),
-                        description='подключить пакет',
-                        parametrs=(),
-                    ),
-                    disconnect=Command(
-                        cmd=self.make_packages_disconnect_func(pkg_name=package_data.name),
-                        description='отключить пакет',
-                        parametrs=(),
-                    ),
-                    depends_add=Command(
-                        cmd=self.make_depends_add(pkg_name=package_data.name),
-                        description='установить depends в пакет',
-                        parametrs=('Устанавливаемые зависимости через пробел',),
-                    ),
-
-                    depends_remove=Command(
-                        description='удалить depends из пакета',
-                        cmd=self.make_depends_remove(pkg_name=package_data.name),
-                        parametrs=('удаляемые зависимости через пробел',),
-                    ),
-
-                    related_files=ast_manager.get_package_relative_files(self._src_path / package_data.name),
-                )
 
-                yield package
+                if filter_packages is not None and (package_data.name in filter_packages) == filter_exclude:
+                    continue
+
+                counter += 1
+                if counter <= offset:
+                    continue
+
+                yield self._make_package(
+                    package_data=package_data,
+                    project_data=project_data,
+                    related_files_func=get_related_files,
+                )
 
         return (Status(
             success=True,
             message=f'✔ Информация о пакетах получена.'
         ))
 
+    def _make_package(self, package_data: TomlManager, project_data: TomlManager,
+                      related_files_func: Callable[[Path], list[Path]]) -> Package:
+        return Package(
+            name=package_data.name,
+            dependencies=package_data.depends,
+            local_path=self._src_path / package_data.name,
+
+            is_installed=project_data.is_package_in_workspaces(
+                package=str(self._src_local_path / package_data.name)),
+
+            commands_owner=self,
+            related_files_loader=related_files_func,
+        )
+
+    def package_get(self, package_dir: Path) -> Package | None:
+        """
+        Один пакет по его директории (None - директория не является пакетом).
+        related_files вычисляются по сохранённому AST сканированию (см. keep_ast_state, ast_watch_attach).
+        """
+        if not package_dir.is_dir() or not (package_dir / TOML_FILE_NAME).exists():
+            return None
+        return self._make_package(
+            package_data=TomlManager(package_dir / TOML_FILE_NAME),
+            project_data=TomlManager(self._root_path / TOML_FILE_NAME),
+            related_files_func=lambda package_path: self._get_ast_manager().get_package_relative_files(package_path),
+        )
+
+    def ast_update_files(self, changed: list[Path], removed: list[Path]) -> bool:
+        """
+        Точечное обновление сохранённого AST сканирования по известным изменённым и удалённым файлам
+        (например из WorkspaceWatcher). Если сканирования ещё не было - ничего не делает.
+
+        :return: изменились ли импорты
+        """
+        if self._ast_manager is None:
+            return False
+        return self._ast_manager.update_files(changed=changed, removed=removed)
+
     def make_packages_connect_func(self, pkg_name: str) -> Callable[[], Status]:
         def func() -> Status:
             toml_session = TomlManager(self._root_path / TOML_FILE_NAME)
@@ -151,8 +269,7 @@ class ManagerPackages:
                 )
 
             try:
-                cmd = f"uv add {self._src_local_path / pkg_name}"
-                run_cmd(command=cmd, cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
+                self._run_uv(args=f'add {cmd_quote(str(self._src_local_path / pkg_name))}', cwd=self._root_path)
 
                 # проверить что пакет был подключен
                 toml_session = TomlManager(self._root_path / TOML_FILE_NAME)
@@ -173,7 +290,7 @@ class ManagerPackages:
                     message=f'⚠ Пакет `{self._src_path / pkg_name}` не подключен. Ошибка: {err}'
                 )
 
-        return lambda: func()
+        return self._toml_locked(self._root_path / TOML_FILE_NAME, func)
 
     def make_packages_disconnect_func(self, pkg_name: str) -> Callable[[], Status]:
         def func():
@@ -191,15 +308,148 @@ class ManagerPackages:
             toml_session.sources_remove(depend=pkg_name)
             toml_session.write_toml()
 
-            run_cmd(command=f'uv remove {pkg_name}', cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
-            run_cmd(command='uv sync', cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
+            self._run_uv(args=f'remove {cmd_quote(pkg_name)}', cwd=self._root_path)
+            self._sync_root()
 
             return Status(
                 success=True,
                 message=f'✔ Пакет `{self._src_local_path / pkg_name}` отключен.'
             )
 
-        return lambda: func()
+        return self._toml_locked(self._root_path / TOML_FILE_NAME, func)
+
+    @root_toml_locked
+    def packages_connect_levels(self, levels: list[list[str]]) -> list[Status]:
+        """
+        Подключение пакетов по топологическим уровням (см. DependencyGraph.levels): один `uv add` на уровень
+        со всеми ещё не подключенными пакетами уровня. Уровни подключаются по очереди - к моменту разрешения
+        пакета все пакеты workspace, от которых он зависит, уже подключены.
+        Параллельно уровни не выполняются: все вызовы изменяют pyproject.toml и uv.lock корня.
+
+        :param levels: названия пакетов по уровням
+        """
+        status_list = []
+        for level in levels:
+            toml_session = TomlManager(self._root_path / TOML_FILE_NAME)
+            pending = []
+            for pkg_name in level:
+                if toml_session.is_package_in_workspaces(package=pkg_name) and \
+                        toml_session.is_package_in_dependencies(package=pkg_name):
+                    status_list.append(Status(
+                        success=False,
+                        message=f'⚠ Пакет `{self._src_local_path / pkg_name}` уже подключен.'
+                    ))
+                else:
+                    pending.append(pkg_name)
+            if not pending:
+                continue
+
+            try:
+                paths = ' '.join(cmd_quote(str(self._src_local_path / pkg_name)) for pkg_name in pending)
+                self._run_uv(args=f'add {paths}', cwd=self._root_path)
+            except Exception as err:
+                status_list += [Status(
+                    success=False,
+                    message=f'⚠ Пакет `{self._src_path / pkg_name}` не подключен. Ошибка: {err}'
+                ) for pkg_name in pending]
+                continue
+
+            # проверить что пакеты были подключены
+            toml_session = TomlManager(self._root_path / TOML_FILE_NAME)
+            for pkg_name in pending:
+                if not toml_session.is_package_in_workspaces(package=pkg_name):
+                    status_list.append(Status(
+                        success=False,
+                        message=f'⚠ Пакет `{self._src_local_path / pkg_name}` не был подключен.'
+                    ))
+                else:
+                    status_list.append(Status(
+                        success=True,
+                        message=f'✔ Пакет `{self._src_path / pkg_name}` подключен.'
+                    ))
+
+        return status_list
+
+    @root_toml_locked
+    def packages_connect_toml(self, pkg_names: list[str], finalize: str | None = None) -> list[Status]:
+        """
+        Подключение пакетов без `uv add`: в pyproject.toml корня за одну запись добавляются
+        project.dependencies, tool.uv.workspace.members и tool.uv.sources.
+
+        :param pkg_names: названия пакетов
+        :param finalize: вызов uv после записи: None - не вызывать, 'lock' - `uv lock`, 'sync' - `uv sync`
+        """
+        toml_session = TomlManager(self._root_path / TOML_FILE_NAME)
+        status_list = []
+        for pkg_name in pkg_names:
+            if toml_session.is_package_in_workspaces(package=pkg_name):
+                status_list.append(Status(
+                    success=False,
+                    message=f'⚠ Пакет `{self._src_local_path / pkg_name}` уже подключен.'
+                ))
+                continue
+
+            toml_session.workspaces_add((self._src_local_path / pkg_name).as_posix())
+            toml_session.workspace_depends_add(pkg_name)
+            toml_session.sources_add(pkg_name)
+            status_list.append(Status(
+                success=True,
+                message=f'✔ Пакет `{self._src_path / pkg_name}` подключен.'
+            ))
+
+        return self._toml_engine_finish(toml_session=toml_session, status_list=status_list, finalize=finalize)
+
+    @root_toml_locked
+    def packages_disconnect_toml(self, pkg_names: list[str], finalize: str | None = None) -> list[Status]:
+        """
+        Отключение пакетов без `uv remove`: из pyproject.toml корня за одну запись удаляются
+        project.dependencies, tool.uv.workspace.members и tool.uv.sources пакетов.
+
+        :param pkg_names: названия пакетов
+        :param finalize: вызов uv после записи: None - не вызывать, 'lock' - `uv lock`, 'sync' - `uv sync`
+        """
+        toml_session = TomlManager(self._root_path / TOML_FILE_NAME)
+        status_list = []
+        for pkg_name in pkg_names:
+            if not toml_session.is_package_in_workspaces(package=pkg_name):
+                status_list.append(Status(
+                    success=False,
+                    message=f'⚠ Пакет `{self._src_local_path / pkg_name}` отсутствует в списке подключенных.'
+                ))
+                continue
+
+            toml_session.depends_remove(depend=pkg_name)
+            toml_session.workspaces_remove(depend=pkg_name)
+            toml_session.sources_remove(depend=pkg_name)
+            status_list.append(Status(
+                success=True,
+                message=f'✔ Пакет `{self._src_local_path / pkg_name}` отключен.'
+            ))
+
+        return self._toml_engine_finish(toml_session=toml_session, status_list=status_list, finalize=finalize)
+
+    def _toml_engine_finish(self, toml_session: TomlManager, status_list: list[Status],
+                            finalize: str | None) -> list[Status]:
+        if not any(status.success for status in status_list):
+            return status_list  # изменений нет - запись и вызов uv не нужны
+
+        toml_session.write_toml()
+
+        if finalize is None:
+            return status_list
+
+        if self.batch is not None:  # внутри пакетной сессии lock и sync выполнятся при её завершении
+            self.batch.defer(self._root_path)
+            return status_list
+
+        with self._uv_lock(self._root_path).exclusive():
+            res = self._run_cmd(command=f'uv {finalize}', cwd=self._root_path, waiting_subprocess=True)
+        if res.returncode != 0:
+            status_list.append(Status(
+                success=False,
+                message=f'⚠ pyproject.toml изменён, но `uv {finalize}` завершился с ошибкой: {res.stdout} {res.stderr}'
+            ))
+        return status_list
 
     def make_depends_add(self, pkg_name: str) -> Callable[[str], Status]:
         def func(depend):
@@ -211,9 +461,8 @@ class ManagerPackages:
                     message=f'⚠ Зависимость `{depend}` уже есть в пакете `{self._src_local_path / pkg_name}`.'
                 )
 
-            run_cmd(command=f'uv add {depend}', cwd=self._src_path / pkg_name,
-                    waiting_subprocess=self._waiting_subprocess)
-            run_cmd(command='uv sync', cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
+            self._run_uv(args=f'add {cmd_quote(depend)}', cwd=self._src_path / pkg_name)
+            self._sync_root()
 
             # проверка что зависимость действительно была удалена
             toml_session = TomlManager(toml_path=self._src_path / pkg_name / TOML_FILE_NAME)
@@ -228,7 +477,7 @@ class ManagerPackages:
                 message=f'✔ Зависимость `{depend}` была добавлена в пакет `{self._src_local_path / pkg_name}`'
             )
 
-        return lambda depend: func(depend)
+        return self._toml_locked(self._src_path / pkg_name / TOML_FILE_NAME, func)
 
     def make_depends_remove(self, pkg_name: str) -> Callable[[str], Status]:
         def func(depend):
@@ -240,9 +489,8 @@ class ManagerPackages:
                     message=f'⚠ Зависимости `{depend}` нет в пакете `{self._src_local_path / pkg_name}`.'
                 )
 
-            run_cmd(command=f'uv remove {depend}', cwd=self._src_path / pkg_name,
-                    waiting_subprocess=self._waiting_subprocess)
-            run_cmd(command='uv sync', cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
+            self._run_uv(args=f'remove {cmd_quote(depend)}', cwd=self._src_path / pkg_name)
+            self._sync_root()
 
             # проверка что зависимость действительно была удалена
             toml_session = TomlManager(toml_path=self._src_path / pkg_name / TOML_FILE_NAME)
@@ -257,7 +505,185 @@ class ManagerPackages:
                 message=f'✔ Зависимость `{depend}` была удалена из пакета `{self._src_local_path / pkg_name}`'
             )
 
-        return lambda depend: func(depend)
+        return self._toml_locked(self._src_path / pkg_name / TOML_FILE_NAME, func)
+
+    def packages_depends_apply(self, matrix: dict[str, DependsChange], workers: int = 4,
+                               sync: bool = True) -> list[Status]:
+        """
+        Применение зависимостей к множеству пакетов за один проход: на пакет выполняется один
+        `uv add a b c --no-sync` и один `uv remove x y --no-sync`, в конце один `uv sync` в корне проекта.
+        Пакеты, не подключенные к workspace (со своим lock файлом), обрабатываются параллельно,
+        подключенные - последовательно, так как они делят общий uv.lock корня.
+
+        :param matrix: {название пакета: DependsChange(add={...}, remove={...})}
+        :param workers: количество параллельно обрабатываемых пакетов
+        :param sync: выполнить `uv sync` корня в конце (False - синхронизирует вызывающий код)
+        :return: статусы по каждой паре пакет / зависимость
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        status_list = []
+        tasks = {}  # пакет -> (добавляемые, удаляемые)
+        project_data = TomlManager(self._root_path / TOML_FILE_NAME)
+
+        for pkg_name, change in matrix.items():
+            toml_path = self._src_path / pkg_name / TOML_FILE_NAME
+            if not toml_path.exists():
+                status_list.append(Status(
+                    success=False,
+                    message=f'⚠ Пакет `{pkg_name}` не существует, либо в нем отсутствует pyproject.toml. Используйте package_create(package="{pkg_name}").'
+                ))
+                continue
+
+            # отсев зависимостей, которые уже есть (или которых нет) в пакете, чтобы не делать лишнюю работу
+            toml_session = TomlManager(toml_path=toml_path)
+            depends_add, depends_remove = [], []
+            for depend in sorted(change.add):
+                if toml_session.is_package_in_dependencies(package=depend):
+                    status_list.append(Status(
+                        success=False,
+                        message=f'⚠ Зависимость `{depend}` уже есть в пакете `{self._src_local_path / pkg_name}`.'
+                    ))
+                else:
+                    depends_add.append(depend)
+
+            for depend in sorted(change.remove):
+                if not toml_session.is_package_in_dependencies(package=depend):
+                    status_list.append(Status(
+                        success=False,
+                        message=f'⚠ Зависимости `{depend}` нет в пакете `{self._src_local_path / pkg_name}`.'
+                    ))
+                else:
+                    depends_remove.append(depend)
+
+            if depends_add or depends_remove:
+                tasks[pkg_name] = (depends_add, depends_remove)
+
+        if not tasks:
+            return status_list
+
+        def apply(pkg_name: str) -> list[Status]:
+            depends_add, depends_remove = tasks[pkg_name]
+            package_path = self._src_path / pkg_name
+            if depends_add:
+                self._run_uv(args=f'add {" ".join(cmd_quote(d) for d in depends_add)}', cwd=package_path, no_sync=True)
+            if depends_remove:
+                self._run_uv(args=f'remove {" ".join(cmd_quote(d) for d in depends_remove)}', cwd=package_path,
+                             no_sync=True)
+
+            # проверка что зависимости действительно были добавлены / удалены
+            toml_session = TomlManager(toml_path=package_path / TOML_FILE_NAME)
+            statuses = []
+            for depend in depends_add:
+                if toml_session.is_package_in_dependencies(package=depend):
+                    statuses.append(Status(
+                        success=True,
+                        message=f'✔ Зависимость `{depend}` была добавлена в пакет `{self._src_local_path / pkg_name}`'
+                    ))
+                else:
+                    statuses.append(Status(
+                        success=False,
+                        message=f'⚠ Зависимость `{depend}` не была добавлена в пакет `{self._src_local_path / pkg_name}`, ошибка subprocess'
+                    ))
+            for depend in depends_remove:
+                if not toml_session.is_package_in_dependencies(package=depend):
+                    statuses.append(Status(
+                        success=True,
+                        message=f'✔ Зависимость `{depend}` была удалена из пакета `{self._src_local_path / pkg_name}`'
+                    ))
+                else:
+                    statuses.append(Status(
+                        success=False,
+                        message=f'⚠ Зависимости `{depend}` не была удалена из пакета `{self._src_local_path / pkg_name}` ошибка subprocess.'
+                    ))
+            return statuses
+
+        # подключенные к workspace пакеты меняют общий uv.lock корня, их нельзя обрабатывать одновременно
+        shared_lock = [p for p in tasks if project_data.is_package_in_workspaces(package=str(self._src_local_path / p))]
+        standalone = [p for p in tasks if p not in shared_lock]
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            # контекст копируется в потоки, чтобы процессы учитывались в текущей операции (см. core.tracing)
+            futures = [
+                executor.submit(contextvars.copy_context().run, measure_call, 'packages.depends_apply_package',
+                                apply, pkg_name)
+                for pkg_name in standalone
+            ]
+            for pkg_name in shared_lock:
+                status_list.extend(measure_call('packages.depends_apply_package', apply, pkg_name))
+            for future in futures:
+                status_list.extend(future.result())
+
+        if sync:
+            self._sync_root()
+        return status_list
+
+    def packages_depends_unused(self, ignore: set[str] | None = None) -> UnusedDepends:
+        """
+        Зависимости корня и пакетов, которые объявлены в project.dependencies, но нигде не импортируются.
+        Для пакета проверяются импорты файлов пакета, для корня - файлов вне директории src
+        (подключенные пакеты workspace в зависимостях корня не проверяются).
+        Соответствие дистрибутива и модуля определяется эвристикой (см. core.unused_depends.import_names).
+
+        :param ignore: дистрибутивы, которые не проверяются (например инструменты без импортов)
+        """
+        ast_manager = self._get_ast_manager()
+        package_dirs = [path.name for path in self._src_path.iterdir()
+                        if (path / TOML_FILE_NAME).exists()] if self._src_path.exists() else []
+        root_files, package_files = split_files_by_package(files=ast_manager.imports, src_path=self._src_path,
+                                                           package_names=package_dirs)
+
+        checked_envs: set[Path] = set()  # индексы дистрибутивов проверяются один раз на анализ
+        project_data = TomlManager(self._root_path / TOML_FILE_NAME)
+        result = UnusedDepends(root=unused_requirements(
+            declared=project_data.depends,
+            imported=top_level_imports(ast_manager.imports, root_files),
+            ignore=ignore,
+            dist_index=self._get_dist_index(checked=checked_envs),
+        ))
+        for pkg_name in sorted(package_dirs):
+            unused = unused_requirements(
+                declared=TomlManager(self._src_path / pkg_name / TOML_FILE_NAME).depends,
+                imported=top_level_imports(ast_manager.imports, package_files[pkg_name]),
+                ignore=ignore,
+                dist_index=self._get_dist_index(pkg_name, checked=checked_envs),
+            )
+            if unused:
+                result.packages[pkg_name] = unused
+        return result
+
+    def packages_depends_missing(self) -> MissingDepends:
+        """
+        Сторонние модули, которые импортируются в корне или пакетах, но не покрыты их project.dependencies.
+        Не учитываются стандартная библиотека, модули самой области (пакета или корня) и пакеты workspace.
+        Дистрибутив для модуля определяется по индексу установленных дистрибутивов (см. DistributionIndex).
+        """
+        ast_manager = self._get_ast_manager()
+        package_dirs = [path.name for path in self._src_path.iterdir()
+                        if (path / TOML_FILE_NAME).exists()] if self._src_path.exists() else []
+        root_files, package_files = split_files_by_package(files=ast_manager.imports, src_path=self._src_path,
+                                                           package_names=package_dirs)
+        workspace_packages = {normalize_name(pkg_name) for pkg_name in package_dirs}
+
+        checked_envs: set[Path] = set()  # индексы дистрибутивов проверяются один раз на анализ
+        project_data = TomlManager(self._root_path / TOML_FILE_NAME)
+        result = MissingDepends(root=missing_requirements(
+            modules=top_level_modules(ast_manager.imports, root_files),
+            declared=project_data.depends,
+            local=local_modules(root_files, self._root_path) | workspace_packages,
+            dist_index=self._get_dist_index(checked=checked_envs),
+        ))
+        for pkg_name in sorted(package_dirs):
+            files = package_files[pkg_name]
+            missing = missing_requirements(
+                modules=top_level_modules(ast_manager.imports, files),
+                declared=TomlManager(self._src_path / pkg_name / TOML_FILE_NAME).depends,
+                local=local_modules(files, self._src_path / pkg_name) | workspace_packages,
+                dist_index=self._get_dist_index(pkg_name, checked=checked_envs),
+            )
+            if missing:
+                result.packages[pkg_name] = missing
+        return result
 
 
 if __name__ == '__main__':
@@ -1,35 +1,33 @@
 from pathlib import Path
-from core.commons import run_cmd
+from core.commons import cmd_quote
+from core.manager_base import ManagerBase, root_toml_locked
 from core.utils.manager_toml import TomlManager
 from core.models import Status, ProjectInfo
 from core.constants import TOML_FILE_NAME
+from core.utils.file_lock import file_lock
+from core.utils.uv_probe import probe_uv
 
 
-class ManagerProject:
-
-    def __init__(self, root_path_in: Path, src_path_in: Path, waiting_subprocess: bool = False):
-        self._root_path = root_path_in
-        self._src_path = src_path_in
-        self._src_local_path = self._src_path.relative_to(self._root_path)
-        self._waiting_subprocess = waiting_subprocess  # ожидание завершения работы suprocess
+class ManagerProject(ManagerBase):
 
     def project_init(self) -> Status:
-        cmd = "uv --version"
-        res = run_cmd(
-            command=cmd,
-            cwd=self._root_path,
-            waiting_subprocess=True
-        )
+        # результат `uv --version` кешируется по исполняемому файлу uv (см. probe_uv)
+        res = probe_uv(run_cmd_func=self._run_cmd, cwd=self._root_path)
         if res.returncode != 0:
             raise RuntimeError(f'❌ Системная ошибка,(скорее всего не найден uv): {res.stdout} {res.stderr}')
 
         if not (self._root_path / TOML_FILE_NAME).exists():
-            cmd = "uv init && uv sync"
-            res = run_cmd(command=cmd, cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
-            if res.returncode != 0:
-                return Status(success=False, message=f'⚠ Проект не был инициализирован: {res.stdout} {res.stderr}')
+            # повторная проверка под блокировкой: проект мог инициализировать параллельный процесс
+            with file_lock(self._root_path / TOML_FILE_NAME).exclusive(), self._uv_lock(self._root_path).exclusive():
+                if not (self._root_path / TOML_FILE_NAME).exists():
+                    cmd = "uv init && uv sync"
+                    res = self._run_cmd(command=cmd, cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
+                    if res.returncode != 0:
+                        return Status(success=False,
+                                      message=f'⚠ Проект не был инициализирован: {res.stdout} {res.stderr}')
         return Status(success=True, message='✔ Проект инициализирован')
 
+    @root_toml_locked
     def project_depend_add(self, depend: str) -> Status:
         """
         Подключение зависимостей например "uv add requests"
@@ -45,8 +43,7 @@ class ManagerProject:
                 message=f'⚠ Зависимость `{depend}` не была установлена так как уже существует.'
             )
 
-        cmd = f"uv add {depend}"
-        res = run_cmd(command=cmd, cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
+        res = self._run_uv(args=f'add {cmd_quote(depend)}', cwd=self._root_path)
         if res.returncode != 0:
             return Status(
                 success=False,
@@ -58,6 +55,7 @@ class ManagerProject:
             message=f'✔ Зависимость `{depend}` была установлена в корень проекта.'
         )
 
+    @root_toml_locked
     def project_depend_remove(self, depend: str) -> Status:
         """
         Отключение зависимостей например "uv add requests"
@@ -72,8 +70,7 @@ class ManagerProject:
                 message=f'⚠ Зависимость `{depend}` не была удалена так как отсутствует в проекте.'
             )
 
-        cmd = f"uv remove {depend}"
-        res = run_cmd(command=cmd, cwd=self._root_path, waiting_subprocess=self._waiting_subprocess)
+        res = self._run_uv(args=f'remove {cmd_quote(depend)}', cwd=self._root_path)
         if res.returncode != 0:
             return Status(
                 success=False,
@@ -85,6 +82,81 @@ class ManagerProject:
             message=f'✔ Зависимость `{depend}` была удалена из корня проекта.'
         )
 
+    @root_toml_locked
+    def project_depends_add_many(self, depends: list[str], no_sync: bool = False) -> list[Status]:
+        """
+        Установка нескольких зависимостей в корень одним `uv add a b c`
+
+        :param depends: зависимости в виде строк например "python-dotenv"
+        :param no_sync: не синхронизировать окружение (--no-sync), например если синхронизация будет выполнена отдельно
+        """
+        toml_session = TomlManager(toml_path=self._root_path / TOML_FILE_NAME)
+        status_list, pending = [], []
+        for depend in depends:
+            if toml_session.is_package_in_dependencies(package=depend):
+                status_list.append(Status(
+                    success=False,
+                    message=f'⚠ Зависимость `{depend}` не была установлена так как уже существует.'
+                ))
+            else:
+                pending.append(depend)
+        if not pending:
+            return status_list
+
+        res = self._run_uv(args=f'add {" ".join(cmd_quote(d) for d in pending)}', cwd=self._root_path,
+                           no_sync=no_sync)
+        if res.returncode != 0:
+            return status_list + [Status(
+                success=False,
+                message=f'⚠ Зависимость `{depend}` не была установлена: {res.stdout} {res.stderr}'
+            ) for depend in pending]
+
+        return status_list + [Status(
+            success=True,
+            message=f'✔ Зависимость `{depend}` была установлена в корень проекта.'
+        ) for depend in pending]
+
+    @root_toml_locked
+    def project_depends_remove_many(self, depends: list[str], no_sync: bool = False) -> list[Status]:
+        """
+        Удаление нескольких зависимостей корня одним `uv remove a b c`
+
+        :param depends: названия зависимостей (без версий)
+        :param no_sync: не синхронизировать окружение (--no-sync), например если синхронизация будет выполнена отдельно
+        """
+        toml_session = TomlManager(toml_path=self._root_path / TOML_FILE_NAME)
+        status_list, pending = [], []
+        for depend in depends:
+            if toml_session.is_package_in_dependencies(package=depend):
+                pending.append(depend)
+            else:
+                status_list.append(Status(
+                    success=False,
+                    message=f'⚠ Зависимость `{depend}` не была удалена так как отсутствует в проекте.'
+                ))
+        if not pending:
+            return status_list
+
+        res = self._run_uv(args=f'remove {" ".join(cmd_quote(d) for d in pending)}', cwd=self._root_path,
+                           no_sync=no_sync)
+        if res.returncode != 0:
+            return status_list + [Status(
+                success=False,
+                message=f'⚠ Зависимость `{depend}` не была удалена: {res.stdout} {res.stderr}'
+            ) for depend in pending]
+
+        return status_list + [Status(
+            success=True,
+            message=f'✔ Зависимость `{depend}` была удалена из корня проекта.'
+        ) for depend in pending]
+
+    def project_sync(self) -> Status:
+        """`uv sync` в корне проекта (внутри пакетной сессии откладывается до её завершения)"""
+        res = self._sync_root()
+        if res is not None and res.returncode != 0:
+            return Status(success=False, message=f'⚠ Ошибка `uv sync`: {res.stdout} {res.stderr}')
+        return Status(success=True, message='✔ Окружение проекта синхронизировано.')
+
     def project_get_info(self) -> tuple[Status, ProjectInfo | None]:
         # очистить workspace в toml после создания пакета
         try:
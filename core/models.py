@@ -3,11 +3,23 @@ from typing import Any
 from pathlib import Path
 
 
+@dataclass
+class SubprocessRecord:
+    """Запущенный процесс (команда uv) и время его выполнения в секундах"""
+    command: str
+    cwd: str
+    returncode: int
+    elapsed: float
+
+
 @dataclass
 class Status:
     success: bool
     message: str | None = None
     data: Any = None
+    # время операции, в которой получен статус (секунды), и запущенные в ней процессы (см. core.tracing)
+    elapsed: float | None = field(default=None, compare=False)
+    subprocesses: list[SubprocessRecord] | None = field(default=None, compare=False)
 
     def __str__(self):
         return f"status: {self.success} | message: {self.message}"
@@ -28,6 +40,38 @@ class ProjectInfo:
 from typing import Callable
 
 
+@dataclass
+class DependsChange:
+    """Изменение зависимостей одного пакета (для пакетного применения зависимостей к множеству пакетов)"""
+    add: set[str] = field(default_factory=set)
+    remove: set[str] = field(default_factory=set)
+
+
+@dataclass
+class UnusedDepends:
+    """Объявленные в project.dependencies, но нигде не импортируемые зависимости (названия для `uv remove`)"""
+    root: list[str] = field(default_factory=list)
+    packages: dict[str, list[str]] = field(default_factory=dict)  # только пакеты с неиспользуемыми зависимостями
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.root and not self.packages
+
+
+@dataclass
+class MissingDepends:
+    """
+    Импортируемые сторонние модули, не покрытые зависимостями: {модуль: дистрибутив для `uv add`},
+    None - дистрибутив не определён (не устанавливается автоматически)
+    """
+    root: dict[str, str | None] = field(default_factory=dict)
+    packages: dict[str, dict[str, str | None]] = field(default_factory=dict)  # только пакеты с недостающими
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.root and not self.packages
+
+
 @dataclass
 class Command:
     description: str
@@ -39,20 +83,62 @@ class Command:
         return f"name : {self.description} | parameters : {self.parametrs}"
 
 
-@dataclass
+class CommandBinding:
+    """
+    Команда пакета, общая для класса Package: описание хранится один раз, а Command с функцией конкретного пакета
+    создаётся при обращении `package.connect` фабрикой менеджера пакетов (например make_packages_connect_func).
+    """
+    __slots__ = ('description', 'parametrs', '_factory_name')
+
+    def __init__(self, description: str, parametrs: tuple, factory_name: str):
+        self.description = description
+        self.parametrs = parametrs
+        self._factory_name = factory_name
+
+    def __get__(self, instance: 'Package | None', owner) -> 'Command | CommandBinding':
+        if instance is None:
+            return self
+        if instance.commands_owner is None:
+            raise AttributeError(f'Пакет `{instance.name}` создан без менеджера пакетов, команды недоступны')
+        factory = getattr(instance.commands_owner, self._factory_name)
+        return Command(description=self.description, parametrs=self.parametrs, cmd=factory(pkg_name=instance.name))
+
+
+@dataclass(slots=True)
 class Package:
     name: str
     local_path: Path
     is_installed: bool
     dependencies: list[str]
-    connect: Command
-    disconnect: Command
-    depends_add: Command
-    depends_remove: Command
-
-    # is_depends_in_package: Command
-    # is_depends_workspace: Command
-    related_files: list[Path] = field(default_factory=list)  # заполняется во внешнем модуле
+
+    # менеджер пакетов, фабрики которого создают команды пакета (см. CommandBinding)
+    commands_owner: Any = field(default=None, repr=False, compare=False)
+    # связанные файлы требуют AST сканирования всего проекта, поэтому вычисляются при первом обращении к related_files
+    # (функция общая для всех пакетов одного списка и получает путь пакета)
+    related_files_loader: Callable[[Path], list[Path]] | None = field(default=None, repr=False, compare=False)
+    _related_files: list[Path] | None = field(default=None, init=False, repr=False, compare=False)
+
+    connect = CommandBinding('подключить пакет', (), 'make_packages_connect_func')
+    disconnect = CommandBinding('отключить пакет', (), 'make_packages_disconnect_func')
+    depends_add = CommandBinding('установить depends в пакет', ('Устанавливаемые зависимости через пробел',),
+                                 'make_depends_add')
+    depends_remove = CommandBinding('удалить depends из пакета', ('удаляемые зависимости через пробел',),
+                                    'make_depends_remove')
+
+    @property
+    def related_files(self) -> list[Path]:
+        if self._related_files is None:
+            loader = self.related_files_loader
+            self._related_files = loader(self.local_path) if loader is not None else []
+        return self._related_files
+
+    @related_files.setter
+    def related_files(self, value: list[Path]):  # заполнение во внешнем модуле
+        self._related_files = value
+
+    def invalidate_related_files(self):
+        """Сбросить вычисленные related_files (при следующем обращении они будут получены заново)"""
+        self._related_files = None
 
     def __str__(self):
         return f"name : {self.name} | is_installed : {self.is_installed} | dependencies : {self.dependencies}"
@@ -0,0 +1,56 @@
+import dataclasses
+from pathlib import Path
+from typing import Any
+
+from core.models import Status, Package
+
+
+def package_to_data(package: Package, related_files: bool = False) -> dict:
+    """
+    Пакет в виде словаря для JSON. Команды пакета не сериализуются,
+    related_files включаются только по запросу (требуют AST сканирования проекта).
+    """
+    data = {
+        'name': package.name,
+        'local_path': str(package.local_path),
+        'is_installed': package.is_installed,
+        'dependencies': list(package.dependencies),
+    }
+    if related_files:
+        data['related_files'] = [str(file) for file in package.related_files]
+    return data
+
+
+def to_json_data(obj: Any, related_files: bool = False) -> Any:
+    """
+    Преобразование результатов WorkspaceClerk (Status, ProjectInfo, Package, списки и кортежи из них)
+    в данные, пригодные для json.dumps.
+
+    :param related_files: включать related_files пакетов
+    """
+    if obj is None or isinstance(obj, (bool, int, float, str)):
+        return obj
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, Package):
+        return package_to_data(obj, related_files=related_files)
+    if isinstance(obj, Status):
+        return {
+            'success': obj.success,
+            'message': obj.message,
+            'data': to_json_data(obj.data, related_files=related_files),
+            'elapsed': obj.elapsed,
+            'subprocesses': to_json_data(obj.subprocesses),
+        }
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {
+            field.name: to_json_data(getattr(obj, field.name), related_files=related_files)
+            for field in dataclasses.fields(obj)
+        }
+    if isinstance(obj, dict):
+        return {str(key): to_json_data(value, related_files=related_files) for key, value in obj.items()}
+    if isinstance(obj, (set, frozenset)):
+        return sorted(to_json_data(item, related_files=related_files) for item in obj)
+    if isinstance(obj, (list, tuple)):
+        return [to_json_data(item, related_files=related_files) for item in obj]
+    return str(obj)
@@ -0,0 +1,277 @@
+"""
+Трассировка WorkspaceClerk: вложенные интервалы (spans) с длительностью вокруг команд uv, чтения / записи toml,
+AST сканирования и публичных методов WorkspaceClerk, экспорт в JSON строки и в формат Chrome trace events
+(chrome://tracing, https://ui.perfetto.dev).
+
+    from core import tracing
+    tracing.enable()
+    clerk.packages_connect({'app1'})
+    tracing.export_chrome(Path('trace.json'))
+
+Пока трассировка выключена, span() возвращает общий пустой объект и ничего не записывает.
+Трассировку можно включить переменной окружения WORKSPACECLERK_TRACE=<файл>: интервалы пишутся в файл
+при завершении процесса (.json - формат Chrome, иначе JSON строки).
+
+Независимо от трассировки, операции (см. operation) заполняют у возвращаемых Status время выполнения
+и список запущенных процессов.
+"""
+import atexit
+import functools
+import inspect
+import itertools
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Callable
+
+from core.models import Status, SubprocessRecord
+
+_enabled = False
+_spans: list['SpanRecord'] = []
+_spans_lock = threading.Lock()
+_span_ids = itertools.count(1)
+
+_current_span: ContextVar[int | None] = ContextVar('workspaceclerk_span', default=None)
+# процессы текущей операции (operation / measure_call), None - вне операции
+_current_records: ContextVar[list[SubprocessRecord] | None] = ContextVar('workspaceclerk_records', default=None)
+
+
+@dataclass
+class SpanRecord:
+    name: str
+    span_id: int
+    parent_id: int | None
+    start_ns: int  # time.perf_counter_ns
+    duration_ns: int
+    thread_id: int
+    attrs: dict = field(default_factory=dict)
+    error: str | None = None  # тип исключения, если интервал завершился исключением
+
+
+class _Span:
+    __slots__ = ('_name', '_attrs', '_span_id', '_parent_id', '_start_ns', '_token')
+
+    def __init__(self, name: str, attrs: dict):
+        self._name = name
+        self._attrs = attrs
+
+    def __enter__(self) -> '_Span':
+        self._span_id = next(_span_ids)
+        self._parent_id = _current_span.get()
+        self._token = _current_span.set(self._span_id)
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def set(self, **attrs):
+        """Атрибуты, известные только в процессе выполнения (например код возврата)"""
+        self._attrs.update(attrs)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration_ns = time.perf_counter_ns() - self._start_ns
+        _current_span.reset(self._token)
+        record = SpanRecord(
+            name=self._name,
+            span_id=self._span_id,
+            parent_id=self._parent_id,
+            start_ns=self._start_ns,
+            duration_ns=duration_ns,
+            thread_id=threading.get_ident(),
+            attrs=self._attrs,
+            error=exc_type.__name__ if exc_type is not None else None,
+        )
+        with _spans_lock:
+            _spans.append(record)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def set(self, **attrs):
+        pass
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **attrs) -> _Span | _NoopSpan:
+    """Интервал трассировки: `with span('toml.read', path=...):`"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return _Span(name, attrs)
+
+
+def enable(clear: bool = True):
+    global _enabled
+    if clear:
+        clear_spans()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def clear_spans():
+    with _spans_lock:
+        _spans.clear()
+
+
+def get_spans() -> list[SpanRecord]:
+    with _spans_lock:
+        return list(_spans)
+
+
+# ---------- операции: время и процессы в Status ----------
+
+def record_subprocess(record: SubprocessRecord):
+    records = _current_records.get()
+    if records is not None:
+        records.append(record)
+
+
+def traced_runner(run_cmd_func: Callable[..., Any]) -> Callable[..., Any]:
+    """Обёртка исполнителя команд (сигнатура run_cmd): интервал трассировки и учёт процесса в текущей операции"""
+
+    @functools.wraps(run_cmd_func)
+    def run(command, cwd, waiting_subprocess: bool = False):
+        start = time.perf_counter()
+        with span('run_cmd', command=command, cwd=str(cwd)) as current:
+            res = run_cmd_func(command=command, cwd=cwd, waiting_subprocess=waiting_subprocess)
+            current.set(returncode=res.returncode)
+        record_subprocess(SubprocessRecord(command=command, cwd=str(cwd), returncode=res.returncode,
+                                           elapsed=time.perf_counter() - start))
+        return res
+
+    return run
+
+
+def _annotate(result: Any, elapsed: float, records: list[SubprocessRecord]):
+    """Заполнение времени и процессов у статусов результата, которые ещё не были измерены отдельно"""
+    if isinstance(result, Status):
+        if result.elapsed is None:
+            result.elapsed = elapsed
+            result.subprocesses = list(records)
+    elif isinstance(result, (list, tuple)):
+        for item in result:
+            if isinstance(item, (Status, list, tuple)):
+                _annotate(item, elapsed, records)
+
+
+def measure_call(name: str, func: Callable, *args, **kwargs):
+    """
+    Вызов как отдельной операции: статусы результата получают время вызова и запущенные в нём процессы
+    (процессы учитываются и во внешней операции).
+    """
+    parent = _current_records.get()
+    records: list[SubprocessRecord] = []
+    token = _current_records.set(records)
+    start = time.perf_counter()
+    try:
+        with span(name):
+            result = func(*args, **kwargs)
+    finally:
+        _current_records.reset(token)
+        if parent is not None:
+            parent.extend(records)
+    _annotate(result, time.perf_counter() - start, records)
+    return result
+
+
+def operation(name: str) -> Callable:
+    """
+    Декоратор публичных методов: интервал трассировки и measure_call.
+    Для генераторов интервал охватывает весь обход (от первого до последнего элемента).
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return (yield from func(*args, **kwargs))
+                # интервал не становится текущим: между элементами управление находится у вызывающего кода
+                start_ns = time.perf_counter_ns()
+                error = None
+                try:
+                    return (yield from func(*args, **kwargs))
+                except BaseException as err:
+                    error = type(err).__name__
+                    raise
+                finally:
+                    with _spans_lock:
+                        _spans.append(SpanRecord(
+                            name=name, span_id=next(_span_ids), parent_id=_current_span.get(),
+                            start_ns=start_ns, duration_ns=time.perf_counter_ns() - start_ns,
+                            thread_id=threading.get_ident(), error=error,
+                        ))
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return measure_call(name, func, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ---------- экспорт ----------
+
+def export_jsonl(path: Path, spans: list[SpanRecord] | None = None):
+    """Интервалы в JSON строки (одна строка - один интервал, время в наносекундах perf_counter)"""
+    spans = get_spans() if spans is None else spans
+    with open(path, 'w', encoding='utf8') as f:
+        for record in spans:
+            f.write(json.dumps(asdict(record), ensure_ascii=False, default=str) + '\n')
+
+
+def export_chrome(path: Path, spans: list[SpanRecord] | None = None):
+    """Интервалы в формате Chrome trace events (события 'X', время в микросекундах)"""
+    spans = get_spans() if spans is None else spans
+    pid = os.getpid()
+    events = []
+    for record in spans:
+        args = {key: str(value) for key, value in record.attrs.items()}
+        if record.error is not None:
+            args['error'] = record.error
+        events.append({
+            'name': record.name,
+            'cat': record.name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': record.start_ns / 1000,
+            'dur': record.duration_ns / 1000,
+            'pid': pid,
+            'tid': record.thread_id,
+            'args': args,
+        })
+    with open(path, 'w', encoding='utf8') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+def _export_on_exit(path: Path):
+    if path.suffix == '.json':
+        export_chrome(path)
+    else:
+        export_jsonl(path)
+
+
+if os.environ.get('WORKSPACECLERK_TRACE'):
+    enable()
+    atexit.register(_export_on_exit, Path(os.environ['WORKSPACECLERK_TRACE']))
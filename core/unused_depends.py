@@ -0,0 +1,154 @@
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, TYPE_CHECKING
+
+from core.utils.requirements import requirement_name, normalize_name, requirement_raw_name
+
+if TYPE_CHECKING:  # модуль AST импортируется только при сканировании
+    from core.AST.import_finder import ImportResult
+    from core.dist_index import DistributionIndex
+
+# дистрибутивы, название которых не совпадает с импортируемым модулем (нормализованное название -> модули)
+KNOWN_IMPORT_NAMES: dict[str, set[str]] = {
+    'attrs': {'attr', 'attrs'},
+    'beautifulsoup4': {'bs4'},
+    'google-api-python-client': {'googleapiclient'},
+    'msgpack-python': {'msgpack'},
+    'opencv-python': {'cv2'},
+    'opencv-python-headless': {'cv2'},
+    'pillow': {'PIL'},
+    'protobuf': {'google'},
+    'psycopg2-binary': {'psycopg2'},
+    'pyjwt': {'jwt'},
+    'pymupdf': {'fitz'},
+    'pyserial': {'serial'},
+    'python-dateutil': {'dateutil'},
+    'python-dotenv': {'dotenv'},
+    'python-multipart': {'multipart'},
+    'pyyaml': {'yaml'},
+    'scikit-image': {'skimage'},
+    'scikit-learn': {'sklearn'},
+    'setuptools': {'setuptools', 'pkg_resources'},
+    'tomli-w': {'tomli_w'},
+}
+
+
+def import_names(requirement: str, dist_index: 'DistributionIndex | None' = None) -> set[str]:
+    """
+    Нормализованные названия модулей, которые может импортировать дистрибутив из требования.
+    Если дистрибутив установлен - модули из его dist-info (см. DistributionIndex), иначе и дополнительно
+    эвристика: название дистрибутива (`typing-extensions` -> `typing_extensions`), без префикса `python-`
+    и известные исключения KNOWN_IMPORT_NAMES.
+    """
+    name = requirement_name(requirement)
+    names = {name}
+    if name.startswith('python-'):
+        names.add(name.removeprefix('python-'))
+    names |= {normalize_name(module) for module in KNOWN_IMPORT_NAMES.get(name, ())}
+    if dist_index is not None:
+        names |= dist_index.modules_for_distribution(name)
+    return names
+
+
+def top_level_modules(imports: dict[Path, list['ImportResult']], files: Iterable[Path]) -> set[str]:
+    """Названия верхнего уровня абсолютных импортов файлов (`from a.b import c` -> `a`)"""
+    modules = set()
+    for file in files:
+        for imp in imports.get(file, ()):
+            if imp.level:  # относительный импорт - всегда модуль самого пакета
+                continue
+            path = imp.module or imp.name
+            if path:
+                modules.add(path.split('.', 1)[0])
+    return modules
+
+
+def top_level_imports(imports: dict[Path, list['ImportResult']], files: Iterable[Path]) -> set[str]:
+    """Нормализованные названия верхнего уровня абсолютных импортов файлов"""
+    return {normalize_name(module) for module in top_level_modules(imports, files)}
+
+
+def unused_requirements(declared: Iterable[str], imported: set[str], ignore: set[str] | None = None,
+                        dist_index: 'DistributionIndex | None' = None) -> list[str]:
+    """
+    Объявленные зависимости, ни один модуль которых не импортируется
+
+    :param declared: требования PEP 508 из project.dependencies
+    :param imported: результат top_level_imports
+    :param ignore: названия дистрибутивов, которые не проверяются (инструменты, плагины и т.д.)
+    :param dist_index: индекс установленных дистрибутивов для точного соответствия модулей
+    :return: названия дистрибутивов так, как они записаны в требованиях (для `uv remove`)
+    """
+    ignore = {normalize_name(name) for name in ignore} if ignore else set()
+    unused = []
+    for requirement in declared:
+        if requirement_name(requirement) in ignore:
+            continue
+        if not import_names(requirement, dist_index=dist_index) & imported:
+            unused.append(requirement_raw_name(requirement))
+    return sorted(unused)
+
+
+def local_modules(files: Iterable[Path], scope_path: Path) -> set[str]:
+    """
+    Нормализованные названия модулей и директорий области (пакета или корня): все сегменты путей файлов
+    относительно scope_path, например `src/app1/utils/db.py` -> {'src', 'app1', 'utils', 'db'}
+    """
+    modules = set()
+    for file in files:
+        parts = Path(file).relative_to(scope_path).parts
+        modules.update(normalize_name(part) for part in parts[:-1])
+        modules.add(normalize_name(parts[-1].removesuffix('.py')))
+    return modules
+
+
+def missing_requirements(modules: set[str], declared: Iterable[str], local: set[str],
+                         dist_index: 'DistributionIndex | None' = None) -> dict[str, str | None]:
+    """
+    Импортируемые сторонние модули, которые не покрывает ни одна объявленная зависимость
+
+    :param modules: результат top_level_modules
+    :param declared: требования PEP 508 из project.dependencies
+    :param local: нормализованные модули самого проекта (local_modules, названия пакетов workspace)
+    :param dist_index: индекс установленных дистрибутивов (модуль -> дистрибутив)
+    :return: {модуль: дистрибутив для `uv add`}. Дистрибутив определяется по индексу (если он уже установлен,
+        например как транзитивная зависимость) или по KNOWN_IMPORT_NAMES, иначе None: название модуля
+        не обязано совпадать с дистрибутивом (`cv2`, `sklearn`), а импорт может быть необязательным
+        (try / except ImportError, `if TYPE_CHECKING`), поэтому такие модули не устанавливаются автоматически
+    """
+    covered = set().union(*(import_names(requirement, dist_index=dist_index) for requirement in declared))
+    known: dict[str, str] = {}  # модуль -> дистрибутив (при нескольких вариантах - первый в KNOWN_IMPORT_NAMES)
+    for distribution, names in KNOWN_IMPORT_NAMES.items():
+        for module in names:
+            known.setdefault(normalize_name(module), distribution)
+
+    missing = {}
+    for module in sorted(modules):
+        normalized = normalize_name(module)
+        if module in sys.stdlib_module_names or normalized in local or normalized in covered:
+            continue
+        distributions = dist_index.distributions_for_module(module) if dist_index is not None else set()
+        missing[module] = min(distributions) if distributions else known.get(normalized)
+    return missing
+
+
+def split_files_by_package(files: Iterable[Path], src_path: Path,
+                           package_names: Iterable[str]) -> tuple[list[Path], dict[str, list[Path]]]:
+    """
+    Файлы проекта по областям: файлы корня (вне директории src) и файлы каждого пакета
+
+    :return: (файлы корня, {пакет: файлы пакета})
+    """
+    src = os.fspath(src_path) + os.sep
+    packages = {name: [] for name in package_names}
+    root_files = []
+    for file in files:
+        path = os.fspath(file)
+        if not path.startswith(src):
+            root_files.append(file)
+            continue
+        package_files = packages.get(path[len(src):].split(os.sep, 1)[0])
+        if package_files is not None:
+            package_files.append(file)
+    return root_files, packages
@@ -0,0 +1,31 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def atomic_write_bytes(path_in: Path, data: bytes) -> None:
+    """
+    Атомарная запись файла: данные пишутся во временный файл рядом с целевым, сбрасываются на диск (fsync)
+    и только затем подменяют целевой файл. При падении процесса на диске остаётся либо старая, либо новая версия.
+
+    :param path_in: путь к записываемому файлу
+    :param data: содержимое файла
+    """
+    path_in.parent.mkdir(parents=True, exist_ok=True)
+    try:  # права доступа сохраняются от заменяемого файла (mkstemp создаёт файл с правами 0600)
+        mode = os.stat(path_in).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+
+    fd, tmp_path = tempfile.mkstemp(dir=path_in.parent, prefix=f'.{path_in.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path_in)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -24,7 +24,7 @@ def directory_walker_filtered(
         raise FileNotFoundError(f'директория `{root_path_in}` не существует.')
 
     dirs_filter = dirs_filter if dirs_filter is not None else set()
-    extensions_filter = extensions_filter if extensions_filter is not None else set()
+    extensions_filter = tuple(extensions_filter) if extensions_filter is not None else ()  # для str.endswith
 
     for root, dirs, files in root_path_in.walk():
 
@@ -38,9 +38,9 @@ def directory_walker_filtered(
 
             # если есть фильтр расширений
             if extensions_filter:
-                if not extensions_filter_exclude and not file.endswith(tuple(extensions_filter)):
+                if not extensions_filter_exclude and not file.endswith(extensions_filter):
                     continue
-                elif extensions_filter_exclude and file.endswith(tuple(extensions_filter)):
+                elif extensions_filter_exclude and file.endswith(extensions_filter):
                     continue
 
             yield root / file
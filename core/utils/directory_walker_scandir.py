@@ -0,0 +1,82 @@
+import os
+from pathlib import Path
+from typing import Iterator
+
+from core.constants import DEFAULT_IGNORE_DIRS
+from core.utils.gitignore import GitIgnore, is_ignored
+
+
+def directory_walker_scandir(
+        root_path_in: Path | str,
+        extensions_filter: set[str] | None = None,
+        ignore_dirs: set[str] | frozenset[str] | None = None,
+        ignore_patterns: list[str] | None = None,
+        use_gitignore: bool = True,
+) -> Iterator[str]:
+    """
+    Быстрый обходчик директории на os.scandir. Игнорируемые директории отсекаются до входа в них
+    (по имени, по правилам .gitignore и виртуальные окружения с pyvenv.cfg), файлы возвращаются строками.
+
+    :param root_path_in: корневой путь
+    :param extensions_filter: какие расширения должны быть у файлов (None - любые)
+    :param ignore_dirs: имена директорий, в которые не нужно заходить (None - DEFAULT_IGNORE_DIRS)
+    :param ignore_patterns: дополнительные шаблоны в синтаксисе .gitignore относительно корня
+    :param use_gitignore: учитывать файлы .gitignore (в корне и во вложенных директориях)
+
+    :return: генератор с полными путями найденных файлов
+    """
+    root = os.fspath(root_path_in)
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f'директория `{root_path_in}` не существует.')
+
+    ignore_dirs = frozenset(ignore_dirs) if ignore_dirs is not None else DEFAULT_IGNORE_DIRS
+    extensions = tuple(extensions_filter) if extensions_filter else None  # str.endswith принимает только tuple
+
+    root_gitignores = ()
+    if ignore_patterns:
+        root_gitignores = (GitIgnore(lines=ignore_patterns),)
+
+    # (путь директории, путь относительно корня в posix виде с "/" на конце, цепочка .gitignore)
+    stack: list[tuple[str, str, tuple[GitIgnore, ...]]] = [(root, '', root_gitignores)]
+    while stack:
+        dir_path, rel_dir, gitignores = stack.pop()
+
+        if use_gitignore:
+            gitignore = GitIgnore.from_file(os.path.join(dir_path, '.gitignore'), base=rel_dir)
+            if gitignore is not None:
+                gitignores = gitignores + (gitignore,)
+
+        try:
+            entries = os.scandir(dir_path)
+        except OSError:  # нет доступа или директория удалена во время обхода
+            continue
+
+        sub_dirs = []
+        with entries:
+            for entry in entries:
+                name = entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if not is_dir and not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+
+                if is_dir:
+                    if name in ignore_dirs:
+                        continue
+                    rel_path = rel_dir + name
+                    if gitignores and is_ignored(gitignores, rel_path=rel_path, name=name, is_dir=True):
+                        continue
+                    if os.path.exists(os.path.join(entry.path, 'pyvenv.cfg')):  # виртуальное окружение
+                        continue
+                    sub_dirs.append((entry.path, rel_path + '/', gitignores))
+
+                else:
+                    if extensions is not None and not name.endswith(extensions):
+                        continue
+                    if gitignores and is_ignored(gitignores, rel_path=rel_dir + name, name=name, is_dir=False):
+                        continue
+                    yield entry.path
+
+        stack.extend(reversed(sub_dirs))  # обход в порядке scandir (сверху вниз)
@@ -0,0 +1,177 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки действуют только между потоками процесса
+    fcntl = None
+
+LOCKS_DIR_NAME = 'workspaceclerk-locks'
+DEFAULT_LOCK_TIMEOUT = 600.0  # секунд: `uv add` / `uv sync` с загрузкой пакетов может идти несколько минут
+_POLL_MIN, _POLL_MAX = 0.001, 0.05  # интервал повторных попыток захвата блокировки другого процесса
+
+
+class FileLockTimeout(TimeoutError):
+    """Блокировка не была захвачена за отведённое время (файл изменяет другой процесс)"""
+
+
+def lock_timeout() -> float:
+    """Таймаут по умолчанию (можно задать переменной окружения WORKSPACECLERK_LOCK_TIMEOUT, секунды)"""
+    value = os.environ.get('WORKSPACECLERK_LOCK_TIMEOUT')
+    return float(value) if value else DEFAULT_LOCK_TIMEOUT
+
+
+def locks_dir() -> Path:
+    """
+    Директория файлов блокировок (WORKSPACECLERK_LOCK_DIR, по умолчанию во временной директории системы).
+    Файлы блокировок отдельные от защищаемых: pyproject.toml заменяется атомарной записью (новый inode),
+    и блокировка самого файла не пережила бы запись.
+    """
+    return Path(os.environ.get('WORKSPACECLERK_LOCK_DIR') or Path(tempfile.gettempdir()) / LOCKS_DIR_NAME)
+
+
+class FileLock:
+    """
+    Межпроцессная блокировка файла (fcntl.flock на файле блокировки в locks_dir) с семантикой
+    читатели / писатель: shared - одновременно для любого числа читателей, exclusive - для одного писателя.
+
+    Внутри процесса блокировка общая для всех потоков (см. file_lock) и реентерабельна для потока-владельца:
+    повторный захват (в том числе shared внутри exclusive) только увеличивает счётчик.
+    Повышение shared до exclusive не поддерживается (взаимная блокировка двух читателей).
+    """
+
+    def __init__(self, path_in: Path):
+        """
+        :param path_in: защищаемый файл (может не существовать), лучше абсолютный путь без ссылок
+        """
+        self.path = path_in
+        digest = hashlib.sha1(os.fsencode(os.path.realpath(path_in))).hexdigest()
+        self._lock_path = locks_dir() / f'{digest}.lock'
+        self._cond = threading.Condition()
+        self._fd: int | None = None
+        self._writer: int | None = None  # поток-владелец exclusive
+        self._writer_depth = 0
+        self._readers: dict[int, int] = {}  # поток -> глубина shared
+
+    def _flock(self, exclusive: bool) -> bool:
+        if fcntl is None:
+            return True
+        if self._fd is None:
+            self._lock_path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self._lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(self._fd, (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def _unlock(self):
+        if fcntl is not None and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _try_acquire(self, thread_id: int, exclusive: bool) -> bool:
+        if exclusive:
+            if self._writer is not None or self._readers or not self._flock(exclusive=True):
+                return False
+            self._writer, self._writer_depth = thread_id, 1
+            return True
+        if self._writer is not None:
+            return False
+        # блокировку процесса захватывает первый читатель, остальные потоки процесса к ней присоединяются
+        if not self._readers and not self._flock(exclusive=False):
+            return False
+        self._readers[thread_id] = 1
+        return True
+
+    def acquire(self, exclusive: bool = True, timeout: float | None = None):
+        """
+        :param exclusive: True - запись (один владелец), False - чтение (совместно с другими читателями)
+        :param timeout: секунды ожидания (None - lock_timeout(), отрицательное - без ограничения)
+        :raise FileLockTimeout: блокировка не захвачена за timeout
+        """
+        timeout = lock_timeout() if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout >= 0 else None
+        thread_id = threading.get_ident()
+        delay = _POLL_MIN
+        with self._cond:
+            if self._writer == thread_id:
+                self._writer_depth += 1
+                return
+            if thread_id in self._readers:
+                if exclusive:
+                    raise RuntimeError(f'❌ Повышение блокировки `{self.path}` с shared до exclusive не поддерживается.')
+                self._readers[thread_id] += 1
+                return
+
+            while not self._try_acquire(thread_id, exclusive):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise FileLockTimeout(
+                        f'❌ Не удалось захватить блокировку `{self.path}` за {timeout:g} с: '
+                        f'файл изменяет другой процесс.'
+                    )
+                # освобождение потоком процесса будит сразу (notify), блокировку другого процесса - опрос
+                self._cond.wait(delay if remaining is None else min(delay, remaining))
+                delay = min(delay * 2, _POLL_MAX)
+
+    def release(self):
+        thread_id = threading.get_ident()
+        with self._cond:
+            if self._writer == thread_id:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer = None
+                    self._unlock()
+            elif thread_id in self._readers:
+                self._readers[thread_id] -= 1
+                if self._readers[thread_id] == 0:
+                    del self._readers[thread_id]
+                    if not self._readers:
+                        self._unlock()
+            else:
+                raise RuntimeError(f'❌ Блокировка `{self.path}` не захвачена текущим потоком.')
+            self._cond.notify_all()
+
+    @contextmanager
+    def shared(self, timeout: float | None = None) -> Iterator['FileLock']:
+        self.acquire(exclusive=False, timeout=timeout)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    @contextmanager
+    def exclusive(self, timeout: float | None = None) -> Iterator['FileLock']:
+        self.acquire(exclusive=True, timeout=timeout)
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+_registry: dict[str, FileLock] = {}  # абсолютный путь -> блокировка
+_registry_real: dict[str, FileLock] = {}  # путь без ссылок -> блокировка
+_registry_lock = threading.Lock()
+
+
+def file_lock(path_in: Path) -> FileLock:
+    """
+    Блокировка файла, общая для всех потоков процесса: одна на файл, в том числе при обращении по разным путям
+    (два объекта одного файла в одном процессе блокировали бы друг друга)
+    """
+    key = os.path.abspath(path_in)
+    lock = _registry.get(key)
+    if lock is None:
+        real = os.path.realpath(key)
+        with _registry_lock:
+            lock = _registry_real.get(real)
+            if lock is None:
+                lock = _registry_real[real] = FileLock(Path(real))
+            _registry[key] = lock
+    return lock
@@ -0,0 +1,127 @@
+import re
+from dataclasses import dataclass
+
+
+@dataclass
+class _GitIgnoreRule:
+    regex: re.Pattern
+    negate: bool  # правило вида "!pattern" - возвращает ранее исключённый путь
+    dir_only: bool  # правило вида "pattern/" - действует только на директории
+    basename: bool  # шаблон без "/" сравнивается только с именем файла/директории на любой глубине
+
+
+def _translate_glob(pattern: str) -> str:
+    """Перевод glob шаблона .gitignore в регулярное выражение (*, ?, [...], **)"""
+    result = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if char == '*':
+            if pattern.startswith('**/', i):  # "**/" - ноль или больше директорий
+                result.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):  # "**" в конце - всё содержимое
+                result.append('.*')
+                i += 2
+                continue
+            result.append('[^/]*')
+        elif char == '?':
+            result.append('[^/]')
+        elif char == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                result.append(re.escape(char))
+            else:
+                group = pattern[i + 1:end]
+                if group.startswith('!'):
+                    group = '^' + group[1:]
+                result.append(f'[{group}]')
+                i = end
+        elif char == '\\' and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(char))
+        i += 1
+    return ''.join(result)
+
+
+class GitIgnore:
+    """
+    Правила одного файла .gitignore (или списка шаблонов в том же синтаксисе).
+    Шаблоны компилируются в регулярные выражения один раз при создании объекта.
+    """
+
+    def __init__(self, lines: list[str], base: str = ''):
+        """
+        :param lines: строки .gitignore
+        :param base: путь директории .gitignore относительно корня обхода ("" или "src/app1/")
+        """
+        self.base = base
+        self._rules: list[_GitIgnoreRule] = []
+
+        for line in lines:
+            line = line.rstrip('\n').rstrip('\r')
+            if not line.strip() or line.startswith('#'):
+                continue
+            line = line.rstrip() if not line.endswith('\\ ') else line
+
+            negate = line.startswith('!')
+            if negate:
+                line = line[1:]
+            elif line.startswith('\\!') or line.startswith('\\#'):
+                line = line[1:]
+
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            if not line:
+                continue
+
+            basename = '/' not in line
+            line = line.lstrip('/')
+            self._rules.append(_GitIgnoreRule(
+                regex=re.compile(_translate_glob(line) + r'\Z'),
+                negate=negate,
+                dir_only=dir_only,
+                basename=basename,
+            ))
+
+    @classmethod
+    def from_file(cls, path: str, base: str = '') -> 'GitIgnore | None':
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                gitignore = cls(lines=f.readlines(), base=base)
+        except OSError:
+            return None
+        return gitignore if gitignore else None
+
+    def __bool__(self):
+        return bool(self._rules)
+
+    def match(self, rel_path: str, name: str, is_dir: bool) -> bool | None:
+        """
+        Проверка пути по правилам файла (побеждает последнее подходящее правило).
+
+        :param rel_path: путь относительно корня обхода в posix виде ("src/app1/build")
+        :param name: имя файла или директории
+        :param is_dir: путь является директорией
+        :return: True - путь игнорируется, False - явно возвращён правилом "!", None - ни одно правило не подошло
+        """
+        rel_path = rel_path[len(self.base):]
+        verdict = None
+        for rule in self._rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(name if rule.basename else rel_path):
+                verdict = not rule.negate
+        return verdict
+
+
+def is_ignored(gitignores: tuple[GitIgnore, ...], rel_path: str, name: str, is_dir: bool) -> bool:
+    """Проверка по цепочке .gitignore от корня к текущей директории (более глубокий файл имеет приоритет)"""
+    for gitignore in reversed(gitignores):
+        verdict = gitignore.match(rel_path=rel_path, name=name, is_dir=is_dir)
+        if verdict is not None:
+            return verdict
+    return False
@@ -1,26 +1,47 @@
+import posixpath
 from pathlib import Path
 
 from dataclasses import dataclass, field
-import tomllib
-import tomli_w
+import copy
+
+from core.tracing import span
+from core.utils.file_lock import file_lock
+from core.utils.requirements import requirement_name, normalize_name
+from core.utils.toml_cache import toml_cache
+from core.utils.toml_writer import write_toml_file
+
+
+def workspace_member_key(member: str) -> str:
+    """Ключ пути участника workspace: разделители `/`, без `./` и завершающего `/` (`.\\src\\app1\\` -> `src/app1`)"""
+    return posixpath.normpath(member.replace('\\', '/'))
 
 
 @dataclass
 class TomlManager:
+    """
+    Данные pyproject.toml с индексами для поиска за O(1):
+    зависимости и источники - по нормализованному названию (PEP 503),
+    участники workspace - по пути и по последнему сегменту пути (названию пакета).
+    Исходные строки хранятся как значения индексов и записываются обратно без изменений:
+    project.dependencies - в исходном порядке, новые зависимости добавляются в конец.
+    """
     toml_path: Path
     data: dict = field(default_factory=dict)
     name: str = ...
     version: str = ...
     description: str = ...
     requires_python: str = ...
-    _depends: set[str] = field(default_factory=set)
-    _workspaces: set[str] = field(default_factory=set)
-    _sources: set[str] = field(default_factory=set)
+    _depends: dict[str, str] = field(default_factory=dict)  # название -> требование (порядок project.dependencies)
+    _workspace_depends: set[str] = field(default_factory=set)  # названия зависимостей - пакетов workspace
+    _workspaces: dict[str, str] = field(default_factory=dict)  # ключ пути (workspace_member_key) -> участник
+    _workspaces_by_name: dict[str, str] = field(default_factory=dict)  # название пакета -> ключ пути
+    _sources: dict[str, str] = field(default_factory=dict)  # название -> ключ tool.uv.sources
 
     def __post_init__(self):  # чтение toml файла (сразу после инициализации объекта)
-        try:
-            with open(self.toml_path, 'rb') as f:
-                data: dict = tomllib.load(f)
+        with span('toml.read', path=str(self.toml_path)):
+            try:
+                # документ общий для всех менеджеров (кеш процесса), изменяется только его копия при записи
+                data: dict = toml_cache.load(self.toml_path)
                 self.data = data
 
                 self.name = self.data['project']['name']
@@ -28,122 +49,133 @@ class TomlManager:
                 self.description = self.data['project']['description']
                 self.requires_python = self.data['project']['requires-python']
 
-                self._workspaces = set(data.get('tool', {}).get('uv', {}).get('workspace', {}).get('members', set()))
+                for member in data.get('tool', {}).get('uv', {}).get('workspace', {}).get('members', ()):
+                    self.workspaces_add(member)
                 # отделить библиотеки от пакетов
-                depends = set(data.get('project', {}).get('dependencies', set()))
-                for dep in depends:
-                    if not self.is_package_in_workspaces(dep):
-                        self._depends.add(dep)
+                for dep in data.get('project', {}).get('dependencies', ()):
+                    if self.is_package_in_workspaces(requirement_name(dep)):
+                        self.workspace_depends_add(dep)
+                    else:
+                        self.depends_add(dep)
 
-                sources = data.get('tool', {}).get('uv', {}).get('sources', {})
-                self._sources = set(sources.keys()) if sources else set()
+                for key in data.get('tool', {}).get('uv', {}).get('sources', None) or ():
+                    self.sources_add(key)
 
-        except FileNotFoundError:
-            raise Exception(f'❌ Файл `{self.toml_path}` не найден.')
-        except Exception:
-            raise
+            except FileNotFoundError:
+                raise Exception(f'❌ Файл `{self.toml_path}` не найден.')
+            except Exception:
+                raise
 
     @property
-    def depends(self):
-        return self._depends
+    def depends(self) -> set[str]:
+        # только библиотеки, без пакетов workspace
+        return {depend for name, depend in self._depends.items() if name not in self._workspace_depends}
 
     def depends_add(self, depend: str):
-        self._depends.add(depend)
+        # существующая зависимость заменяется на месте, новая добавляется в конец
+        name = requirement_name(depend)
+        self._depends[name] = depend
+        self._workspace_depends.discard(name)
 
     def depends_remove(self, depend: str):
-        # удаление depends с игнорированием символов, только цифры и буквы
-        for d in self._depends:
-            if self._contains_alnum_suffix(d, depend):
-                self._depends.remove(d)
-                break
+        # удаление по названию пакета (версии и extras не учитываются)
+        name = requirement_name(depend)
+        self._depends.pop(name, None)
+        self._workspace_depends.discard(name)
+
+    def workspace_depends_add(self, depend: str):
+        """Добавление зависимости на пакет workspace (в общий список, с отметкой пакета workspace)"""
+        name = requirement_name(depend)
+        self._depends[name] = depend
+        self._workspace_depends.add(name)
 
     @property
-    def workspaces(self):
-        return self._workspaces
+    def workspaces(self) -> set[str]:
+        return set(self._workspaces.values())
 
     def workspaces_add(self, depend: str):
-        self._workspaces.add(depend)
+        key = workspace_member_key(depend)
+        self._workspaces[key] = depend
+        self._workspaces_by_name[normalize_name(posixpath.basename(key))] = key
 
     def workspaces_remove(self, depend: str):
-        # удаление workspace с игнорированием символов, только цифры и буквы
-        depend = str(depend)
-        for w in self._workspaces:
-            if self._contains_alnum_suffix(w, depend):
-                self._workspaces.remove(w)
-                break
+        # удаление по пути участника или по названию пакета
+        key = self._workspace_key(str(depend))
+        if key is None:
+            return
+        del self._workspaces[key]
+        name = normalize_name(posixpath.basename(key))
+        if self._workspaces_by_name.get(name) == key:
+            del self._workspaces_by_name[name]
 
     @property
-    def sources(self):
-        return self._sources
+    def sources(self) -> set[str]:
+        return set(self._sources.values())
+
+    def sources_add(self, depend: str):
+        # новые источники записываются как пакеты workspace: `depend = { workspace = true }`
+        self._sources.setdefault(normalize_name(depend), depend)
 
     def sources_remove(self, depend: str):
-        # удаление depends с игнорированием символов, только цифры и буквы
-        for s in self._sources:
-            if self._contains_alnum_suffix(s, depend):
-                self._sources.remove(s)
-                break
-
-    @staticmethod
-    def _contains_alnum_suffix(string: str, sub_string: str, register: bool = False) -> bool:
+        self._sources.pop(normalize_name(depend), None)
+
+    def _workspace_key(self, package: str) -> str | None:
         """
-        Проверка совпадения символьно цифрового ряда в обратном порядке (с игнорированием знаков пунктуации)
-        например:
-        src.app1.test in src/app1,
-        так как: 1ppasrc == 1ppasrc
-        :param string: строка включающая (не включающая) в себя проверяемую строку
-        :param sub_string: строка которая должна быть включена
-        :param register: учитывать регистр?
-        :return:
+        Ключ участника workspace по пути (`src/app1`, `src\\app1`) или по названию пакета (`app1`, `App_1`)
         """
-        if not register:
-            string = string.lower()
-            sub_string = sub_string.lower()
-        different = (len(string) - 1) - (len(sub_string) - 1)
-
-        for i in range(len(string) - 1, -1, -1):
-            indx = i - different
-
-            if not string[i].isalpha() and not sub_string[indx].isalpha():
-                if not string[i].isdigit() and not sub_string[indx].isdigit():
-                    continue
-
-            if indx == 0:
-                return True
-
-            if string[i] != sub_string[indx]:
-                return False
-        return False
+        key = workspace_member_key(package)
+        if key in self._workspaces:
+            return key
+        if '/' in key:  # путь сравнивается только целиком
+            return None
+        return self._workspaces_by_name.get(normalize_name(key))
 
     def is_package_in_dependencies(self, package: str) -> bool:
-        return any(pack_dep.startswith(package) for pack_dep in self._depends)
+        return requirement_name(package) in self._depends
 
     def is_package_in_workspaces(self, package: str) -> bool:
-        return any(self._contains_alnum_suffix(string=w, sub_string=package, register=False) for w in self._workspaces)
+        return self._workspace_key(package) is not None
 
     def is_package_in_sources(self, package: str) -> bool:
-        return any(self._contains_alnum_suffix(string=w, sub_string=package, register=False) for w in self._sources)
+        return normalize_name(package) in self._sources
 
-    def write_toml(self):
-        """Запись toml файла"""
-        data = self.data.copy()
+    def write_toml(self) -> bool:
+        """
+        Запись toml файла: в исходный текст вносятся только изменённые массивы и таблицы
+        (комментарии и порядок сохраняются), запись атомарная и пропускается, если данные не изменились.
 
-        data.setdefault('project', {})['dependencies'] = list(self._depends)
+        :return: был ли файл записан
+        """
+        data = copy.deepcopy(self.data)  # copy-on-write: self.data принадлежит общему кешу
+
+        data.setdefault('project', {})['dependencies'] = list(self._depends.values())
 
         # запись workspace (даже если его нет в любом случае создать)
         # пересчёт uv.workspace если бы измен
         data.setdefault('tool', {})
         data['tool'].setdefault('uv', {})
         data['tool']['uv'].setdefault('workspace', {})
-        data['tool']['uv']['workspace']['members'] = list(self._workspaces)
+        data['tool']['uv']['workspace']['members'] = list(self._workspaces.values())
 
         # пересчёт uv.source если бы измен
         if data.get('tool', {}).get('uv', {}).get('sources', None):
             for key in list(data['tool']['uv']['sources'].keys()):
-                if key not in self._sources:
+                if normalize_name(key) not in self._sources:
                     del data['tool']['uv']['sources'][key]
 
-        with open(self.toml_path, 'wb') as f:
-            tomli_w.dump(data, f)
+        for key in self._sources.values():
+            sources = data['tool']['uv'].setdefault('sources', {})
+            if key not in sources:
+                sources[key] = {'workspace': True}
+
+        if data == self.data:
+            return False
+
+        with span('toml.write', path=str(self.toml_path)) as current:
+            with file_lock(self.toml_path).exclusive():
+                written = write_toml_file(self.toml_path, data)
+            current.set(written=written)
+        return written
 
 
 if __name__ == '__main__':
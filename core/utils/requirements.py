@@ -0,0 +1,24 @@
+import re
+
+_NAME_RE = re.compile(r'\s*([A-Za-z0-9](?:[A-Za-z0-9._-]*[A-Za-z0-9])?)')
+_SEPARATORS_RE = re.compile(r'[-_.]+')
+
+
+def normalize_name(name: str) -> str:
+    """Нормализованное название пакета по PEP 503: `Foo_Bar.baz` -> `foo-bar-baz`"""
+    return _SEPARATORS_RE.sub('-', name).lower()
+
+
+def requirement_name(requirement: str) -> str:
+    """
+    Нормализованное название пакета из строки требования PEP 508
+    например "Requests[socks]>=2.0; python_version>'3.8'" -> "requests"
+    """
+    match = _NAME_RE.match(requirement)
+    return normalize_name(match.group(1) if match else requirement.strip())
+
+
+def requirement_raw_name(requirement: str) -> str:
+    """Название пакета из строки требования как оно записано (для `uv remove`): "Requests[socks]>=2.0" -> "Requests" """
+    match = _NAME_RE.match(requirement)
+    return match.group(1) if match else requirement.strip()
@@ -0,0 +1,52 @@
+import os
+import threading
+import tomllib
+from pathlib import Path
+
+from core.utils.file_lock import file_lock
+
+
+class TomlCache:
+    """
+    Общий для процесса кеш разобранных toml файлов.
+    Документ хранится по абсолютному пути и считается актуальным, пока совпадают mtime_ns и размер файла
+    (изменения сделанные uv или другим процессом обнаруживаются автоматически).
+    Выдаваемый документ общий для всех читателей и не должен изменяться: перед изменением нужно сделать
+    копию (copy-on-write), а после записи файла - вызвать invalidate.
+    """
+
+    def __init__(self):
+        self._entries: dict[str, tuple[tuple[int, int], dict]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, toml_path: Path) -> dict:
+        key = os.path.abspath(toml_path)
+        stat = os.stat(key)  # FileNotFoundError пробрасывается вызывающему
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        # файл читается под shared блокировкой: не посередине изменения, которое выполняет другой процесс
+        with file_lock(Path(key)).shared():
+            stat = os.stat(key)
+            signature = (stat.st_mtime_ns, stat.st_size)
+            with open(key, 'rb') as f:
+                data = tomllib.load(f)
+
+        with self._lock:
+            self._entries[key] = (signature, data)
+        return data
+
+    def invalidate(self, toml_path: Path):
+        with self._lock:
+            self._entries.pop(os.path.abspath(toml_path), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+toml_cache = TomlCache()
@@ -0,0 +1,498 @@
+import datetime
+import json
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from core.utils.atomic_write import atomic_write_bytes
+from core.utils.toml_cache import toml_cache
+
+_BARE_KEY_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-')
+_DEFAULT_INDENT = '    '
+
+
+class TomlPatchError(Exception):
+    """Изменение нельзя внести в исходный текст с сохранением форматирования (нужна полная перезапись)"""
+
+
+@dataclass
+class _Statement:
+    kind: str  # 'table', 'array_table' - заголовок [a.b] / [[a.b]], 'value' - ключ = значение
+    path: tuple[str, ...]  # путь таблицы заголовка или полный путь значения (таблица + ключ)
+    start: int  # начало строки
+    end: int  # конец строки (после перевода строки)
+    value_start: int = 0
+    value_end: int = 0
+
+
+# ---------------------------------------------------------------- разбор исходного текста
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in ' \t':
+        pos += 1
+    return pos
+
+
+def _skip_comment(text: str, pos: int) -> int:
+    """Позиция перевода строки (или конца текста), если с pos начинается комментарий"""
+    if pos < len(text) and text[pos] == '#':
+        newline = text.find('\n', pos)
+        return len(text) if newline < 0 else newline
+    return pos
+
+
+def _line_end(text: str, pos: int) -> int:
+    """Конец строки после значения: допускаются только пробелы и комментарий"""
+    pos = _skip_comment(text, _skip_ws(text, pos))
+    if text.startswith('\r\n', pos):
+        return pos + 2
+    if pos < len(text) and text[pos] != '\n':
+        raise TomlPatchError(f'неожиданный текст в позиции {pos}')
+    return min(pos + 1, len(text))
+
+
+def _skip_blank(text: str, pos: int) -> int:
+    """Пропуск пробелов, переводов строк и комментариев (внутри массивов)"""
+    while True:
+        pos = _skip_comment(text, _skip_ws(text, pos))
+        if pos < len(text) and text[pos] in '\r\n':
+            pos += 1
+            continue
+        return pos
+
+
+def _skip_string(text: str, pos: int) -> int:
+    for quote in ('"""', "'''"):
+        if text.startswith(quote, pos):
+            pos += 3
+            while True:
+                if pos >= len(text):
+                    raise TomlPatchError('не закрыта многострочная строка')
+                if quote == '"""' and text[pos] == '\\':
+                    pos += 2
+                    continue
+                if text.startswith(quote, pos):
+                    pos += 3
+                    while pos < len(text) and text[pos] == quote[0]:  # до двух кавычек внутри у разделителя
+                        pos += 1
+                    return pos
+                pos += 1
+
+    quote = text[pos]
+    pos += 1
+    while pos < len(text) and text[pos] != quote:
+        if text[pos] == '\n':
+            break
+        pos += 2 if quote == '"' and text[pos] == '\\' else 1
+    if pos >= len(text) or text[pos] != quote:
+        raise TomlPatchError('не закрыта строка')
+    return pos + 1
+
+
+def _skip_value(text: str, pos: int, in_array: bool = False) -> int:
+    """Конец значения, начинающегося в pos"""
+    if pos >= len(text):
+        raise TomlPatchError('нет значения')
+    if text[pos] in '"\'':
+        return _skip_string(text, pos)
+    if text[pos] in '[{':
+        depth = 0
+        while pos < len(text):
+            char = text[pos]
+            if char in '"\'':
+                pos = _skip_string(text, pos)
+                continue
+            if char == '#':
+                pos = _skip_comment(text, pos)
+                continue
+            if char in '[{':
+                depth += 1
+            elif char in ']}':
+                depth -= 1
+            pos += 1
+            if depth == 0:
+                return pos
+        raise TomlPatchError('не закрыт массив или таблица')
+
+    # число, bool, дата (дата и время могут разделяться пробелом)
+    stops = ',]#\r\n' if in_array else '#\r\n'
+    end = pos
+    while end < len(text) and text[end] not in stops:
+        end += 1
+    while end > pos and text[end - 1] in ' \t':
+        end -= 1
+    return end
+
+
+def _parse_key(text: str, pos: int) -> tuple[tuple[str, ...], int]:
+    """Ключ (в том числе составной `a."b".c`)"""
+    parts = []
+    while True:
+        pos = _skip_ws(text, pos)
+        if pos < len(text) and text[pos] in '"\'':
+            end = _skip_string(text, pos)
+            raw = text[pos:end]
+            if raw.startswith(('"""', "'''")):
+                raise TomlPatchError('многострочная строка в ключе')
+            parts.append(raw[1:-1] if raw[0] == "'" else tomllib.loads(f'k = {raw}')['k'])
+        else:
+            end = pos
+            while end < len(text) and text[end] in _BARE_KEY_CHARS:
+                end += 1
+            if end == pos:
+                raise TomlPatchError(f'ожидался ключ в позиции {pos}')
+            parts.append(text[pos:end])
+        pos = _skip_ws(text, end)
+        if pos < len(text) and text[pos] == '.':
+            pos += 1
+            continue
+        return tuple(parts), pos
+
+
+def _scan(text: str) -> list[_Statement]:
+    """Заголовки таблиц и пары ключ = значение документа с их положением в тексте"""
+    statements = []
+    table: tuple[str, ...] = ()
+    pos = 0
+    while pos < len(text):
+        line_start = pos
+        pos = _skip_comment(text, _skip_ws(text, pos))
+        if pos >= len(text):
+            break
+        if text[pos] in '\r\n':
+            pos = _line_end(text, pos)
+            continue
+
+        if text[pos] == '[':
+            is_array = text.startswith('[[', pos)
+            table, pos = _parse_key(text, pos + (2 if is_array else 1))
+            closing = ']]' if is_array else ']'
+            if not text.startswith(closing, pos):
+                raise TomlPatchError(f'не закрыт заголовок таблицы в позиции {pos}')
+            pos = _line_end(text, pos + len(closing))
+            statements.append(_Statement(kind='array_table' if is_array else 'table', path=table,
+                                         start=line_start, end=pos))
+            continue
+
+        key, pos = _parse_key(text, pos)
+        if pos >= len(text) or text[pos] != '=':
+            raise TomlPatchError(f'ожидался `=` в позиции {pos}')
+        value_start = _skip_ws(text, pos + 1)
+        value_end = _skip_value(text, value_start)
+        pos = _line_end(text, value_end)
+        statements.append(_Statement(kind='value', path=table + key, start=line_start, end=pos,
+                                     value_start=value_start, value_end=value_end))
+    return statements
+
+
+def _array_items(text: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Положение элементов массива text[start:end]"""
+    items = []
+    pos = _skip_blank(text, start + 1)
+    while pos < end and text[pos] != ']':
+        item_end = _skip_value(text, pos, in_array=True)
+        items.append((pos, item_end))
+        pos = _skip_blank(text, item_end)
+        if pos < end and text[pos] == ',':
+            pos = _skip_blank(text, pos + 1)
+    return items
+
+
+# ---------------------------------------------------------------- запись значений
+
+
+def _format_key(key: str) -> str:
+    if key and all(char in _BARE_KEY_CHARS for char in key):
+        return key
+    return json.dumps(key, ensure_ascii=False)
+
+
+def _format_path(path: tuple[str, ...]) -> str:
+    return '.'.join(_format_key(key) for key in path)
+
+
+def _format_value(value: Any, indent: str | None = None, newline: str = '\n') -> str:
+    """
+    Значение TOML
+
+    :param indent: отступ элементов непустого массива на отдельных строках (None - массив в одну строку)
+    """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return repr(value)
+    if isinstance(value, float):
+        if value != value:
+            return 'nan'
+        return repr(value) if abs(value) != float('inf') else ('inf' if value > 0 else '-inf')
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, list):
+        if indent is not None and value:
+            return '[' + newline + ''.join(f'{indent}{_format_value(item)},{newline}' for item in value) + ']'
+        return '[' + ', '.join(_format_value(item) for item in value) + ']'
+    if isinstance(value, dict):
+        if not value:
+            return '{}'
+        return '{ ' + ', '.join(f'{_format_key(k)} = {_format_value(v)}' for k, v in value.items()) + ' }'
+    raise TomlPatchError(f'неподдерживаемый тип значения {type(value).__name__}')
+
+
+def _is_flat(value: dict) -> bool:
+    """Таблица из одних скалярных значений записывается в одну строку: `app1 = { workspace = true }`"""
+    return all(not isinstance(item, (dict, list)) for item in value.values())
+
+
+def _format_tables(path: tuple[str, ...], table: dict, newline: str) -> str:
+    """Новая таблица (и вложенные таблицы) в виде секций `[a.b]`"""
+    values = [(k, v) for k, v in table.items() if not isinstance(v, dict) or _is_flat(v)]
+    subtables = [(k, v) for k, v in table.items() if isinstance(v, dict) and not _is_flat(v)]
+    parts = []
+    if values or not subtables:
+        parts.append(f'[{_format_path(path)}]{newline}' + ''.join(
+            f'{_format_key(k)} = {_format_value(v, indent=_DEFAULT_INDENT, newline=newline)}{newline}'
+            for k, v in values))
+    parts += [_format_tables(path + (k,), v, newline) for k, v in subtables]
+    return newline.join(parts)
+
+
+# ---------------------------------------------------------------- изменение документа
+
+
+class _Patcher:
+    def __init__(self, text: str):
+        self.text = text
+        self.newline = '\r\n' if '\r\n' in text else '\n'
+        self.statements = _scan(text)
+        self.edits: list[tuple[int, int, str]] = []  # (начало, конец, замена) в исходном тексте
+        self.appends: list[str] = []  # новые секции в конце файла
+
+    def patch(self, old: dict, new: dict) -> str:
+        self._diff((), old, new)
+
+        parts, pos = [], 0
+        for start, end, replacement in sorted(self.edits, key=lambda edit: (edit[0], edit[1])):
+            if start < pos:
+                raise TomlPatchError('пересекающиеся изменения')
+            parts += [self.text[pos:start], replacement]
+            pos = end
+        parts.append(self.text[pos:])
+        text = ''.join(parts)
+
+        for section in self.appends:  # новая секция отделяется от предыдущего текста одной пустой строкой
+            text = text.rstrip('\r\n')
+            text += (self.newline * 2 if text else '') + section
+        return text
+
+    def _diff(self, path: tuple[str, ...], old: dict, new: dict):
+        for key in old:
+            if key not in new:
+                self._remove(path + (key,))
+        for key, value in new.items():
+            if key not in old:
+                self._add(path, key, value)
+            elif old[key] != value:
+                if isinstance(value, dict) and isinstance(old[key], dict):
+                    self._diff(path + (key,), old[key], value)
+                elif isinstance(value, list) and isinstance(old[key], list):
+                    self._set_array(path + (key,), value)
+                else:
+                    self._set_value(path + (key,), value)
+
+    def _value(self, path: tuple[str, ...]) -> _Statement:
+        for statement in self.statements:
+            if statement.kind == 'value' and statement.path == path:
+                return statement
+        raise TomlPatchError(f'значение `{_format_path(path)}` записано не отдельной строкой')
+
+    def _header(self, path: tuple[str, ...]) -> int | None:
+        for i, statement in enumerate(self.statements):
+            if statement.kind == 'table' and statement.path == path:
+                return i
+        return None
+
+    def _section_end(self, header_index: int | None) -> int:
+        """Позиция после последнего значения секции (None - корневая таблица до первого заголовка)"""
+        i = -1 if header_index is None else header_index
+        end = 0 if header_index is None else self.statements[header_index].end
+        for statement in self.statements[i + 1:]:
+            if statement.kind != 'value':
+                if header_index is None and end == 0:  # значений в корне нет - перед первым заголовком
+                    end = statement.start
+                break
+            end = statement.end
+        return end
+
+    def _insert(self, pos: int, line: str):
+        if pos == len(self.text) and self.text and not self.text.endswith('\n'):
+            line = self.newline + line
+        self.edits.append((pos, pos, line))
+
+    def _set_value(self, path: tuple[str, ...], value: Any):
+        statement = self._value(path)
+        self.edits.append((statement.value_start, statement.value_end, _format_value(value)))
+
+    def _remove(self, path: tuple[str, ...]):
+        found = False
+        section_removed = False
+        for i, statement in enumerate(self.statements):
+            if statement.kind != 'value':
+                section_removed = statement.path[:len(path)] == path
+                if section_removed:
+                    # секция вместе с её значениями - до следующего заголовка
+                    next_start = next((s.start for s in self.statements[i + 1:] if s.kind != 'value'),
+                                      len(self.text))
+                    start = statement.start
+                    if next_start == len(self.text):  # последняя секция - вместе с пустыми строками перед ней
+                        kept = self.text[:start].rstrip('\r\n')
+                        start = len(kept) + len(self.newline) if kept else 0
+                    self.edits.append((start, next_start, ''))
+                    found = True
+            elif not section_removed and statement.path[:len(path)] == path:
+                self.edits.append((statement.start, statement.end, ''))
+                found = True
+        if not found:
+            raise TomlPatchError(f'`{_format_path(path)}` записано не отдельной строкой или секцией')
+
+    def _add(self, path: tuple[str, ...], key: str, value: Any):
+        header_index = self._header(path) if path else None
+        if isinstance(value, dict) and (not path or header_index is None or not _is_flat(value)):
+            self.appends.append(_format_tables(path + (key,), value, self.newline))
+            return
+
+        line = f'{_format_key(key)} = {_format_value(value, indent=_DEFAULT_INDENT, newline=self.newline)}' \
+               f'{self.newline}'
+        if path and header_index is None:  # таблица задана только вложенными секциями - своя секция в конце
+            self.appends.append(f'[{_format_path(path)}]{self.newline}{line}')
+            return
+        self._insert(self._section_end(header_index), line)
+
+    def _set_array(self, path: tuple[str, ...], values: list):
+        """Элементы, оставшиеся в массиве, сохраняют исходную запись (кавычки, комментарии); новые - в конце строк"""
+        statement = self._value(path)
+        text, start, end = self.text, statement.value_start, statement.value_end
+        if text[start] != '[':
+            raise TomlPatchError(f'`{_format_path(path)}` не массив')
+        items = _array_items(text, start, end)
+        raws = [text[s:e] for s, e in items]
+        parsed = [tomllib.loads(f'v = {raw}')['v'] for raw in raws]
+
+        if not values:
+            self.edits.append((start, end, '[]'))
+            return
+
+        multiline = '\n' in text[start:end]
+        if not multiline:
+            pieces = self._reuse(parsed, raws, values, lambda value: _format_value(value))
+            self.edits.append((start, end, '[' + ', '.join(pieces) + ']'))
+            return
+
+        layout = self._multiline_layout(text, start, end, items)
+        if layout is None:  # несколько элементов на строке - массив записывается заново
+            self.edits.append((start, end, _format_value(values, indent=_DEFAULT_INDENT, newline=self.newline)))
+            return
+        head, chunks, tail, indent = layout
+        pieces = self._reuse(parsed, chunks, values,
+                             lambda value: f'{indent}{_format_value(value)},{self.newline}')
+        self.edits.append((start, end, head + ''.join(pieces) + tail))
+
+    @staticmethod
+    def _reuse(parsed: list, originals: list[str], values: list, make) -> list[str]:
+        """Исходная запись для значений, которые уже были в массиве, и новая - для остальных"""
+        available = list(zip(parsed, originals))
+        pieces = []
+        for value in values:
+            for i, (old_value, original) in enumerate(available):
+                if old_value == value:
+                    pieces.append(original)
+                    del available[i]
+                    break
+            else:
+                pieces.append(make(value))
+        return pieces
+
+    def _multiline_layout(self, text: str, start: int, end: int,
+                          items: list[tuple[int, int]]) -> tuple[str, list[str], str, str] | None:
+        """
+        Разбиение многострочного массива с элементами на отдельных строках:
+        (строка `[`, строки элементов с предшествующими комментариями, хвост до `]`, отступ элементов)
+        """
+        head_end = text.find('\n', start) + 1
+        chunk_start = head_end
+        chunks = []
+        for s, e in items:
+            line_start = text.rfind('\n', 0, s) + 1
+            if line_start < chunk_start or text[line_start:s].strip(' \t'):
+                return None  # элемент на одной строке с `[` или с предыдущим элементом
+            pos = _skip_ws(text, e)
+            has_comma = pos < end and text[pos] == ','
+            if has_comma:
+                pos += 1
+            comment_end = _skip_comment(text, _skip_ws(text, pos))
+            if comment_end >= end or text[comment_end] not in '\r\n':
+                return None
+            line_end = text.find('\n', comment_end) + 1
+            trailing = text[e:comment_end] if has_comma else ',' + text[e:comment_end]
+            chunks.append(text[chunk_start:s] + text[s:e] + trailing + text[comment_end:line_end])
+            chunk_start = line_end
+
+        indent = _DEFAULT_INDENT
+        if items:
+            first = items[0][0]
+            indent = text[text.rfind('\n', 0, first) + 1:first]
+        return text[start:head_end], chunks, text[chunk_start:end], indent
+
+
+def patch_toml(text: str, old: dict, new: dict) -> str:
+    """
+    Текст toml документа с данными new, полученный минимальными правками исходного текста с данными old:
+    изменяются только отличающиеся значения, элементы массивов и таблицы, комментарии и порядок сохраняются.
+    Результат проверяется повторным разбором.
+
+    :raise TomlPatchError: правку нельзя внести с сохранением форматирования
+    """
+    patched = _Patcher(text).patch(old, new)
+    try:
+        if tomllib.loads(patched) == new:
+            return patched
+    except tomllib.TOMLDecodeError:
+        pass
+    raise TomlPatchError('результат правки не совпадает с данными')
+
+
+def write_toml_file(toml_path: Path, data: dict) -> bool:
+    """
+    Запись toml файла с сохранением форматирования: в исходный текст вносятся только изменения
+    (см. patch_toml), а если это невозможно - документ записывается заново через tomli_w.
+    Файл записывается атомарно (atomic_write_bytes) и не записывается вовсе, если данные не изменились.
+
+    :return: был ли файл записан
+    """
+    try:
+        original = toml_path.read_bytes()
+    except FileNotFoundError:
+        original = None
+
+    content = None
+    if original is not None:
+        try:
+            text = original.decode('utf-8')
+            old = tomllib.loads(text)
+            if old == data:
+                return False
+            content = patch_toml(text, old, data)
+        except (TomlPatchError, tomllib.TOMLDecodeError, UnicodeDecodeError):
+            content = None
+
+    if content is None:
+        import tomli_w  # нужен только при полной перезаписи, не замедляет запуск команд чтения
+
+        content = tomli_w.dumps(data)
+
+    atomic_write_bytes(toml_path, content.encode('utf-8'))
+    toml_cache.invalidate(toml_path)
+    return True
@@ -0,0 +1,53 @@
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Callable
+
+from core.utils.atomic_write import atomic_write_bytes
+
+_PROBE_CMD = 'uv --version'
+_CACHE_FILE_NAME = 'uv_probe.json'
+
+
+def _cache_path() -> Path:
+    """Кеш пользователя (не проекта): ~/.cache/workspaceclerk, либо $XDG_CACHE_HOME/workspaceclerk"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'workspaceclerk' / _CACHE_FILE_NAME
+
+
+def probe_uv(run_cmd_func: Callable[..., subprocess.CompletedProcess], cwd: Path) -> subprocess.CompletedProcess:
+    """
+    Проверка доступности uv (`uv --version`) с кешем: путь к исполняемому файлу и версия запоминаются
+    по mtime_ns и размеру файла uv, пока он не заменён (обновлён / переустановлен) повторный запуск не нужен.
+
+    :param run_cmd_func: исполнитель команд с сигнатурой core.commons.run_cmd
+    :param cwd: директория исполнения команды
+    :return: результат `uv --version` (при попадании в кеш - без запуска процесса)
+    """
+    uv_path = shutil.which('uv')
+    signature = None
+    if uv_path is not None:
+        try:
+            stat = os.stat(uv_path)
+            signature = [uv_path, stat.st_mtime_ns, stat.st_size]
+        except OSError:
+            pass
+
+    cache_path = _cache_path()
+    if signature is not None:
+        try:
+            cached = json.loads(cache_path.read_bytes())
+            if cached.get('signature') == signature:
+                return subprocess.CompletedProcess(args=_PROBE_CMD, returncode=0, stdout=cached['version'], stderr='')
+        except (OSError, ValueError, AttributeError, KeyError):  # кеша нет или он повреждён
+            pass
+
+    res = run_cmd_func(command=_PROBE_CMD, cwd=cwd, waiting_subprocess=True)
+    if res.returncode == 0 and signature is not None:
+        try:
+            atomic_write_bytes(cache_path, json.dumps({'signature': signature, 'version': res.stdout}).encode('utf-8'))
+        except OSError:  # кеш необязателен (например домашняя директория только для чтения)
+            pass
+    return res
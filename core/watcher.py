@@ -0,0 +1,259 @@
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from core.constants import TOML_FILE_NAME
+from core.manager_packages import ManagerPackages
+from core.models import Package
+from core.utils.directory_walker_scandir import directory_walker_scandir
+
+# виды изменений
+EVENT_PROJECT_CHANGED = 'project_changed'  # изменён pyproject.toml корня (подключение пакетов, зависимости)
+EVENT_PACKAGE_ADDED = 'package_added'  # появилась директория пакета с pyproject.toml
+EVENT_PACKAGE_REMOVED = 'package_removed'  # директория пакета или её pyproject.toml удалены
+EVENT_PACKAGE_CHANGED = 'package_changed'  # изменён pyproject.toml пакета
+EVENT_SOURCE_CHANGED = 'source_changed'  # .py файл создан, изменён или удалён
+
+
+@dataclass
+class ChangeEvent:
+    kind: str
+    path: Path
+    package: str | None = None  # директория пакета, к которому относится изменение (если относится)
+
+    def __str__(self):
+        return f"{self.kind} | {self.path}" + (f" | package : {self.package}" if self.package else "")
+
+
+def _signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class WorkspaceWatcher:
+    """
+    Наблюдение за проектом опросом файловой системы (без зависимостей от ОС): pyproject.toml корня,
+    директории пакетов с их pyproject.toml и .py файлы. Изменение определяется по (mtime_ns, размер).
+
+    Если передан менеджер пакетов, наблюдатель поддерживает актуальную модель `packages`
+    (директория пакета -> Package): пересоздаются только затронутые пакеты, а в сохранённом AST сканировании
+    обновляются только строки изменённых файлов.
+
+    Изменения проверяются вызовом poll() либо в фоновом потоке (start() / stop()),
+    подписчики получают список событий каждой проверки, в которой были изменения.
+    Менеджер пакетов обновляет импорты по событиям наблюдателя с создания наблюдателя до stop()
+    (повторный start() или poll() подключает его снова), после stop() менеджер работает как без наблюдателя.
+    """
+
+    def __init__(self, root_path_in: Path, src_path_in: Path,
+                 packages_manager: ManagerPackages | None = None,
+                 interval: float = 1.0, track_sources: bool = True):
+        """
+        :param root_path_in: корень проекта
+        :param src_path_in: директория с пакетами
+        :param packages_manager: менеджер пакетов для поддержания модели `packages` (None - только события)
+        :param interval: период опроса в секундах для фонового потока
+        :param track_sources: отслеживать .py файлы (обход всего проекта на каждый опрос)
+        """
+        self._root_path = root_path_in
+        self._src_path = src_path_in
+        self._manager = packages_manager
+        self._interval = interval
+        self._track_sources = track_sources
+
+        self._subscribers: list[Callable[[list[ChangeEvent]], None]] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.packages: dict[str, Package] = {}
+        self._attached = False
+        self._attach()
+
+        self._project_signature = _signature(self._root_toml)
+        self._packages_signatures = self._scan_packages()
+        self._sources_signatures = self._scan_sources()
+
+        if self._manager is not None:
+            for package_dir in self._packages_signatures:
+                self._update_package(package_dir)
+
+    def _attach(self):
+        # импорты обновляются по событиям наблюдателя, обход проекта при каждом запросе списка не нужен
+        if self._manager is not None and not self._attached:
+            self._manager.ast_watch_attach(track_sources=self._track_sources)
+            self._attached = True
+
+    def _detach(self):
+        if self._manager is not None and self._attached:
+            self._manager.ast_watch_detach(track_sources=self._track_sources)
+            self._attached = False
+
+    @property
+    def _root_toml(self) -> str:
+        return os.path.join(self._root_path, TOML_FILE_NAME)
+
+    def _scan_packages(self) -> dict[str, tuple[int, int]]:
+        """директория пакета -> сигнатура его pyproject.toml"""
+        signatures = {}
+        try:
+            entries = os.scandir(self._src_path)
+        except OSError:
+            return signatures
+
+        with entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                signature = _signature(os.path.join(entry.path, TOML_FILE_NAME))
+                if signature is not None:
+                    signatures[entry.path] = signature
+        return signatures
+
+    def _scan_sources(self) -> dict[str, tuple[int, int]]:
+        if not self._track_sources:
+            return {}
+
+        signatures = {}
+        for file_name in directory_walker_scandir(root_path_in=self._root_path, extensions_filter={'.py', }):
+            signature = _signature(file_name)
+            if signature is not None:
+                signatures[file_name] = signature
+        return signatures
+
+    def _package_of(self, file_name: str) -> str | None:
+        """Директория пакета, которой принадлежит файл"""
+        src_prefix = os.path.join(self._src_path, '')
+        if not file_name.startswith(src_prefix):
+            return None
+        package_dir = os.path.join(self._src_path, file_name[len(src_prefix):].split(os.sep, 1)[0])
+        return package_dir if package_dir in self._packages_signatures else None
+
+    @staticmethod
+    def _diff(old: dict, new: dict) -> tuple[list, list, list]:
+        """(добавленные, удалённые, изменённые) ключи"""
+        added = [key for key in new if key not in old]
+        removed = [key for key in old if key not in new]
+        changed = [key for key in new if key in old and old[key] != new[key]]
+        return added, removed, changed
+
+    def _update_package(self, package_dir: str):
+        package = self._manager.package_get(Path(package_dir))
+        if package is None:
+            self.packages.pop(package_dir, None)
+        else:
+            self.packages[package_dir] = package
+
+    def poll(self) -> list[ChangeEvent]:
+        """Одна проверка изменений: обновление модели и уведомление подписчиков"""
+        with self._lock:
+            self._attach()
+            events = self._poll()
+
+        if events:
+            for callback in list(self._subscribers):
+                callback(events)
+        return events
+
+    def _poll(self) -> list[ChangeEvent]:
+        events: list[ChangeEvent] = []
+
+        project_signature = _signature(self._root_toml)
+        project_changed = project_signature != self._project_signature
+        self._project_signature = project_signature
+        if project_changed:
+            events.append(ChangeEvent(kind=EVENT_PROJECT_CHANGED, path=Path(self._root_toml)))
+
+        packages_signatures = self._scan_packages()
+        added, removed, changed = self._diff(self._packages_signatures, packages_signatures)
+        self._packages_signatures = packages_signatures
+        for kind, package_dirs in ((EVENT_PACKAGE_ADDED, added),
+                                   (EVENT_PACKAGE_REMOVED, removed),
+                                   (EVENT_PACKAGE_CHANGED, changed)):
+            for package_dir in package_dirs:
+                events.append(ChangeEvent(kind=kind, path=Path(package_dir) / TOML_FILE_NAME, package=package_dir))
+
+        sources_signatures = self._scan_sources()
+        sources_added, sources_removed, sources_changed = self._diff(self._sources_signatures, sources_signatures)
+        self._sources_signatures = sources_signatures
+        for file_name in [*sources_added, *sources_changed, *sources_removed]:
+            events.append(ChangeEvent(kind=EVENT_SOURCE_CHANGED, path=Path(file_name),
+                                      package=self._package_of(file_name)))
+
+        if self._manager is None or not events:
+            return events
+
+        # модель пакетов: пересоздаются только затронутые пакеты
+        for package_dir in removed:
+            self.packages.pop(package_dir, None)
+        for package_dir in [*added, *changed]:
+            self._update_package(package_dir)
+
+        if project_changed:  # подключение пакетов хранится в корневом toml, пересоздавать пакеты не нужно
+            for package_dir, package in self.packages.items():
+                if package_dir not in added and package_dir not in changed:
+                    fresh = self._manager.package_get(Path(package_dir))
+                    if fresh is not None:
+                        package.is_installed = fresh.is_installed
+
+        imports_changed = self._manager.ast_update_files(
+            changed=[Path(file_name) for file_name in [*sources_added, *sources_changed]],
+            removed=[Path(file_name) for file_name in sources_removed],
+        )
+        if imports_changed:
+            for package in self.packages.values():
+                package.invalidate_related_files()
+
+        return events
+
+    def subscribe(self, callback: Callable[[list[ChangeEvent]], None]) -> Callable[[], None]:
+        """
+        Подписка на изменения. В фоновом режиме callback вызывается из потока наблюдателя.
+
+        :return: функция отмены подписки
+        """
+        self._subscribers.append(callback)
+
+        def unsubscribe():
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def start(self):
+        """Запуск опроса в фоновом потоке"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        with self._lock:
+            self._attach()
+        self._thread = threading.Thread(target=self._run, name='WorkspaceWatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Остановка фонового опроса и отключение от менеджера пакетов"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._detach()
+
+    def _run(self):
+        while not self._stop_event.wait(self._interval):
+            try:
+                self.poll()
+            except Exception:  # noqa  ошибка подписчика или гонка с файловой системой не должна остановить наблюдение
+                pass
+
+    def __enter__(self) -> 'WorkspaceWatcher':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
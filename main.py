@@ -1,7 +1,10 @@
-import tomli_w
-import tomllib
+import copy
 from pathlib import Path
 import subprocess
+from core.utils.file_lock import file_lock
+from core.utils.toml_cache import toml_cache
+from core.utils.toml_writer import write_toml_file
+from core.watcher import WorkspaceWatcher
 
 root_path: None | Path = None
 
@@ -12,20 +15,19 @@ root_path: None | Path = None
 
 
 def write_toml(toml_path, data):
+    """Запись toml с сохранением форматирования, атомарно и только при изменении данных (см. write_toml_file)"""
     if not toml_path.exists():
         raise FileNotFoundError(f'Файл с .toml не найден `{toml_path}`')
-    with open(toml_path, 'wb') as f:
-        tomli_w.dump(data, f)
+    write_toml_file(toml_path, data)
 
     return data
 
 
 def read_toml(toml_path):
+    """Чтение toml через общий кеш (документ общий - перед изменением нужно делать копию)"""
     if not toml_path.exists():
         raise FileNotFoundError(f'Файл с .toml не найден `{toml_path}`')
-    with open(toml_path, 'rb') as f:
-        data = tomllib.load(f)
-    return data
+    return toml_cache.load(toml_path)
 
 
 def create_package(project_name: str):
@@ -76,10 +78,12 @@ def make_add_cmd(pkg_name, path):
 
 def make_remove_cmd(pkg_name, path):
     def func():
-        data = read_toml(toml_path=path / 'pyproject.toml')
-        data['tool']['uv']['workspace']['members'].remove(pkg_name)
-        write_toml(toml_path=path / 'pyproject.toml', data=data)
-        subprocess.run(f'uv remove {pkg_name}', cwd=path, capture_output=True)
+        # чтение, изменение и запись toml под блокировкой (параллельные процессы не теряют изменения друг друга)
+        with file_lock(path / 'pyproject.toml').exclusive():
+            data = copy.deepcopy(read_toml(toml_path=path / 'pyproject.toml'))
+            data['tool']['uv']['workspace']['members'].remove(pkg_name)
+            write_toml(toml_path=path / 'pyproject.toml', data=data)
+            subprocess.run(f'uv remove {pkg_name}', cwd=path, capture_output=True)
         subprocess.run('uv sync', cwd=root_path, capture_output=True)
 
     return lambda: func()
@@ -104,14 +108,14 @@ def make_depends_remove(pkg_name, path):
 def scan_packages():
     packages_list = []
 
+    # установленные пакеты получаются из pyproject.dependencies (корневой toml читается один раз)
+    packages_installed = read_toml(toml_path=root_path / 'pyproject.toml')
+    packages_installed = packages_installed['project']['dependencies']
+
     # поиск пакетов
     for path in root_path.iterdir():
         toml_path = path / 'pyproject.toml'
         if path.is_dir() and toml_path.exists():
-            # установленные пакеты получаются из pyproject.dependencies
-            packages_installed = read_toml(toml_path=root_path / 'pyproject.toml')
-            packages_installed = packages_installed['project']['dependencies']
-
             name = path.parts[-1]
             packages_list.append({
                 'name': name,
@@ -180,9 +184,13 @@ def packages_command_menu(package):
 def packages_menu():
     print(f'-' * 50)
     print('Список пакетов')
+    # пакеты пересканируются только если изменились pyproject.toml корня или пакетов
+    watcher = WorkspaceWatcher(root_path_in=root_path, src_path_in=root_path, track_sources=False)
+    packages = scan_packages()
     while True:
         # Внешнее меню с выбором пакетов
-        packages = scan_packages()
+        if watcher.poll():
+            packages = scan_packages()
         for i, pack in enumerate(packages):
             print(f"{i}. {pack['name']} | install : {pack['is_installed']} | dependencies: {pack["dependencies"]}")
 